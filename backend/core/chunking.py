@@ -0,0 +1,98 @@
+"""
+Document Chunking - Split long documents into token-budgeted windows
+"""
+
+import math
+from typing import List
+
+# Rough characters-per-token ratio for English/technical text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_into_chunks(
+    text: str,
+    chunk_tokens: int = 1500,
+    overlap_tokens: int = 150,
+    chars_per_token: float = CHARS_PER_TOKEN
+) -> List[str]:
+    """
+    Split text into overlapping windows of roughly `chunk_tokens` tokens
+
+    Window ends are moved back to the nearest paragraph, sentence or word
+    boundary so chunks do not cut words in half.
+
+    Args:
+        text: Full document text
+        chunk_tokens: Token budget per chunk
+        overlap_tokens: Tokens shared between consecutive chunks
+        chars_per_token: Characters per token of the target model
+
+    Returns:
+        List of chunk strings (a single chunk for short texts)
+    """
+    text = text.strip()
+    window = int(chunk_tokens * chars_per_token)
+    overlap = min(int(overlap_tokens * chars_per_token), window // 2)
+
+    if len(text) <= window:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+
+    while start < len(text):
+        end = min(start + window, len(text))
+
+        if end < len(text):
+            # Only look for a boundary in the last fifth of the window
+            floor = start + (window * 4) // 5
+            for separator in ("\n\n", ". ", "\n", " "):
+                cut = text.rfind(separator, floor, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        if end >= len(text):
+            break
+
+        start = max(end - overlap, start + 1)
+
+    return chunks
+
+
+def distribute_examples(num_examples: int, num_chunks: int) -> List[int]:
+    """
+    Spread an example quota across chunks
+
+    With more examples than chunks every chunk gets an even share. With more
+    chunks than examples, evenly spaced chunks get one example each so the
+    whole document is still sampled.
+
+    Args:
+        num_examples: Examples requested for the document
+        num_chunks: Number of chunks in the document
+
+    Returns:
+        Per-chunk example counts (summing to num_examples)
+    """
+    if num_chunks <= 0:
+        return []
+
+    if num_examples >= num_chunks:
+        base, extra = divmod(num_examples, num_chunks)
+        return [base + (1 if i < extra else 0) for i in range(num_chunks)]
+
+    quotas = [0] * num_chunks
+    for i in range(num_examples):
+        quotas[(i * num_chunks) // num_examples] = 1
+
+    return quotas
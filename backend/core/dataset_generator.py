@@ -2,17 +2,62 @@
 Dataset Generator - Generate training examples from documents using Ollama
 """
 
+import contextvars
+import copy
+import hashlib
 import json
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 
+from backend.core.chunking import split_into_chunks, distribute_examples
+from backend.core.json_stream import ExampleStreamParser, extract_examples
+from backend.core.minhash import MinHashLSH
+from backend.core.oversampling import AcceptanceTracker
+from backend.core.run_journal import RunJournal
+from backend.core.scheduler import WorkScheduler
+from backend.core.token_budget import TokenBudgetPlanner
+from backend.ml.metrics import collect
 from backend.ml.ollama_client import get_ollama_client
 from backend.utils.logger import setup_logger
 from backend.utils.config import settings
 
 logger = setup_logger("ki.core.dataset_generator")
 
+# JSON schema for structured output mode. Ollama's json format requires a
+# top-level object, so the example array is wrapped in {"examples": [...]}
+EXAMPLES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "examples": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "instruction": {"type": "string"},
+                    "input": {"type": "string"},
+                    "output": {"type": "string"}
+                },
+                "required": ["instruction", "input", "output"]
+            }
+        }
+    },
+    "required": ["examples"]
+}
+
+# Packed mode tags every example with the number of its source document
+PACKED_EXAMPLES_SCHEMA = copy.deepcopy(EXAMPLES_SCHEMA)
+PACKED_EXAMPLES_SCHEMA["properties"]["examples"]["items"]["properties"]["document"] = {"type": "integer"}
+PACKED_EXAMPLES_SCHEMA["properties"]["examples"]["items"]["required"].insert(0, "document")
+
+# Most documents combined into one packed request
+MAX_PACKED_DOCUMENTS = 8
+
 
 class DatasetGenerator:
     """Generate training datasets from parsed documents"""
@@ -25,12 +70,18 @@ class DatasetGenerator:
             ollama_client: Optional Ollama client instance
         """
         self.ollama_client = ollama_client or get_ollama_client()
+        self.budget = TokenBudgetPlanner(self.ollama_client)
+        self.acceptance = AcceptanceTracker()
         self.quality_thresholds = {
             'High': 0.8,
             'Medium': 0.6,
             'Low': 0.4
         }
 
+        # Response parse outcomes, used for the parse failure rate
+        self.parse_counts = {'parsed': 0, 'recovered': 0, 'failed': 0}
+        self._parse_lock = threading.Lock()
+
     def generate_examples_from_document(
         self,
         document_text: str,
@@ -38,7 +89,11 @@ class DatasetGenerator:
         category: str,
         num_examples: int = 5,
         quality_level: str = "High",
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        max_text_length: Optional[int] = None,
+        streaming: bool = False,
+        structured: bool = False,
+        use_cache: bool = True
     ) -> List[Dict]:
         """
         Generate training examples from a single document
@@ -50,6 +105,12 @@ class DatasetGenerator:
             num_examples: Number of examples to generate
             quality_level: Quality threshold (High, Medium, Low)
             temperature: Sampling temperature for generation
+            max_text_length: Character cap on the document text (None to fit it
+                to the model's context window only)
+            streaming: Parse and validate examples while the model is still generating
+            structured: Constrain the reply with Ollama's JSON format/schema option
+            use_cache: Set False to always ask the model (follow-up requests
+                would otherwise get the cached reply of an identical prompt)
 
         Returns:
             List of example dictionaries
@@ -63,24 +124,37 @@ class DatasetGenerator:
                 document_name, category, num_examples
             )
 
-        # Create prompt for example generation
-        prompt = self._create_generation_prompt(
-            document_text, category, num_examples
+        # Create prompt for example generation, sized to the context window
+        prompt, num_predict = self._plan_prompt(
+            document_text, category, num_examples, max_text_length, structured
         )
+        output_format = self._output_format() if structured else None
+        # The window the prompt was fitted to; Ollama would otherwise use its own default
+        num_ctx = self.budget.context_window(self.ollama_client.model)
 
         try:
-            # Generate examples using Ollama
-            response = self.ollama_client.generate(
-                prompt=prompt,
-                temperature=temperature,
-                max_tokens=4096
-            )
-
-            # Parse JSON response
-            examples = self._parse_ollama_response(response, document_name, category)
-
-            # Validate quality
-            validated_examples = self._validate_examples(examples, quality_level)
+            if streaming:
+                validated_examples = self._generate_streaming(
+                    prompt, document_name, category, quality_level, temperature, output_format, num_predict, num_ctx
+                )
+            else:
+                # Generate examples using Ollama
+                response = self.ollama_client.generate(
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=num_predict,
+                    num_ctx=num_ctx,
+                    format=output_format,
+                    use_cache=use_cache,
+                    cache_if=_has_examples
+                )
+
+                # Parse JSON response
+                examples = self._parse_ollama_response(response, document_name, category)
+                self._observe_usage(prompt, len(examples))
+
+                # Validate quality
+                validated_examples = self._validate_examples(examples, quality_level)
 
             logger.info(f"✅ Generated {len(validated_examples)} validated examples from {document_name}")
 
@@ -93,17 +167,280 @@ class DatasetGenerator:
                 document_name, category, num_examples
             )
 
+    def _generate_streaming(
+        self,
+        prompt: str,
+        document_name: str,
+        category: str,
+        quality_level: str,
+        temperature: float,
+        output_format=None,
+        num_predict: Optional[int] = None,
+        num_ctx: Optional[int] = None
+    ) -> List[Dict]:
+        """Stream a generation, validating each example as soon as it is complete"""
+
+        parser = ExampleStreamParser()
+        examples = []
+
+        for piece in self.ollama_client.generate_stream(
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=num_predict,
+            num_ctx=num_ctx,
+            format=output_format
+        ):
+            for example in parser.feed(piece):
+                examples.append(self._finalize_example(example, document_name, category))
+
+        self._observe_usage(prompt, len(examples))
+
+        if parser.errors:
+            logger.warning(f"Skipped {parser.errors} malformed objects in streamed response")
+
+        if not examples:
+            self._count_parse('failed')
+        else:
+            self._count_parse('recovered' if parser.errors else 'parsed')
+
+        return self._validate_examples(examples, quality_level)
+
+    def generate_examples_from_pack(
+        self,
+        documents: List[Dict],
+        category: str,
+        quality_level: str = "High",
+        temperature: float = 0.7,
+        streaming: bool = False,
+        structured: bool = False,
+        use_cache: bool = True
+    ) -> Dict[int, List[Dict]]:
+        """
+        Generate training examples for several small documents in one request
+
+        The prompt template is sent once for the whole pack, with a quota per
+        document; every example names the document it was drawn from, which
+        is used to set its source.
+
+        Args:
+            documents: Work items with doc_index, document_name, text and num_examples
+            category: Vulnerability category
+            quality_level: Quality threshold (High, Medium, Low)
+            temperature: Sampling temperature for generation
+            streaming: Parse and validate examples while the model is still generating
+            structured: Constrain the reply with Ollama's JSON format/schema option
+            use_cache: Set False to always ask the model
+
+        Returns:
+            Dict of {doc_index: validated examples}
+        """
+        total = sum(document['num_examples'] for document in documents)
+        logger.info(f"Generating {total} examples from {len(documents)} packed documents (category: {category})")
+
+        if not self.ollama_client.is_available():
+            logger.warning("Ollama not available, using simulated generation")
+            return {
+                document['doc_index']: self._generate_simulated_examples(
+                    document['document_name'], category, document['num_examples']
+                )
+                for document in documents
+            }
+
+        # Packs are sized to fit the context window, so only the output budget is planned here
+        model = self.ollama_client.model
+        prompt = self._create_packed_prompt(documents, category, structured)
+        _, num_predict = self.budget.fit("", model, self.budget.count_tokens(prompt, model), total)
+        output_format = self._output_format(packed=True) if structured else None
+        num_ctx = self.budget.context_window(model)
+
+        try:
+            if streaming:
+                validated_examples = self._generate_streaming(
+                    prompt, "", category, quality_level, temperature, output_format, num_predict, num_ctx
+                )
+            else:
+                response = self.ollama_client.generate(
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=num_predict,
+                    num_ctx=num_ctx,
+                    format=output_format,
+                    use_cache=use_cache,
+                    cache_if=_has_examples
+                )
+                examples = self._parse_ollama_response(response, "", category)
+                self._observe_usage(prompt, len(examples))
+                validated_examples = self._validate_examples(examples, quality_level)
+
+            by_document = self._assign_packed(validated_examples, documents)
+
+            logger.info(f"✅ Generated {len(validated_examples)} validated examples from {len(documents)} packed documents")
+
+            return by_document
+
+        except Exception as e:
+            logger.error(f"❌ Error generating packed examples: {str(e)}")
+            return {
+                document['doc_index']: self._generate_simulated_examples(
+                    document['document_name'], category, document['num_examples']
+                )
+                for document in documents
+            }
+
+    def _assign_packed(self, examples: List[Dict], documents: List[Dict]) -> Dict[int, List[Dict]]:
+        """Map packed examples back to their documents by the 'document' number"""
+
+        by_document = {document['doc_index']: [] for document in documents}
+        unassigned = []
+
+        for example in examples:
+            number = example.pop('document', None)
+            try:
+                document = documents[int(number) - 1] if int(number) >= 1 else None
+            except (TypeError, ValueError, IndexError):
+                document = None
+
+            if document is None:
+                unassigned.append(example)
+                continue
+
+            example['source'] = document['document_name']
+            by_document[document['doc_index']].append(example)
+
+        # Untagged examples fill documents still short of their quota
+        for example in unassigned:
+            short = [
+                document for document in documents
+                if len(by_document[document['doc_index']]) < document['num_examples']
+            ]
+            if not short:
+                logger.debug(f"Dropping {len(unassigned)} packed examples without a document")
+                break
+            example['source'] = short[0]['document_name']
+            by_document[short[0]['doc_index']].append(example)
+
+        return by_document
+
+    def _create_packed_prompt(self, documents: List[Dict], category: str, structured: bool = False) -> str:
+        """Create one prompt covering several documents, each with its own quota"""
+
+        total = sum(document['num_examples'] for document in documents)
+
+        document_sections = "\n\n".join(
+            f"""Document {number}: {document['document_name']}
+---
+{document['text']}
+---"""
+            for number, document in enumerate(documents, 1)
+        )
+        quotas = "\n".join(
+            f"- {document['num_examples']} examples from Document {number}"
+            for number, document in enumerate(documents, 1)
+        )
+
+        example = """  {
+    "document": 1,
+    "instruction": "Identify the SSRF vulnerability in this code",
+    "input": "Code snippet showing vulnerable implementation",
+    "output": "Detailed explanation of the SSRF vulnerability, how to exploit it, and how to fix it"
+  }"""
+
+        if structured:
+            output_instructions = f"""Output ONLY a JSON object with an "examples" array of {total} examples.
+
+Example format:
+{{
+  "examples": [
+{example}
+  ]
+}}"""
+        else:
+            output_instructions = f"""Output ONLY a valid JSON array of {total} examples. Do not include any other text.
+
+Example format:
+[
+{example}
+]"""
+
+        prompt = f"""You are an expert in cybersecurity and bug bounty hunting, specializing in {category} vulnerabilities.
+
+Your task is to generate high-quality training examples for teaching AI agents about {category} vulnerabilities based on the following {len(documents)} documents.
+
+{document_sections}
+
+Generate exactly:
+{quotas}
+
+Each example must be based on a single document and follow this structure:
+
+{{
+  "document": <number of the document the example is based on>,
+  "instruction": "A clear task instruction or question about {category}",
+  "input": "Specific context, scenario, or code snippet related to {category}",
+  "output": "Detailed, educational explanation or analysis of the {category} vulnerability"
+}}
+
+Requirements:
+1. Each example should be unique and cover different aspects of {category}
+2. Instructions should be clear and actionable
+3. Inputs should provide realistic scenarios or code examples
+4. Outputs should be detailed, educational, and technically accurate
+5. Focus on practical bug bounty and security testing scenarios
+6. Include detection methods, exploitation techniques, and mitigation strategies
+
+{output_instructions}
+
+Generate {total} examples now:"""
+
+        return prompt
+
+    def _plan_prompt(
+        self,
+        document_text: str,
+        category: str,
+        num_examples: int,
+        max_text_length: Optional[int],
+        structured: bool
+    ):
+        """
+        Build the generation prompt and its output budget
+
+        The document is cut to whatever room the context window leaves after
+        the prompt template and the output tokens reserved for num_examples.
+
+        Returns:
+            (prompt, num_predict)
+        """
+        model = self.ollama_client.model
+
+        if max_text_length and len(document_text) > max_text_length:
+            document_text = document_text[:max_text_length] + "..."
+
+        template_tokens = self.budget.count_tokens(
+            self._create_generation_prompt("", category, num_examples, None, structured), model
+        )
+        document_text, num_predict = self.budget.fit(document_text, model, template_tokens, num_examples)
+
+        prompt = self._create_generation_prompt(document_text, category, num_examples, None, structured)
+        return prompt, num_predict
+
+    def _observe_usage(self, prompt: str, num_examples: int):
+        """Feed the token counts of the last response back into the budget planner"""
+        if hasattr(self.ollama_client, 'last_usage'):
+            self.budget.observe(self.ollama_client.model, prompt, self.ollama_client.last_usage(), num_examples)
+
     def _create_generation_prompt(
         self,
         document_text: str,
         category: str,
-        num_examples: int
+        num_examples: int,
+        max_text_length: Optional[int] = 3000,
+        structured: bool = False
     ) -> str:
         """Create prompt for Ollama to generate examples"""
 
         # Truncate document if too long
-        max_text_length = 3000
-        if len(document_text) > max_text_length:
+        if max_text_length and len(document_text) > max_text_length:
             document_text = document_text[:max_text_length] + "..."
 
         prompt = f"""You are an expert in cybersecurity and bug bounty hunting, specializing in {category} vulnerabilities.
@@ -131,20 +468,45 @@ Requirements:
 5. Focus on practical bug bounty and security testing scenarios
 6. Include detection methods, exploitation techniques, and mitigation strategies
 
-Output ONLY a valid JSON array of {num_examples} examples. Do not include any other text.
+{self._output_instructions(num_examples, structured)}
 
-Example format:
-[
-  {{
+Generate {num_examples} examples now:"""
+
+        return prompt
+
+    def _output_instructions(self, num_examples: int, structured: bool) -> str:
+        """Output format section of the generation prompt"""
+
+        example = """  {
     "instruction": "Identify the SSRF vulnerability in this code",
     "input": "Code snippet showing vulnerable implementation",
     "output": "Detailed explanation of the SSRF vulnerability, how to exploit it, and how to fix it"
-  }}
-]
+  }"""
 
-Generate {num_examples} examples now:"""
+        if structured:
+            return f"""Output ONLY a JSON object with an "examples" array of {num_examples} examples.
 
-        return prompt
+Example format:
+{{
+  "examples": [
+{example}
+  ]
+}}"""
+
+        return f"""Output ONLY a valid JSON array of {num_examples} examples. Do not include any other text.
+
+Example format:
+[
+{example}
+]"""
+
+    def _output_format(self, packed: bool = False):
+        """Value for Ollama's format option in structured mode"""
+
+        # Servers without schema support only accept the plain 'json' mode
+        if settings.generation_structured_format == "json":
+            return "json"
+        return PACKED_EXAMPLES_SCHEMA if packed else EXAMPLES_SCHEMA
 
     def _parse_ollama_response(
         self,
@@ -158,26 +520,52 @@ Generate {num_examples} examples now:"""
             # Try to parse as JSON
             examples = json.loads(response)
 
+            # Structured mode wraps the array as {"examples": [...]}
+            if isinstance(examples, dict) and isinstance(examples.get('examples'), list):
+                examples = examples['examples']
+
             if not isinstance(examples, list):
                 logger.warning("Response is not a list, wrapping in array")
                 examples = [examples]
 
-            # Add metadata to each example
-            for i, example in enumerate(examples):
-                example['source'] = document_name
-                example['category'] = category
-                example['timestamp'] = datetime.now().isoformat()
-                example['generated_by'] = 'ollama'
-                example['quality_score'] = self._estimate_quality(example)
+            self._count_parse('parsed')
 
-            return examples
+            # Add metadata to each example
+            return [
+                self._finalize_example(example, document_name, category)
+                for example in examples
+                if isinstance(example, dict)
+            ]
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response: {str(e)}")
             logger.debug(f"Response was: {response[:500]}...")
 
             # Try to extract JSON from response
-            return self._extract_json_from_text(response, document_name, category)
+            examples = self._extract_json_from_text(response, document_name, category)
+            self._count_parse('recovered' if examples else 'failed')
+
+            return examples
+
+    def _count_parse(self, outcome: str):
+        """Record how a model response was parsed"""
+        with self._parse_lock:
+            self.parse_counts[outcome] += 1
+
+    def _parse_stats(self, since: Dict[str, int]) -> Dict:
+        """Parse outcome counts since a snapshot of parse_counts"""
+
+        with self._parse_lock:
+            counts = {key: value - since.get(key, 0) for key, value in self.parse_counts.items()}
+
+        responses = sum(counts.values())
+
+        return {
+            'parsed_responses': counts['parsed'],
+            'recovered_responses': counts['recovered'],
+            'parse_failures': counts['failed'],
+            'parse_failure_rate': counts['failed'] / responses if responses else 0.0
+        }
 
     def _extract_json_from_text(
         self,
@@ -185,35 +573,30 @@ Generate {num_examples} examples now:"""
         document_name: str,
         category: str
     ) -> List[Dict]:
-        """Try to extract JSON array from text that may contain extra content"""
-
-        # Look for JSON array
-        import re
+        """Try to extract example objects from text that may contain extra content"""
 
-        # Find content between [ and ]
-        json_match = re.search(r'\[.*\]', text, re.DOTALL)
+        # Linear scan that decodes each object separately, so one malformed
+        # example does not take the rest of the response with it
+        examples = extract_examples(text)
 
-        if json_match:
-            try:
-                json_str = json_match.group(0)
-                examples = json.loads(json_str)
+        if not examples:
+            logger.warning("Could not extract valid JSON from response")
 
-                # Add metadata
-                for example in examples:
-                    example['source'] = document_name
-                    example['category'] = category
-                    example['timestamp'] = datetime.now().isoformat()
-                    example['generated_by'] = 'ollama'
-                    example['quality_score'] = self._estimate_quality(example)
+        return [
+            self._finalize_example(example, document_name, category)
+            for example in examples
+        ]
 
-                return examples
+    def _finalize_example(self, example: Dict, document_name: str, category: str) -> Dict:
+        """Attach source metadata and quality score to a parsed example"""
 
-            except json.JSONDecodeError:
-                logger.error("Could not parse extracted JSON")
+        example['source'] = document_name
+        example['category'] = category
+        example['timestamp'] = datetime.now().isoformat()
+        example['generated_by'] = 'ollama'
+        example['quality_score'] = self._estimate_quality(example)
 
-        # If all else fails, return empty list
-        logger.warning("Could not extract valid JSON from response")
-        return []
+        return example
 
     def _estimate_quality(self, example: Dict) -> float:
         """Estimate quality score of an example"""
@@ -309,7 +692,24 @@ Generate {num_examples} examples now:"""
         category: str,
         examples_per_doc: int = 5,
         quality_level: str = "High",
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        concurrent: bool = False,
+        max_workers: Optional[int] = None,
+        chunked: bool = False,
+        chunk_tokens: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        streaming: bool = False,
+        resume: Optional[bool] = None,
+        run_id: Optional[str] = None,
+        structured: bool = False,
+        warm_up: Optional[bool] = None,
+        packed: bool = False,
+        pack_tokens: Optional[int] = None,
+        fill_to_target: bool = False,
+        oversample_budget: Optional[float] = None,
+        deduplicate: Optional[bool] = None,
+        similarity_threshold: float = 0.85,
+        progress_callback: Optional[Callable[[int, int, Dict], None]] = None
     ) -> Dict:
         """
         Generate complete dataset from multiple documents
@@ -320,6 +720,36 @@ Generate {num_examples} examples now:"""
             examples_per_doc: Examples to generate per document
             quality_level: Quality threshold
             temperature: Sampling temperature
+            concurrent: Generate for several documents at once
+            max_workers: Concurrent requests (defaults to settings.max_workers,
+                or the Ollama host pool capacity if larger)
+            chunked: Split each full document into token-budgeted chunks
+                instead of truncating it, spreading examples_per_doc across them
+            chunk_tokens: Token budget per chunk (defaults to settings)
+            chunk_overlap: Tokens shared between chunks (defaults to settings)
+            streaming: Stream responses and validate examples as they arrive
+            resume: Journal per-document results and skip documents already
+                finished by an earlier launch of the same run
+                (defaults to settings.enable_checkpoint_resume)
+            run_id: Explicit run id (defaults to one derived from the inputs)
+            structured: Constrain replies to the example JSON schema
+            warm_up: Load and pin the model before the first request and
+                release it afterwards (defaults to settings.ollama_warm_up)
+            packed: Generate for several small documents in one request
+            pack_tokens: Document tokens per packed request (defaults to settings)
+            fill_to_target: Send follow-up requests for documents left short of
+                examples_per_doc by quality rejection, sized by learned
+                acceptance rates
+            oversample_budget: Most examples requested per document, as a
+                multiple of examples_per_doc (defaults to settings)
+            deduplicate: Reject near-duplicates of examples already generated in
+                this run as results arrive; rejected examples count against the
+                acceptance rate used by fill_to_target
+                (defaults to settings.enable_deduplication)
+            similarity_threshold: Similarity (0-1) at which an example is a duplicate
+            progress_callback: Called as (items done, total items, info) after
+                each first-pass work item, info holding the examples accepted
+                so far and the running tokens/sec
 
         Returns:
             Complete dataset dictionary
@@ -334,25 +764,291 @@ Generate {num_examples} examples now:"""
             'total_rejected': 0
         }
 
-        for file_path, doc_data in parsed_documents.items():
-            document_name = Path(file_path).name
-            document_text = doc_data.get('full_text', '')
-
-            # Generate examples for this document
-            examples = self.generate_examples_from_document(
-                document_text=document_text,
-                document_name=document_name,
+        chunk_tokens = chunk_tokens or settings.generation_chunk_tokens
+        pack_tokens = pack_tokens or settings.generation_pack_tokens
+        if deduplicate is None:
+            deduplicate = settings.enable_deduplication
+        if chunk_overlap is None:
+            chunk_overlap = settings.generation_chunk_overlap_tokens
+
+        # Content-based keys: re-uploaded files get new temp paths in the UI
+        document_keys = [
+            self._document_key(file_path, doc_data)
+            for file_path, doc_data in parsed_documents.items()
+        ]
+
+        # Journal finished documents so a crashed run can be resumed
+        journal = None
+        finished: Dict[str, Dict] = {}
+        if settings.enable_checkpoint_resume if resume is None else resume:
+            parameters = {
+                "model": self.ollama_client.model,
+                "examples_per_doc": examples_per_doc,
+                "quality_level": quality_level,
+                "temperature": temperature,
+                "chunked": chunked,
+                "chunk_tokens": chunk_tokens if chunked else None,
+                "chunk_overlap": chunk_overlap if chunked else None,
+                "structured": structured,
+                "packed": packed,
+                "pack_tokens": pack_tokens if packed else None,
+                "fill_to_target": fill_to_target,
+                "similarity_threshold": similarity_threshold if deduplicate else None
+            }
+            journal = RunJournal(run_id or RunJournal.make_run_id(category, parameters, document_keys))
+            journal.start({
+                "category": category,
+                "parameters": parameters,
+                "documents": document_keys
+            })
+            finished = journal.completed()
+            if finished:
+                logger.info(f"Skipping {len(finished)} documents already finished in run {journal.run_id}")
+
+        parse_snapshot = dict(self.parse_counts)
+
+        # Work queue: one item per document, or one per chunk in chunked mode
+        work_items = []
+        for doc_index, (file_path, doc_data) in enumerate(parsed_documents.items()):
+            if document_keys[doc_index] in finished:
+                continue
+            work_items.extend(self._plan_document(
+                doc_index,
+                Path(file_path).name,
+                doc_data.get('full_text', ''),
+                examples_per_doc,
+                chunked,
+                chunk_tokens,
+                chunk_overlap
+            ))
+
+        if chunked:
+            logger.info(f"Chunked mode: {len(work_items)} work items from {len(parsed_documents)} documents")
+
+        if packed:
+            work_items = self._pack_items(work_items, category, pack_tokens, structured)
+
+        def run_item(item: Dict, use_cache: bool = True) -> Dict[int, List[Dict]]:
+            if 'pack' in item:
+                return self.generate_examples_from_pack(
+                    documents=item['pack'],
+                    category=category,
+                    quality_level=quality_level,
+                    temperature=temperature,
+                    streaming=streaming,
+                    structured=structured,
+                    use_cache=use_cache
+                )
+
+            return {item['doc_index']: self.generate_examples_from_document(
+                document_text=item['text'],
+                document_name=item['document_name'],
                 category=category,
-                num_examples=examples_per_doc,
+                num_examples=item['num_examples'],
                 quality_level=quality_level,
-                temperature=temperature
+                temperature=temperature,
+                max_text_length=item['max_text_length'],
+                streaming=streaming,
+                structured=structured,
+                use_cache=use_cache
+            )}
+
+        # Journaled examples of resumed documents
+        resumed = {key: list(finished[key]['examples']) for key in document_keys if key in finished}
+
+        # Run-wide index of accepted examples, seeded with resumed documents
+        dedup_index = None
+        if deduplicate:
+            dedup_index = MinHashLSH(similarity_threshold)
+            for key in document_keys:
+                if key in resumed:
+                    resumed[key] = dedup_index.filter(resumed[key])
+
+        def accept(examples_by_doc: Dict[int, List[Dict]]) -> Dict[int, List[Dict]]:
+            """Drop examples that duplicate ones already accepted in this run"""
+            if dedup_index is None:
+                return examples_by_doc
+            # Simulated placeholders are near-identical by design and are left alone
+            return {
+                doc_index: [
+                    example for example in examples
+                    if example.get('generated_by') == 'simulated' or dedup_index.add(example)
+                ]
+                for doc_index, examples in examples_by_doc.items()
+            }
+
+        # Results ({doc_index: examples}) are slotted by position, so the
+        # dataset is assembled in document order no matter which item finishes first.
+        # Items are journaled and reported as they finish, but deduplicated in
+        # position order, so which copy of a near-duplicate is kept does not
+        # depend on request timing.
+        generated: List[Optional[Dict[int, List[Dict]]]] = [None] * len(work_items)
+        results: List[Optional[Dict[int, List[Dict]]]] = [None] * len(work_items)
+        next_accept = 0
+        positions_by_doc: Dict[int, List[int]] = {}
+        for position, item in enumerate(work_items):
+            for doc_index in self._item_documents(item):
+                positions_by_doc.setdefault(doc_index, []).append(position)
+        pending = {doc_index: len(positions) for doc_index, positions in positions_by_doc.items()}
+
+        items_done = 0
+        examples_done = 0
+
+        def item_done(position: int, examples_by_doc: Dict[int, List[Dict]]):
+            nonlocal items_done, examples_done, next_accept
+            generated[position] = examples_by_doc
+            while next_accept < len(work_items) and generated[next_accept] is not None:
+                results[next_accept] = accept(generated[next_accept])
+                next_accept += 1
+
+            for doc_index in self._item_documents(work_items[position]):
+                pending[doc_index] -= 1
+                if not journal or pending[doc_index] > 0:
+                    continue
+
+                doc_examples = [
+                    example
+                    for doc_position in positions_by_doc[doc_index]
+                    for example in generated[doc_position].get(doc_index, [])
+                ]
+                # Simulated fallbacks are not journaled so they are retried on resume
+                if not any(example.get('generated_by') == 'simulated' for example in doc_examples):
+                    journal.append({
+                        "document": document_keys[doc_index],
+                        "requested": examples_per_doc,
+                        "examples": doc_examples,
+                        "finished_at": datetime.now().isoformat()
+                    })
+
+            # Reported after journaling, so a reported document survives a crash
+            items_done += 1
+            examples_done += sum(len(examples) for examples in examples_by_doc.values())
+            tokens_per_second = run_metrics.tokens_per_second()
+            if tokens_per_second:
+                logger.info(f"Progress: {items_done}/{len(work_items)} items, {tokens_per_second:.1f} tokens/s")
+
+            if progress_callback:
+                progress_callback(items_done, len(work_items), {
+                    "document": work_items[position].get('document_name', 'packed documents'),
+                    "examples": examples_done,
+                    "tokens_per_second": tokens_per_second
+                })
+
+        # Load the model once up front and keep it resident for the whole
+        # run, so load time is not paid (or measured) inside generation calls
+        pinned = []
+        if work_items and (settings.ollama_warm_up if warm_up is None else warm_up):
+            pinned = self._warm_up_model()
+            stats['model_load_seconds'] = round(sum(pinned.values()), 3)
+
+        schedule = {
+            'estimated_makespan_seconds': 0.0,
+            'estimated_fifo_makespan_seconds': 0.0,
+            'estimated_serial_seconds': 0.0,
+            'actual_makespan_seconds': 0.0
+        }
+
+        def execute(items: List[Dict], on_done: Callable[[int, Dict[int, List[Dict]]], None], use_cache: bool = True):
+            scheduler = WorkScheduler(self.budget, self.ollama_client.model)
+            template_tokens = self.budget.count_tokens(
+                self._create_generation_prompt("", category, examples_per_doc, None, structured),
+                self.ollama_client.model
             )
+            workers = max(1, min(max_workers or self._default_workers(), len(items))) if concurrent else 1
+
+            for key, value in scheduler.estimate_makespan(items, workers, template_tokens).items():
+                schedule[key] += value
+            started = time.monotonic()
+
+            if concurrent and len(items) > 1:
+                logger.info(f"Generating concurrently with {workers} workers")
+
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ki-gen") as executor:
+                    # Longest items first; each runs in a copy of this context so its calls reach run_metrics
+                    futures = {
+                        executor.submit(contextvars.copy_context().run, run_item, items[position], use_cache): position
+                        for position in scheduler.order(items, template_tokens)
+                    }
+                    for future in as_completed(futures):
+                        on_done(futures[future], future.result())
+            else:
+                for position, item in enumerate(items):
+                    on_done(position, run_item(item, use_cache))
+
+            schedule['actual_makespan_seconds'] += time.monotonic() - started
 
-            stats['total_generated'] += examples_per_doc
-            stats['total_validated'] += len(examples)
-            stats['total_rejected'] += (examples_per_doc - len(examples))
+        # Examples requested per document (resumed documents keep their journaled count)
+        requested = [
+            finished[key].get('requested', examples_per_doc) if key in finished else examples_per_doc
+            for key in document_keys
+        ]
 
-            all_examples.extend(examples)
+        generation_started = time.monotonic()
+        try:
+            # Every Ollama call made for this run is recorded in run_metrics
+            with collect() as run_metrics:
+                execute(work_items, item_done)
+
+                # Regroup chunk results by document, in document order
+                per_document: List[List[Dict]] = [resumed.get(key, []) for key in document_keys]
+                for examples_by_doc in results:
+                    for doc_index, examples in examples_by_doc.items():
+                        per_document[doc_index].extend(examples)
+
+                if fill_to_target:
+                    def plan_followup(doc_index: int, num_examples: int) -> List[Dict]:
+                        file_path, doc_data = documents[doc_index]
+                        return self._plan_document(
+                            doc_index,
+                            Path(file_path).name,
+                            doc_data.get('full_text', ''),
+                            num_examples,
+                            chunked,
+                            chunk_tokens,
+                            chunk_overlap
+                        )
+
+                    documents = list(parsed_documents.items())
+                    stats.update(self._fill_to_target(
+                        per_document,
+                        requested,
+                        document_keys,
+                        category,
+                        examples_per_doc,
+                        oversample_budget or settings.generation_oversample_budget,
+                        plan_followup,
+                        lambda items: self._pack_items(items, category, pack_tokens, structured) if packed else items,
+                        execute,
+                        journal,
+                        accept
+                    ))
+        finally:
+            if pinned:
+                self.ollama_client.release(list(pinned))
+
+        stats['generation_seconds'] = round(time.monotonic() - generation_started, 3)
+        stats['schedule'] = {key: round(value, 2) for key, value in schedule.items()}
+        logger.info(f"Makespan: estimated {stats['schedule']['estimated_makespan_seconds']:.1f}s, "
+                    f"actual {stats['schedule']['actual_makespan_seconds']:.1f}s")
+        stats['ollama'] = run_metrics.snapshot()
+        if stats['ollama']['tokens_per_second']:
+            logger.info(f"Generation throughput: {stats['ollama']['output_tokens']} tokens, "
+                        f"{stats['ollama']['tokens_per_second']:.1f} tokens/s")
+
+        for doc_index, examples in enumerate(per_document):
+            self._accumulate_document(stats, all_examples, examples, requested[doc_index])
+
+        stats.update(self._parse_stats(parse_snapshot))
+        stats['token_budget'] = self.budget.snapshot()
+        if dedup_index is not None:
+            stats['duplicates_rejected'] = dedup_index.rejected
+            logger.info(f"Rejected {dedup_index.rejected} near-duplicate examples during generation")
+        if structured:
+            logger.info(f"Structured output parse failure rate: {stats['parse_failure_rate']:.1%}")
+
+        if journal:
+            stats['resumed_documents'] = len(finished)
+            journal.finish(stats)
 
         # Create dataset
         dataset = {
@@ -365,7 +1061,8 @@ Generate {num_examples} examples now:"""
                 "quality_level": quality_level,
                 "temperature": temperature,
                 "stats": stats,
-                "ollama_available": self.ollama_client.is_available()
+                "ollama_available": self.ollama_client.is_available(),
+                "run_id": journal.run_id if journal else None
             },
             "examples": all_examples
         }
@@ -373,3 +1070,279 @@ Generate {num_examples} examples now:"""
         logger.info(f"✅ Dataset generation complete: {len(all_examples)} examples")
 
         return dataset
+
+    def _warm_up_model(self) -> Dict[str, float]:
+        """Load and pin the generation model, returning {model: load seconds}"""
+        if not hasattr(self.ollama_client, 'warm_up') or not self.ollama_client.is_available():
+            return {}
+
+        try:
+            model = self.ollama_client.model
+            return self.ollama_client.warm_up([model], num_ctx=self.budget.context_window(model))
+        except Exception as e:
+            logger.warning(f"Model warm-up failed, continuing without it: {str(e)}")
+            return {}
+
+    def _fill_to_target(
+        self,
+        per_document: List[List[Dict]],
+        requested: List[int],
+        document_keys: List[str],
+        category: str,
+        examples_per_doc: int,
+        oversample_budget: float,
+        plan_followup: Callable[[int, int], List[Dict]],
+        pack: Callable[[List[Dict]], List[Dict]],
+        execute: Callable,
+        journal: Optional[RunJournal],
+        accept: Callable[[Dict[int, List[Dict]]], Dict[int, List[Dict]]]
+    ) -> Dict:
+        """
+        Top up documents left short of examples_per_doc by quality rejection
+
+        Each round asks every short document for the examples its smoothed
+        acceptance rate says are needed to close the gap, without exceeding
+        oversample_budget * examples_per_doc requested examples in total.
+        Rounds stop when no document is short, the budget is spent or after
+        settings.generation_oversample_rounds rounds. Follow-up results go
+        through accept (online deduplication), so duplicates count as
+        rejections. per_document and requested are updated in place;
+        documents over target are trimmed.
+
+        Returns:
+            Oversampling stats
+        """
+        max_requested = math.ceil(examples_per_doc * oversample_budget)
+
+        def simulated(examples: List[Dict]) -> bool:
+            return any(example.get('generated_by') == 'simulated' for example in examples)
+
+        # Learn from the first pass (and from resumed documents)
+        for doc_index, examples in enumerate(per_document):
+            if not simulated(examples):
+                self.acceptance.record(category, document_keys[doc_index], requested[doc_index], len(examples))
+
+        followup_examples = 0
+        followup_requests = 0
+        rounds = 0
+
+        for rounds in range(1, settings.generation_oversample_rounds + 1):
+            extra_by_doc = {}
+            for doc_index, examples in enumerate(per_document):
+                shortfall = examples_per_doc - len(examples)
+                # Simulated fallbacks mean Ollama is down; asking again will not help
+                if shortfall <= 0 or simulated(examples):
+                    continue
+
+                extra = min(
+                    self.acceptance.extra_needed(category, document_keys[doc_index], shortfall),
+                    max_requested - requested[doc_index]
+                )
+                if extra > 0:
+                    extra_by_doc[doc_index] = extra
+
+            if not extra_by_doc:
+                rounds -= 1
+                break
+
+            items = pack([
+                item
+                for doc_index, extra in extra_by_doc.items()
+                for item in plan_followup(doc_index, extra)
+            ])
+            logger.info(f"Oversampling round {rounds}: {sum(extra_by_doc.values())} examples "
+                        f"for {len(extra_by_doc)} documents in {len(items)} requests")
+
+            generated: List[Dict[int, List[Dict]]] = [{} for _ in items]
+
+            def followup_done(position: int, examples_by_doc: Dict[int, List[Dict]]):
+                generated[position] = examples_by_doc
+
+            # A follow-up prompt can match an earlier one exactly, and its cached
+            # reply would only bring back the examples already judged
+            execute(items, followup_done, use_cache=False)
+
+            # Deduplicated in position order, like the first pass
+            round_results: Dict[int, List[Dict]] = {doc_index: [] for doc_index in extra_by_doc}
+            for examples_by_doc in generated:
+                for doc_index, examples in accept(examples_by_doc).items():
+                    round_results[doc_index].extend(examples)
+
+            followup_requests += len(items)
+            followup_examples += sum(extra_by_doc.values())
+
+            for doc_index, examples in round_results.items():
+                requested[doc_index] += extra_by_doc[doc_index]
+                if simulated(examples):
+                    continue
+                self.acceptance.record(category, document_keys[doc_index], extra_by_doc[doc_index], len(examples))
+                per_document[doc_index].extend(examples)
+
+                if journal:
+                    journal.append({
+                        "document": document_keys[doc_index],
+                        "requested": requested[doc_index],
+                        "examples": per_document[doc_index][:examples_per_doc],
+                        "finished_at": datetime.now().isoformat()
+                    })
+
+        for doc_index, examples in enumerate(per_document):
+            del examples[examples_per_doc:]
+
+        short = sum(1 for examples in per_document if len(examples) < examples_per_doc)
+        if short:
+            logger.warning(f"{short} documents still below {examples_per_doc} examples after oversampling")
+
+        return {
+            'oversampling_rounds': rounds,
+            'oversampling_requests': followup_requests,
+            'oversampled_examples': followup_examples,
+            'documents_below_target': short,
+            'acceptance_rates': self.acceptance.snapshot()
+        }
+
+    def _default_workers(self) -> int:
+        """Concurrent requests: settings.max_workers, or more if the host pool can take them"""
+        return max(settings.max_workers, getattr(self.ollama_client, 'max_concurrency', 0))
+
+    def _document_key(self, file_path: str, doc_data: Dict) -> str:
+        """Stable identifier of a document: file name plus content hash"""
+
+        content_hash = hashlib.sha1(doc_data.get('full_text', '').encode('utf-8')).hexdigest()[:16]
+        return f"{Path(file_path).name}:{content_hash}"
+
+    def _plan_document(
+        self,
+        doc_index: int,
+        document_name: str,
+        document_text: str,
+        examples_per_doc: int,
+        chunked: bool,
+        chunk_tokens: int,
+        chunk_overlap: int
+    ) -> List[Dict]:
+        """Split one document into generation work items"""
+
+        if not chunked:
+            return [{
+                'doc_index': doc_index,
+                'document_name': document_name,
+                'text': document_text,
+                'num_examples': examples_per_doc,
+                'max_text_length': None
+            }]
+
+        chunks = split_into_chunks(
+            document_text,
+            chunk_tokens,
+            chunk_overlap,
+            chars_per_token=self.budget.chars_per_token(self.ollama_client.model)
+        ) or [document_text]
+        quotas = distribute_examples(examples_per_doc, len(chunks))
+
+        return [
+            {
+                'doc_index': doc_index,
+                'document_name': document_name,
+                'text': chunk,
+                'num_examples': quota,
+                'max_text_length': None
+            }
+            for chunk, quota in zip(chunks, quotas)
+            if quota > 0
+        ]
+
+    def _item_documents(self, item: Dict) -> List[int]:
+        """Indexes of the documents a work item generates for"""
+        if 'pack' in item:
+            return [document['doc_index'] for document in item['pack']]
+        return [item['doc_index']]
+
+    def _pack_items(
+        self,
+        work_items: List[Dict],
+        category: str,
+        pack_tokens: int,
+        structured: bool
+    ) -> List[Dict]:
+        """
+        Combine whole small documents into packed work items
+
+        Documents are taken in order and added to the open pack while their
+        text stays within pack_tokens and the packed prompt plus its output
+        budget fits the context window. Chunks and documents over half of
+        pack_tokens are left as they are.
+
+        Args:
+            work_items: Planned work items
+            category: Vulnerability category
+            pack_tokens: Document tokens per packed request
+            structured: Structured output mode (changes the prompt)
+
+        Returns:
+            Work items with small documents replaced by packs
+        """
+        model = self.ollama_client.model
+        context = self.budget.context_window(model)
+        items_per_doc = Counter(item['doc_index'] for item in work_items)
+
+        packed_items = []
+        pack: List[Dict] = []
+        pack_text_tokens = 0
+
+        def close_pack():
+            if len(pack) > 1:
+                packed_items.append({'pack': list(pack)})
+            else:
+                packed_items.extend(pack)
+            pack.clear()
+
+        for item in work_items:
+            tokens = self.budget.count_tokens(item['text'], model)
+            if items_per_doc[item['doc_index']] > 1 or tokens > pack_tokens // 2:
+                packed_items.append(item)
+                continue
+
+            candidate = pack + [item]
+            total = sum(document['num_examples'] for document in candidate)
+            prompt_tokens = self.budget.count_tokens(self._create_packed_prompt(candidate, category, structured), model)
+
+            fits = (
+                len(candidate) <= MAX_PACKED_DOCUMENTS
+                and pack_text_tokens + tokens <= pack_tokens
+                and prompt_tokens + self.budget.num_predict(total, model) <= context
+            )
+            if not fits:
+                close_pack()
+                pack_text_tokens = 0
+
+            pack.append(item)
+            pack_text_tokens += tokens
+
+        close_pack()
+
+        packs = sum(1 for item in packed_items if 'pack' in item)
+        if packs:
+            logger.info(f"Packed mode: {len(work_items)} work items packed into {len(packed_items)} requests ({packs} packs)")
+
+        return packed_items
+
+    def _accumulate_document(
+        self,
+        stats: Dict,
+        all_examples: List[Dict],
+        examples: List[Dict],
+        requested: int
+    ):
+        """Add one document's examples to the running dataset stats"""
+
+        stats['total_generated'] += requested
+        stats['total_validated'] += len(examples)
+        stats['total_rejected'] += (requested - len(examples))
+
+        all_examples.extend(examples)
+
+
+def _has_examples(text: str) -> bool:
+    """Whether a reply holds at least one complete example (only those are cached)"""
+    return bool(extract_examples(text))
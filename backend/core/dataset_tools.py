@@ -3,12 +3,16 @@ Dataset Tools - Merge, deduplicate, and validate datasets
 """
 
 import json
-import hashlib
+import time
 from pathlib import Path
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
-from difflib import SequenceMatcher
 
+from backend.core.dedup_index import load_index, save_index
+from backend.core.minhash import MinHashLSH
+from backend.core.parallel_dedup import ParallelDeduplicator
+from backend.core.semantic_dedup import SemanticDeduplicator
+from backend.core.example_hashing import drop_canonical_duplicates, example_similarity
 from backend.utils.logger import setup_logger
 from backend.utils.config import settings
 
@@ -21,19 +25,33 @@ class DatasetTools:
     def __init__(self):
         self.datasets_path = settings.datasets_path
 
+        # LSH indexes of merged datasets by name, saved alongside them by save_dataset
+        self.dedup_indexes: Dict[str, MinHashLSH] = {}
+
+        # Duplicates removed per stage by the last deduplicate_examples call
+        self.last_dedup_stats: Dict = {}
+
     def merge_datasets(
         self,
         dataset_paths: List[Path],
         output_name: str,
-        deduplicate: bool = True
+        deduplicate: bool = True,
+        similarity_threshold: float = 0.85
     ) -> Dict:
         """
         Merge multiple datasets into one
 
+        With LSH deduplication, a first dataset saved with a dedup index (see
+        save_dataset) is taken as already deduplicated: only the examples of
+        the other datasets are checked, against its stored index and each
+        other. The merged dataset's index is kept for save_dataset. Counts
+        per stage are kept in self.last_dedup_stats either way.
+
         Args:
             dataset_paths: List of paths to dataset JSON files
             output_name: Name for the merged dataset
             deduplicate: Whether to remove duplicates
+            similarity_threshold: Similarity threshold (0-1) for considering duplicates
 
         Returns:
             Merged dataset dictionary
@@ -43,6 +61,7 @@ class DatasetTools:
         all_examples = []
         source_datasets = []
         total_examples_before = 0
+        base_index = None
 
         # Load all datasets
         for path in dataset_paths:
@@ -51,6 +70,10 @@ class DatasetTools:
                     dataset = json.load(f)
 
                 examples = dataset.get('examples', [])
+
+                if deduplicate and not all_examples and settings.dedup_method == "lsh":
+                    base_index = load_index(path, examples, similarity_threshold)
+
                 all_examples.extend(examples)
                 total_examples_before += len(examples)
 
@@ -69,8 +92,30 @@ class DatasetTools:
         logger.info(f"Total examples before merge: {total_examples_before}")
 
         # Deduplicate if requested
-        if deduplicate:
-            all_examples = self.deduplicate_examples(all_examples)
+        if deduplicate and settings.dedup_method == "lsh":
+            if base_index is not None:
+                indexed = len(base_index)
+                logger.info(f"Checking {len(all_examples) - indexed} incoming examples against "
+                            f"the index of {indexed} examples")
+                index = base_index
+                all_examples = all_examples[:indexed] + index.filter(all_examples[indexed:])
+            else:
+                index = MinHashLSH(threshold=similarity_threshold)
+                all_examples = index.filter(all_examples)
+
+            self.dedup_indexes[output_name] = index
+            self.last_dedup_stats = {
+                "method": "lsh",
+                "input": total_examples_before,
+                "canonical_duplicates": index.exact_rejected,
+                "fuzzy_duplicates": index.rejected - index.exact_rejected,
+                "remaining": len(all_examples)
+            }
+            logger.info(f"After deduplication: {len(all_examples)} examples ({index.exact_rejected} exact after "
+                        f"normalization, {index.rejected - index.exact_rejected} similar, "
+                        f"{index.comparisons} comparisons)")
+        elif deduplicate:
+            all_examples = self.deduplicate_examples(all_examples, similarity_threshold)
             logger.info(f"After deduplication: {len(all_examples)} examples")
 
         # Create merged dataset
@@ -84,7 +129,8 @@ class DatasetTools:
                 "duplicates_removed": total_examples_before - len(all_examples),
                 "merge_info": {
                     "deduplicated": deduplicate,
-                    "merged_from": len(dataset_paths)
+                    "merged_from": len(dataset_paths),
+                    "incremental": base_index is not None
                 }
             },
             "examples": all_examples
@@ -97,87 +143,116 @@ class DatasetTools:
     def deduplicate_examples(
         self,
         examples: List[Dict],
-        similarity_threshold: float = 0.85
+        similarity_threshold: float = 0.85,
+        method: Optional[str] = None,
+        workers: Optional[int] = None
     ) -> List[Dict]:
         """
         Remove duplicate examples based on similarity
 
+        Trivial duplicates (same text up to Unicode form, case, whitespace and
+        trailing punctuation) are removed first in one linear pass; only the
+        rest go through the fuzzy method. Counts per stage are kept in
+        self.last_dedup_stats.
+
         Args:
             examples: List of example dictionaries
             similarity_threshold: Similarity threshold (0-1) for considering duplicates
+            method: "lsh" (MinHash candidates, near-linear), "pairwise" (compare
+                with every kept example), "parallel" (pairwise on a process pool,
+                same result) or "semantic" (embedding cosine similarity, catches
+                paraphrases); defaults to settings.dedup_method
+            workers: Processes for the parallel method (defaults to settings.max_workers)
 
         Returns:
             Deduplicated list of examples
         """
-        logger.info(f"Deduplicating {len(examples)} examples (threshold: {similarity_threshold})")
+        method = method or settings.dedup_method
+        logger.info(f"Deduplicating {len(examples)} examples (threshold: {similarity_threshold}, method: {method})")
+
+        if method not in ("lsh", "pairwise", "parallel", "semantic"):
+            raise ValueError(f"Unknown deduplication method: {method}")
+
+        canonical_examples, canonical_removed = drop_canonical_duplicates(examples)
+        unique_examples = self._fuzzy_deduplicate(canonical_examples, similarity_threshold, method, workers)
+
+        self.last_dedup_stats = {
+            "method": method,
+            "input": len(examples),
+            "canonical_duplicates": canonical_removed,
+            "fuzzy_duplicates": len(canonical_examples) - len(unique_examples),
+            "remaining": len(unique_examples)
+        }
+
+        logger.info(f"✅ Removed {len(examples) - len(unique_examples)} duplicates "
+                    f"({canonical_removed} exact after normalization, "
+                    f"{self.last_dedup_stats['fuzzy_duplicates']} similar; "
+                    f"{len(unique_examples)} unique examples remaining)")
+
+        return unique_examples
+
+    def _fuzzy_deduplicate(
+        self,
+        examples: List[Dict],
+        similarity_threshold: float,
+        method: str,
+        workers: Optional[int]
+    ) -> List[Dict]:
+        """Near-duplicate removal stage of deduplicate_examples"""
 
         if not examples:
             return []
 
-        # Track seen content hashes
-        seen_hashes: Set[str] = set()
+        if method == "lsh":
+            index = MinHashLSH(threshold=similarity_threshold)
+            unique_examples = index.filter(examples)
+            logger.info(f"LSH: {index.comparisons} comparisons")
+            return unique_examples
+
+        if method == "semantic":
+            deduplicator = SemanticDeduplicator(threshold=similarity_threshold)
+            unique_examples = deduplicator.filter(examples)
+            logger.info(f"Semantic: {deduplicator.embedded} embedded, {deduplicator.cached} cached")
+            return unique_examples
+
+        if method == "parallel":
+            deduplicator = ParallelDeduplicator(threshold=similarity_threshold, workers=workers)
+            unique_examples = deduplicator.filter(examples)
+            logger.info(f"Parallel: {deduplicator.pairs} pairs at {deduplicator.pairs_per_second:.0f} pairs/sec "
+                        f"on {deduplicator.workers} workers")
+            return unique_examples
+
+        started = time.perf_counter()
+        pairs = 0
+
         seen_contents: List[Dict] = []
-        unique_examples: List[Dict] = []
-        duplicates_removed = 0
 
         for example in examples:
-            # Create content hash
-            content_str = f"{example.get('instruction', '')}{example.get('input', '')}{example.get('output', '')}"
-            content_hash = hashlib.md5(content_str.encode()).hexdigest()
-
-            # Check exact duplicates first
-            if content_hash in seen_hashes:
-                duplicates_removed += 1
-                logger.debug(f"Removed exact duplicate (hash: {content_hash[:8]}...)")
-                continue
-
             # Check similarity with existing examples
             is_duplicate = False
 
             for seen in seen_contents:
+                pairs += 1
                 similarity = self._calculate_similarity(example, seen)
 
                 if similarity >= similarity_threshold:
-                    duplicates_removed += 1
                     logger.debug(f"Removed similar duplicate (similarity: {similarity:.2f})")
                     is_duplicate = True
                     break
 
             if not is_duplicate:
-                seen_hashes.add(content_hash)
                 seen_contents.append(example)
-                unique_examples.append(example)
 
-        logger.info(f"✅ Removed {duplicates_removed} duplicates ({len(unique_examples)} unique examples remaining)")
+        elapsed = time.perf_counter() - started
+        logger.info(f"Pairwise: {pairs} pairs at {pairs / elapsed if elapsed else 0:.0f} pairs/sec")
 
-        return unique_examples
+        return seen_contents
 
     def _calculate_similarity(self, example1: Dict, example2: Dict) -> float:
         """Calculate similarity between two examples"""
 
-        # Compare instruction, input, and output
-        inst_sim = SequenceMatcher(
-            None,
-            example1.get('instruction', ''),
-            example2.get('instruction', '')
-        ).ratio()
-
-        input_sim = SequenceMatcher(
-            None,
-            example1.get('input', ''),
-            example2.get('input', '')
-        ).ratio()
-
-        output_sim = SequenceMatcher(
-            None,
-            example1.get('output', ''),
-            example2.get('output', '')
-        ).ratio()
-
-        # Weighted average (output is most important)
-        similarity = (inst_sim * 0.2 + input_sim * 0.3 + output_sim * 0.5)
-
-        return similarity
+        # Weighted average of instruction/input/output similarity (output is most important)
+        return example_similarity(example1, example2)
 
     def validate_dataset(self, dataset: Dict) -> Dict:
         """
@@ -252,6 +327,9 @@ class DatasetTools:
         """
         Save dataset to JSON file
 
+        A dataset produced by merge_datasets under the same name also gets its
+        dedup index saved next to it, so the next merge into it is incremental.
+
         Args:
             dataset: Dataset dictionary
             name: Name for the dataset file
@@ -280,6 +358,11 @@ class DatasetTools:
 
         logger.info(f"✅ Dataset saved to: {output_path}")
 
+        # Save the dedup index next to it if it still describes these examples
+        index = self.dedup_indexes.get(name)
+        if index is not None and len(index) == len(dataset.get('examples', [])):
+            save_index(index, output_path, dataset['examples'])
+
         return output_path
 
     def load_dataset(self, path: Path) -> Dict:
@@ -0,0 +1,93 @@
+"""
+Dedup Index - MinHash LSH state saved next to a dataset for incremental merges
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.core.minhash import MinHashLSH
+from backend.core.example_hashing import content_hash
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("ki.core.dedup_index")
+
+SUFFIX = ".dedup.npz"
+
+
+def index_path(dataset_path: Path) -> Path:
+    """Sidecar index file of a dataset file (ssrf.json -> ssrf.dedup.npz)"""
+    return dataset_path.with_name(dataset_path.stem + SUFFIX)
+
+
+def save_index(index: MinHashLSH, dataset_path: Path, examples: List[Dict]) -> Path:
+    """
+    Save an index next to the dataset it was built for
+
+    Args:
+        index: Index holding exactly the dataset's examples, in order
+        dataset_path: Dataset JSON file
+        examples: The dataset's examples
+
+    Returns:
+        Path of the index file
+    """
+    path = index_path(dataset_path)
+
+    with open(path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            hashes=np.array([content_hash(example) for example in examples]),
+            signatures=index.signatures,
+            parameters=np.array([index.num_perm, index.seed, index.bands], dtype=np.int64),
+            threshold=np.array([index.threshold])
+        )
+
+    logger.info(f"Dedup index saved: {path.name} ({len(index)} examples)")
+    return path
+
+
+def load_index(dataset_path: Path, examples: List[Dict], threshold: float) -> Optional[MinHashLSH]:
+    """
+    Rebuild a dataset's index from its sidecar file
+
+    The stored signatures are used only if they were built for exactly these
+    examples (same content hashes, in order) and the same threshold, so an
+    edited dataset or changed settings never reuse stale state.
+
+    Args:
+        dataset_path: Dataset JSON file
+        examples: The dataset's examples, as loaded
+        threshold: Similarity threshold of the merge
+
+    Returns:
+        MinHashLSH holding the examples, or None if no usable index exists
+    """
+    path = index_path(dataset_path)
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path) as data:
+            hashes = data['hashes'].tolist()
+            signatures = data['signatures']
+            num_perm, seed, bands = (int(value) for value in data['parameters'])
+            stored_threshold = float(data['threshold'][0])
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring unreadable dedup index {path.name}: {str(e)}")
+        return None
+
+    if stored_threshold != threshold:
+        logger.info(f"Dedup index {path.name} was built for threshold {stored_threshold}, rebuilding")
+        return None
+
+    if hashes != [content_hash(example) for example in examples]:
+        logger.info(f"Dedup index {path.name} does not match the dataset contents, rebuilding")
+        return None
+
+    index = MinHashLSH(threshold=threshold, num_perm=num_perm, bands=bands, seed=seed)
+    index.extend_kept(examples, signatures)
+
+    logger.info(f"Dedup index loaded: {path.name} ({len(index)} examples)")
+    return index
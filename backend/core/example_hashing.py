@@ -0,0 +1,88 @@
+"""
+Example Hashing - Example similarity and exact-match hashing for training examples
+"""
+
+import hashlib
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Set, Tuple
+
+FIELDS = ("instruction", "input", "output")
+
+# Removed from the end of fields before exact matching (NFKC turns "…" into "...")
+TRAILING_PUNCTUATION = " .,;:!?"
+
+
+def example_similarity(example1: Dict, example2: Dict) -> float:
+    """
+    Weighted similarity of two examples (0-1)
+
+    Instruction, input and output are compared with SequenceMatcher and
+    weighted 0.2 / 0.3 / 0.5, the output being the most important.
+    """
+    inst_sim = SequenceMatcher(
+        None,
+        example1.get('instruction', ''),
+        example2.get('instruction', '')
+    ).ratio()
+
+    input_sim = SequenceMatcher(
+        None,
+        example1.get('input', ''),
+        example2.get('input', '')
+    ).ratio()
+
+    output_sim = SequenceMatcher(
+        None,
+        example1.get('output', ''),
+        example2.get('output', '')
+    ).ratio()
+
+    return inst_sim * 0.2 + input_sim * 0.3 + output_sim * 0.5
+
+
+def content_hash(example: Dict) -> str:
+    """128-bit BLAKE2b of the instruction, input and output, as they are"""
+    return _field_hash(str(example.get(field, '')) for field in FIELDS)
+
+
+def canonical_text(text: str) -> str:
+    """
+    Form of a field that ignores trivial differences
+
+    NFKC-normalized, case-folded, with whitespace runs folded to one space and
+    trailing sentence punctuation removed.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(text.split()).rstrip(TRAILING_PUNCTUATION)
+
+
+def canonical_hash(example: Dict) -> str:
+    """128-bit BLAKE2b of the canonical instruction, input and output"""
+    return _field_hash(canonical_text(str(example.get(field, ''))) for field in FIELDS)
+
+
+def _field_hash(values: Iterable[str]) -> str:
+    # The unit separator keeps ("ab", "c") and ("a", "bc") apart
+    return hashlib.blake2b("\x1f".join(values).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def drop_canonical_duplicates(examples: List[Dict]) -> Tuple[List[Dict], int]:
+    """
+    Keep the first example of each canonical form, in one linear pass
+
+    Args:
+        examples: Example dictionaries, in priority order
+
+    Returns:
+        (kept examples in input order, number removed)
+    """
+    seen: Set[str] = set()
+    kept = []
+    for example in examples:
+        example_hash = canonical_hash(example)
+        if example_hash not in seen:
+            seen.add(example_hash)
+            kept.append(example)
+    return kept, len(examples) - len(kept)
+
@@ -0,0 +1,189 @@
+"""
+Streaming JSON extraction - Pull example objects out of partial model output
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("ki.core.json_stream")
+
+EXAMPLE_KEYS = ("instruction", "input", "output")
+
+
+class ExampleStreamParser:
+    """
+    Incremental extractor of example objects from streamed LLM text
+
+    Text is fed as it arrives. A single linear scan tracks string/escape state
+    and a stack of open braces; whenever an object closes it is decoded on its
+    own, so each example is emitted as soon as its closing brace arrives and a
+    malformed object only loses itself. Objects are emitted at any nesting
+    depth, which handles bare arrays, wrapper objects and prose around the JSON
+    alike, and lets examples after an unclosed object still be recovered.
+
+    An unterminated string would otherwise swallow the rest of the reply, so
+    a "{" read inside a string that follows "}," and is followed by an
+    example key is taken as the start of the next object: the broken one is
+    dropped and counted as an error.
+    Objects holding examples (wrappers) are never decoded themselves, so a
+    malformed example is counted once.
+    """
+
+    # Characters looked at around a "{" to tell an object boundary from string content
+    RESYNC_WINDOW = 64
+
+    def __init__(self, required_keys: Sequence[str] = EXAMPLE_KEYS):
+        """
+        Initialize parser
+
+        Args:
+            required_keys: Keys an object needs to count as an example
+                (an object with any of them is emitted; quality scoring
+                rejects incomplete ones later)
+        """
+        self.required_keys = tuple(required_keys)
+        self.emitted = 0
+        self.errors = 0
+
+        self._buffer = ""
+        self._pos = 0
+        # [start offset, holds an example] of each open object
+        self._stack: List[List] = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List[Dict]:
+        """
+        Consume a piece of streamed text
+
+        Args:
+            text: Next piece of the response
+
+        Returns:
+            Example objects completed by this piece
+        """
+        self._buffer += text
+        completed = []
+
+        buffer = self._buffer
+        end = len(buffer)
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                elif ch == "{":
+                    boundary = self._at_object_boundary(buffer, i)
+                    if boundary is None:
+                        # Look again once the text after it has arrived
+                        end = i
+                        break
+                    if boundary:
+                        self._resync(i)
+                continue
+
+            if ch == '"':
+                # Strings only matter inside an object
+                if self._stack:
+                    self._in_string = True
+            elif ch == "{":
+                self._stack.append([i, False])
+            elif ch == "}" and self._stack:
+                start, holds_example = self._stack.pop()
+                if holds_example:
+                    continue
+
+                candidate = buffer[start:i + 1]
+                if not self._looks_like_example(candidate):
+                    # Wrapper or nested object, not an example
+                    continue
+
+                if self._stack:
+                    self._stack[-1][1] = True
+                example = self._decode(candidate)
+                if example is not None:
+                    completed.append(example)
+
+        self._pos = end
+
+        # Nothing open: drop consumed text so the buffer stays small
+        if not self._stack:
+            self._buffer = ""
+            self._pos = 0
+            self._in_string = False
+            self._escape = False
+
+        return completed
+
+    def feed_all(self, pieces: Iterable[str]) -> List[Dict]:
+        """Consume an iterable of text pieces and return every example"""
+        examples = []
+        for piece in pieces:
+            examples.extend(self.feed(piece))
+        return examples
+
+    def _at_object_boundary(self, buffer: str, position: int) -> Optional[bool]:
+        """
+        Whether a "{" read inside a string opens the next example object
+
+        Returns:
+            True if it follows "}," and is followed by an example key, False
+            if not, None if the text after it has not arrived yet
+        """
+        before = buffer[max(position - self.RESYNC_WINDOW, 0):position].rstrip()
+        if not before.endswith("},"):
+            return False
+
+        after = buffer[position + 1:position + 1 + self.RESYNC_WINDOW].lstrip()
+        keys = [f'"{key}"' for key in self.required_keys]
+        if any(after.startswith(key) for key in keys):
+            return True
+        if any(key.startswith(after) for key in keys) and position + 1 + self.RESYNC_WINDOW > len(buffer):
+            return None
+        return False
+
+    def _resync(self, position: int):
+        """Drop the object broken by an unterminated string and open one at position"""
+        self.errors += 1
+        logger.debug("Skipping example object with an unterminated string")
+
+        if self._stack:
+            self._stack.pop()
+        if self._stack:
+            self._stack[-1][1] = True
+
+        self._in_string = False
+        self._escape = False
+        self._stack.append([position, False])
+
+    def _looks_like_example(self, candidate: str) -> bool:
+        return any(f'"{key}"' in candidate for key in self.required_keys)
+
+    def _decode(self, candidate: str):
+        """Decode one closed object, returning it if it is an example"""
+
+        try:
+            # strict=False accepts raw newlines inside strings, which models emit often
+            obj = json.loads(candidate, strict=False)
+        except json.JSONDecodeError as e:
+            self.errors += 1
+            logger.debug(f"Skipping malformed example object: {str(e)}")
+            return None
+
+        if not isinstance(obj, dict) or not any(key in obj for key in self.required_keys):
+            return None
+
+        self.emitted += 1
+        return obj
+
+
+def extract_examples(text: str) -> List[Dict]:
+    """Extract every example object from a complete response text"""
+    return ExampleStreamParser().feed(text)
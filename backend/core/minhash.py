@@ -0,0 +1,222 @@
+"""
+MinHash LSH - Near-linear near-duplicate detection for training examples
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.core.example_hashing import FIELDS, canonical_hash, example_similarity
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("ki.core.minhash")
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Largest 32-bit prime, modulus of the permutation hashes
+MERSENNE_PRIME = np.uint64(4294967291)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def candidate_jaccard(similarity_threshold: float) -> float:
+    """
+    Shingle Jaccard to look for at a given example_similarity threshold
+
+    SequenceMatcher ratios stay high under scattered word edits that break
+    every shingle touching the edited word, so the candidate threshold sits
+    well below the similarity threshold to keep recall.
+    """
+    return min(max(2 * similarity_threshold - 1.15, 0.3), 0.9)
+
+
+def lsh_parameters(num_perm: int, jaccard: float) -> Tuple[int, int]:
+    """
+    Bands and rows per band whose LSH S-curve crosses 50% near a Jaccard value
+
+    Args:
+        num_perm: Signature length
+        jaccard: Jaccard similarity that should become a candidate
+
+    Returns:
+        (bands, rows) with bands * rows <= num_perm
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        # Jaccard at which a pair lands in at least one shared bucket half the time
+        midpoint = (1 - 0.5 ** (1 / bands)) ** (1 / rows)
+        # Prefer curves that open slightly early: a missed pair is a kept duplicate
+        error = abs(midpoint - jaccard) + (0.05 if midpoint > jaccard else 0.0)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """MinHash signatures of word-bigram shingles, computed with numpy"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        """
+        Initialize hasher
+
+        Args:
+            num_perm: Signature length (number of hash permutations)
+            seed: Seed of the permutation coefficients (signatures are only
+                comparable between hashers with the same seed and num_perm)
+        """
+        self.num_perm = num_perm
+        generator = np.random.RandomState(seed)
+        # a*x + b stays below 2**64 for 32-bit x, a and b
+        self._a = generator.randint(1, 2 ** 31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = generator.randint(0, 2 ** 31, size=(num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, example: Dict) -> np.ndarray:
+        """Unique 32-bit hashes of the word bigrams in an example's fields"""
+        # Per-field markers so shingles never span two fields
+        tokens = []
+        for field in FIELDS:
+            tokens.append(f"\x00{field}")
+            tokens.extend(WORD_PATTERN.findall(str(example.get(field, '')).lower()))
+
+        words = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint64, count=len(tokens))
+        bigrams = (words[:-1] * np.uint64(0x9E3779B1) + words[1:]) & MAX_HASH
+        return np.unique(bigrams)
+
+    def signature(self, example: Dict) -> np.ndarray:
+        """MinHash signature (num_perm uint32 values) of an example"""
+        shingles = self.shingles(example)
+        hashes = (self._a * shingles + self._b) % MERSENNE_PRIME
+        return hashes.min(axis=1).astype(np.uint32)
+
+
+class MinHashLSH:
+    """
+    First-seen-wins near-duplicate filter using banded MinHash buckets
+
+    Each example's signature is split into bands; examples sharing any band
+    land in a common bucket and become candidates. Candidates are ranked by
+    estimated Jaccard and only the best MAX_CANDIDATES are checked with the
+    weighted example_similarity, so the cost per example stays bounded
+    instead of growing with the number already kept.
+    """
+
+    # Most candidates compared in full per example (highest estimated Jaccard first)
+    MAX_CANDIDATES = 20
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        bands: Optional[int] = None,
+        seed: int = 1
+    ):
+        """
+        Initialize index
+
+        Args:
+            threshold: example_similarity (0-1) at which an example counts as a duplicate
+            num_perm: Signature length
+            bands: LSH bands (defaults to a split tuned for the threshold)
+            seed: Seed of the MinHash permutations
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.seed = seed
+        self.hasher = MinHasher(num_perm=num_perm, seed=seed)
+
+        if bands:
+            self.bands, self.rows = bands, num_perm // bands
+        else:
+            self.bands, self.rows = lsh_parameters(num_perm, candidate_jaccard(threshold))
+
+        self.rejected = 0
+        self.exact_rejected = 0
+        self.comparisons = 0
+
+        self._hashes = set()
+        self._examples: List[Dict] = []
+        self._signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, signature: np.ndarray, keys: List[bytes]) -> List[int]:
+        """Kept examples sharing a bucket, best estimated Jaccard first"""
+        found = set()
+        for band, key in enumerate(keys):
+            found.update(self._buckets[band].get(key, ()))
+
+        if not found:
+            return []
+
+        ids = np.fromiter(found, dtype=np.int64, count=len(found))
+        estimates = (np.stack([self._signatures[i] for i in ids]) == signature).mean(axis=1)
+        order = np.argsort(-estimates, kind='stable')[:self.MAX_CANDIDATES]
+        return ids[order].tolist()
+
+    def add(self, example: Dict) -> bool:
+        """
+        Keep an example unless it duplicates one already kept
+
+        Args:
+            example: Example dictionary
+
+        Returns:
+            True if the example was kept, False if it was rejected
+        """
+        example_hash = canonical_hash(example)
+        if example_hash in self._hashes:
+            self.rejected += 1
+            self.exact_rejected += 1
+            return False
+
+        signature = self.hasher.signature(example)
+        keys = self._band_keys(signature)
+
+        for example_id in self._candidates(signature, keys):
+            self.comparisons += 1
+            if example_similarity(example, self._examples[example_id]) >= self.threshold:
+                self.rejected += 1
+                return False
+
+        self._insert(example, example_hash, signature, keys)
+        return True
+
+    def _insert(self, example: Dict, example_hash: str, signature: np.ndarray, keys: List[bytes]):
+        example_id = len(self._examples)
+        self._hashes.add(example_hash)
+        self._examples.append(example)
+        self._signatures.append(signature)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(example_id)
+
+    def extend_kept(self, examples: List[Dict], signatures: np.ndarray):
+        """
+        Insert already deduplicated examples without checking them
+
+        Args:
+            examples: Examples kept by an earlier run
+            signatures: Their signatures, from the same num_perm and seed
+        """
+        for example, signature in zip(examples, signatures):
+            self._insert(example, canonical_hash(example), signature, self._band_keys(signature))
+
+    @property
+    def signatures(self) -> np.ndarray:
+        """Signatures of the kept examples, in order"""
+        if not self._signatures:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        return np.stack(self._signatures)
+
+    def filter(self, examples: List[Dict]) -> List[Dict]:
+        """Add examples in order, returning the ones that were kept"""
+        return [example for example in examples if self.add(example)]
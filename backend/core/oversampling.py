@@ -0,0 +1,92 @@
+"""
+Adaptive Oversampling - Learn acceptance rates and size follow-up requests
+"""
+
+import math
+import threading
+from typing import Dict, Tuple
+
+from backend.utils.config import settings
+
+
+class AcceptanceTracker:
+    """
+    Acceptance rates of generated examples per category and per document
+
+    A document's rate is its own accepted/requested ratio, smoothed towards
+    its category's rate so a document with one bad batch is not written off.
+    Categories start from settings.generation_default_acceptance until they
+    have data. Rates are kept for the lifetime of the tracker, so later runs
+    of the same category start from what earlier runs observed.
+    """
+
+    # Requests' worth of weight given to the category rate for a document
+    PRIOR_WEIGHT = 5
+
+    # Lowest rate used for sizing, so one bad batch cannot ask for a huge follow-up
+    MIN_RATE = 0.1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._categories: Dict[str, Tuple[int, int]] = {}
+        self._documents: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def record(self, category: str, document: str, requested: int, accepted: int):
+        """
+        Record the outcome of one request
+
+        Args:
+            category: Vulnerability category
+            document: Document key
+            requested: Examples asked for
+            accepted: Examples that passed validation
+        """
+        if requested <= 0:
+            return
+
+        # Models sometimes return more than asked; that is still a full batch
+        accepted = min(accepted, requested)
+
+        with self._lock:
+            cat_requested, cat_accepted = self._categories.get(category, (0, 0))
+            self._categories[category] = (cat_requested + requested, cat_accepted + accepted)
+
+            doc_requested, doc_accepted = self._documents.get((category, document), (0, 0))
+            self._documents[(category, document)] = (doc_requested + requested, doc_accepted + accepted)
+
+    def category_rate(self, category: str) -> float:
+        """Observed acceptance rate of a category"""
+        requested, accepted = self._categories.get(category, (0, 0))
+        if not requested:
+            return settings.generation_default_acceptance
+        return accepted / requested
+
+    def rate(self, category: str, document: str) -> float:
+        """Smoothed acceptance rate of a document"""
+        prior = self.category_rate(category)
+        requested, accepted = self._documents.get((category, document), (0, 0))
+        return (accepted + self.PRIOR_WEIGHT * prior) / (requested + self.PRIOR_WEIGHT)
+
+    def extra_needed(self, category: str, document: str, shortfall: int) -> int:
+        """
+        Examples to request so that `shortfall` are expected to pass validation
+
+        Args:
+            category: Vulnerability category
+            document: Document key
+            shortfall: Accepted examples still missing
+
+        Returns:
+            Number of examples to ask for
+        """
+        if shortfall <= 0:
+            return 0
+        return math.ceil(shortfall / max(self.rate(category, document), self.MIN_RATE))
+
+    def snapshot(self) -> Dict:
+        """Category acceptance rates"""
+        return {
+            category: round(accepted / requested, 3)
+            for category, (requested, accepted) in self._categories.items()
+            if requested
+        }
@@ -0,0 +1,157 @@
+"""
+Parallel Deduplication - Exact pairwise deduplication spread over a process pool
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from backend.core.example_hashing import example_similarity
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.core.parallel_dedup")
+
+# Examples of the current run, sent to each worker once
+_examples: List[Dict] = []
+
+
+def _init_worker(examples: List[Dict]):
+    global _examples
+    _examples = examples
+
+
+def _matches_kept(args: Tuple[Sequence[int], Sequence[int], float]) -> Tuple[List[int], int]:
+    """Candidates similar to any of the kept examples, and the pairs compared"""
+    candidates, kept, threshold = args
+    duplicates = []
+    pairs = 0
+    for candidate in candidates:
+        example = _examples[candidate]
+        for other in kept:
+            pairs += 1
+            if example_similarity(example, _examples[other]) >= threshold:
+                duplicates.append(candidate)
+                break
+    return duplicates, pairs
+
+
+def _similar_pairs(args: Tuple[Sequence[int], Sequence[int], float]) -> Tuple[List[Tuple[int, int]], int]:
+    """Pairs (earlier, later) of a block at or above the threshold, and the pairs compared"""
+    later, block, threshold = args
+    similar = []
+    pairs = 0
+    for candidate in later:
+        example = _examples[candidate]
+        for earlier in block:
+            if earlier >= candidate:
+                break
+            pairs += 1
+            if example_similarity(example, _examples[earlier]) >= threshold:
+                similar.append((earlier, candidate))
+    return similar, pairs
+
+
+class ParallelDeduplicator:
+    """
+    Pairwise example_similarity deduplication on several processes
+
+    Gives exactly the result of the sequential loop, where an example is
+    dropped when it matches an example kept before it. Examples are handled
+    in blocks. The candidates of a block are first compared with every
+    example kept in earlier blocks, split across the workers. The survivors
+    are then compared with each other in parallel, and a short ordered pass
+    over those results decides which of them are kept.
+
+    Exact copies are not filtered separately: deduplicate_examples removes
+    them with drop_canonical_duplicates before this runs, and any left
+    score 1.0 in the comparisons.
+    """
+
+    # Comparisons per task, enough to amortize process round trips
+    PAIRS_PER_TASK = 2000
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        workers: Optional[int] = None,
+        block_size: Optional[int] = None
+    ):
+        """
+        Initialize deduplicator
+
+        Args:
+            threshold: Similarity (0-1) at which an example counts as a duplicate
+            workers: Worker processes (defaults to settings.max_workers)
+            block_size: Examples decided per round (defaults to 64 per worker)
+        """
+        self.threshold = threshold
+        self.workers = max(1, workers or settings.max_workers)
+        self.block_size = block_size or 64 * self.workers
+
+        self.rejected = 0
+        self.pairs = 0
+        self.seconds = 0.0
+
+    @property
+    def pairs_per_second(self) -> float:
+        """Comparison throughput of the last runs"""
+        return self.pairs / self.seconds if self.seconds else 0.0
+
+    def _split(self, items: Sequence[int], per_task: int) -> List[Sequence[int]]:
+        per_task = max(1, per_task)
+        return [items[start:start + per_task] for start in range(0, len(items), per_task)]
+
+    def filter(self, examples: List[Dict]) -> List[Dict]:
+        """
+        Drop examples similar to an earlier kept example
+
+        Args:
+            examples: Example dictionaries, in priority order
+
+        Returns:
+            Kept examples, in input order
+        """
+        if not examples:
+            return []
+
+        started = time.perf_counter()
+
+        candidates = list(range(len(examples)))
+        kept: List[int] = []
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(examples,)) as executor:
+            for start in range(0, len(candidates), self.block_size):
+                block = candidates[start:start + self.block_size]
+
+                # Compare the block with everything kept so far
+                if kept:
+                    shards = self._split(kept, self.PAIRS_PER_TASK // len(block))
+                    matched = set()
+                    for duplicates, pairs in executor.map(
+                        _matches_kept, [(block, shard, self.threshold) for shard in shards]
+                    ):
+                        matched.update(duplicates)
+                        self.pairs += pairs
+                    block = [position for position in block if position not in matched]
+
+                # Compare the survivors with each other, then decide in order
+                similar_to: Dict[int, List[int]] = {}
+                groups = self._split(block[1:], self.PAIRS_PER_TASK // max(len(block), 1))
+                for similar, pairs in executor.map(
+                    _similar_pairs, [(group, block, self.threshold) for group in groups]
+                ):
+                    self.pairs += pairs
+                    for earlier, later in similar:
+                        similar_to.setdefault(later, []).append(earlier)
+
+                kept_in_block = set()
+                for position in block:
+                    if not any(earlier in kept_in_block for earlier in similar_to.get(position, ())):
+                        kept_in_block.add(position)
+                        kept.append(position)
+
+        self.rejected += len(examples) - len(kept)
+        self.seconds += time.perf_counter() - started
+
+        return [examples[position] for position in kept]
@@ -0,0 +1,167 @@
+"""
+Run Journal - Append-only record of generation results for resumable runs
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.core.run_journal")
+
+
+class RunJournal:
+    """
+    Journal of one generation run
+
+    Each run gets a directory under datasets/runs holding a manifest.json
+    (run parameters and status) and a results.jsonl file with one line per
+    finished document. Lines are flushed and fsynced as they are written, so
+    a crashed process loses at most the document it was working on.
+    """
+
+    def __init__(self, run_id: str, runs_path: Optional[Path] = None):
+        """
+        Initialize run journal
+
+        Args:
+            run_id: Run identifier (see make_run_id)
+            runs_path: Directory holding run journals (defaults to datasets/runs)
+        """
+        self.run_id = run_id
+        self.run_dir = Path(runs_path or settings.datasets_path / "runs") / run_id
+        self.manifest_path = self.run_dir / "manifest.json"
+        self.results_path = self.run_dir / "results.jsonl"
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_run_id(category: str, parameters: Dict, document_keys: List[str]) -> str:
+        """
+        Derive a stable run id from the run inputs
+
+        Launching generation again with the same documents and parameters
+        yields the same id, which is what lets a run be resumed.
+
+        Args:
+            category: Vulnerability category
+            parameters: Generation parameters that affect the output
+            document_keys: Identifiers of the input documents
+
+        Returns:
+            Run identifier
+        """
+        material = json.dumps({
+            "category": category,
+            "parameters": parameters,
+            "documents": sorted(document_keys)
+        }, sort_keys=True, default=str)
+
+        digest = hashlib.sha256(material.encode('utf-8')).hexdigest()[:12]
+        clean_category = "".join(c for c in category if c.isalnum()).lower() or "run"
+
+        return f"{clean_category}_{digest}"
+
+    def exists(self) -> bool:
+        """Whether this run has been started before"""
+        return self.manifest_path.exists()
+
+    def start(self, manifest: Dict) -> Dict:
+        """
+        Create the run manifest, or load it when resuming
+
+        Args:
+            manifest: Run parameters to record for a new run
+
+        Returns:
+            The manifest in effect
+        """
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.exists():
+            existing = self.load_manifest()
+            existing['status'] = 'running'
+            existing['resumed_at'] = datetime.now().isoformat()
+            self._write_manifest(existing)
+            logger.info(f"Resuming run {self.run_id}")
+            return existing
+
+        manifest = {
+            "run_id": self.run_id,
+            "created_at": datetime.now().isoformat(),
+            "status": "running",
+            **manifest
+        }
+        self._write_manifest(manifest)
+        logger.info(f"Started run {self.run_id}: {self.run_dir}")
+
+        return manifest
+
+    def load_manifest(self) -> Dict:
+        """Read the run manifest"""
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def finish(self, summary: Dict):
+        """Mark the run completed and store its summary"""
+        manifest = self.load_manifest()
+        manifest['status'] = 'completed'
+        manifest['completed_at'] = datetime.now().isoformat()
+        manifest['summary'] = summary
+        self._write_manifest(manifest)
+
+    def append(self, record: Dict):
+        """
+        Append one document result to the journal
+
+        Args:
+            record: Result with at least a 'document' key
+        """
+        line = json.dumps(record, ensure_ascii=False)
+
+        with self._lock:
+            with open(self.results_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def completed(self) -> Dict[str, Dict]:
+        """
+        Load finished document results
+
+        A torn last line from a crash is ignored; later records for the same
+        document win.
+
+        Returns:
+            Dict of {document: record}
+        """
+        records = {}
+
+        if not self.results_path.exists():
+            return records
+
+        with open(self.results_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring unreadable journal line {line_number} in {self.run_id}")
+                    continue
+                records[record['document']] = record
+
+        return records
+
+    def _write_manifest(self, manifest: Dict):
+        """Atomically replace the manifest file"""
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,109 @@
+"""
+Work Scheduler - Longest-processing-time-first ordering of generation work
+"""
+
+import heapq
+from typing import Dict, List, Optional, Sequence
+
+from backend.core.token_budget import TokenBudgetPlanner
+from backend.ml.metrics import MetricsCollector, metrics
+
+
+class WorkScheduler:
+    """
+    Order generation work items so the longest ones start first
+
+    An item's cost is its estimated request time: prompt tokens over the
+    model's prompt evaluation rate plus reserved output tokens over its
+    generation rate. Rates come from the calls recorded so far (see
+    backend.ml.metrics), with conservative defaults before any are known.
+    Submitting items to a worker pool longest-first (LPT) keeps one large
+    document from starting last and running alone while other workers idle.
+    """
+
+    # Tokens/sec assumed until the model has recorded calls
+    DEFAULT_PROMPT_RATE = 400.0
+    DEFAULT_OUTPUT_RATE = 25.0
+
+    def __init__(self, budget: TokenBudgetPlanner, model: str, collector: Optional[MetricsCollector] = None):
+        """
+        Initialize scheduler
+
+        Args:
+            budget: Token budget planner (token counts and output budgets)
+            model: Model the work runs on
+            collector: Metrics to read rates from (defaults to process-wide metrics)
+        """
+        self.budget = budget
+        self.model = model
+
+        snapshot = (collector or metrics).snapshot()
+        model_stats = snapshot['by_model'].get(model, {})
+        self.prompt_rate = model_stats.get('prompt_tokens_per_second') or self.DEFAULT_PROMPT_RATE
+        self.output_rate = model_stats.get('tokens_per_second') or self.DEFAULT_OUTPUT_RATE
+
+    def estimate_cost(self, item: Dict, template_tokens: int = 0) -> float:
+        """
+        Estimated seconds to generate one work item
+
+        Args:
+            item: Work item (single document/chunk, or a pack)
+            template_tokens: Tokens of the prompt around the document text
+
+        Returns:
+            Estimated request time in seconds
+        """
+        documents = item['pack'] if 'pack' in item else [item]
+        context = self.budget.context_window(self.model)
+
+        output_tokens = self.budget.num_predict(sum(d['num_examples'] for d in documents), self.model)
+        document_tokens = sum(self.budget.count_tokens(d['text'], self.model) for d in documents)
+        # Documents are cut to the context window, so huge ones cost no more than that
+        prompt_tokens = min(template_tokens + document_tokens, max(context - output_tokens, 0))
+
+        return prompt_tokens / self.prompt_rate + output_tokens / self.output_rate
+
+    def order(self, items: Sequence[Dict], template_tokens: int = 0) -> List[int]:
+        """
+        Positions of the items, most expensive first
+
+        Args:
+            items: Work items
+            template_tokens: Tokens of the prompt around the document text
+
+        Returns:
+            Item positions in dispatch order
+        """
+        costs = [self.estimate_cost(item, template_tokens) for item in items]
+        return sorted(range(len(items)), key=lambda position: costs[position], reverse=True)
+
+    def estimate_makespan(self, items: Sequence[Dict], workers: int, template_tokens: int = 0) -> Dict:
+        """
+        Estimated wall time of running the items on a number of workers
+
+        Simulates list scheduling: each item, in LPT order, starts on the
+        worker that becomes free first.
+
+        Args:
+            items: Work items
+            workers: Requests processed at once
+            template_tokens: Tokens of the prompt around the document text
+
+        Returns:
+            Dict with the LPT and submission-order makespans and the serial time
+        """
+        costs = [self.estimate_cost(item, template_tokens) for item in items]
+
+        return {
+            "estimated_makespan_seconds": round(_makespan(sorted(costs, reverse=True), workers), 2),
+            "estimated_fifo_makespan_seconds": round(_makespan(costs, workers), 2),
+            "estimated_serial_seconds": round(sum(costs), 2)
+        }
+
+
+def _makespan(costs: Sequence[float], workers: int) -> float:
+    """Finish time of list-scheduling costs, in order, on identical workers"""
+    finish_times = [0.0] * max(1, min(workers, len(costs)))
+    for cost in costs:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + cost)
+    return max(finish_times) if costs else 0.0
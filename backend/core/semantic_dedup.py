@@ -0,0 +1,208 @@
+"""
+Semantic Deduplication - Remove paraphrased examples using sentence embeddings
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.core.example_hashing import content_hash
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.core.semantic_dedup")
+
+
+class EmbeddingCache:
+    """Example embeddings stored in the metadata SQLite db, keyed by model and content hash"""
+
+    TABLE = "example_embeddings"
+
+    # Keys per SELECT, below SQLite's bound on query parameters
+    QUERY_BATCH = 500
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Initialize embedding cache
+
+        Args:
+            db_path: SQLite file (defaults to settings.db_path)
+        """
+        self.db_path = Path(db_path or settings.db_path)
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    model TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    PRIMARY KEY (model, hash)
+                )"""
+            )
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Cached embeddings of the given content hashes"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), self.QUERY_BATCH):
+                batch = hashes[start:start + self.QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                for example_hash, blob in self._conn.execute(
+                    f"SELECT hash, embedding FROM {self.TABLE} WHERE model = ? AND hash IN ({placeholders})",
+                    (model, *batch)
+                ):
+                    found[example_hash] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, embeddings: Dict[str, np.ndarray]):
+        """Store embeddings by content hash"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.TABLE} (model, hash, embedding) VALUES (?, ?, ?)",
+                [
+                    (model, example_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                    for example_hash, vector in embeddings.items()
+                ]
+            )
+
+
+class SemanticDeduplicator:
+    """
+    First-seen-wins deduplication on embedding cosine similarity
+
+    Examples are embedded on CPU in batches with sentence-transformers
+    (normalized, so inner product is cosine similarity), reusing cached
+    embeddings for content already seen. A FAISS inner-product index then
+    range-searches every example's neighbours at or above the threshold, and
+    a single pass in input order drops each example that has a kept
+    neighbour before it. sentence-transformers and faiss are imported on
+    first use.
+    """
+
+    # Examples range-searched at once, bounding the result memory per query
+    SEARCH_BATCH = 4096
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        model_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        use_cache: bool = True
+    ):
+        """
+        Initialize deduplicator
+
+        Args:
+            threshold: Cosine similarity (0-1) at which an example counts as a duplicate
+            model_name: sentence-transformers model (defaults to settings.dedup_embedding_model)
+            batch_size: Examples embedded per batch (defaults to settings.dedup_embedding_batch_size)
+            use_cache: Reuse and store embeddings in the metadata db
+        """
+        self.threshold = threshold
+        self.model_name = model_name or settings.dedup_embedding_model
+        self.batch_size = batch_size or settings.dedup_embedding_batch_size
+        self.cache = EmbeddingCache() if use_cache else None
+
+        self.rejected = 0
+        self.embedded = 0
+        self.cached = 0
+
+        self._model = None
+
+    def _load_model(self):
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "Semantic deduplication needs sentence-transformers (pip install -r requirements.txt)"
+                ) from e
+
+            logger.info(f"Loading embedding model {self.model_name} (CPU)")
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    @staticmethod
+    def _text(example: Dict) -> str:
+        return "\n".join(str(example.get(field, '')) for field in ("instruction", "input", "output"))
+
+    def embed(self, examples: List[Dict]) -> np.ndarray:
+        """
+        Normalized embeddings of examples
+
+        Args:
+            examples: Example dictionaries
+
+        Returns:
+            float32 array of shape (len(examples), dimensions)
+        """
+        hashes = [content_hash(example) for example in examples]
+        vectors = self.cache.get_many(self.model_name, list(set(hashes))) if self.cache else {}
+        self.cached += sum(1 for example_hash in hashes if example_hash in vectors)
+
+        missing = {}
+        for example_hash, example in zip(hashes, examples):
+            if example_hash not in vectors:
+                missing.setdefault(example_hash, example)
+
+        if missing:
+            logger.info(f"Embedding {len(missing)} examples ({len(vectors)} cached)")
+            encoded = self._load_model().encode(
+                [self._text(example) for example in missing.values()],
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ).astype(np.float32)
+
+            new_vectors = dict(zip(missing.keys(), encoded))
+            self.embedded += len(new_vectors)
+            vectors.update(new_vectors)
+            if self.cache:
+                self.cache.put_many(self.model_name, new_vectors)
+
+        return np.stack([vectors[example_hash] for example_hash in hashes]).astype(np.float32)
+
+    def filter(self, examples: List[Dict]) -> List[Dict]:
+        """
+        Drop examples semantically duplicating an earlier kept example
+
+        Args:
+            examples: Example dictionaries, in priority order
+
+        Returns:
+            Kept examples, in input order
+        """
+        if not examples:
+            return []
+
+        try:
+            import faiss
+        except ImportError as e:
+            raise ImportError("Semantic deduplication needs faiss-cpu (pip install -r requirements.txt)") from e
+
+        embeddings = self.embed(examples)
+        index = faiss.IndexFlatIP(embeddings.shape[1])
+        index.add(embeddings)
+
+        kept = np.zeros(len(examples), dtype=bool)
+        for start in range(0, len(examples), self.SEARCH_BATCH):
+            lims, _, neighbours = index.range_search(embeddings[start:start + self.SEARCH_BATCH], self.threshold)
+
+            # Earlier examples are already decided, so one ordered pass is exact
+            for offset in range(len(lims) - 1):
+                position = start + offset
+                earlier = neighbours[lims[offset]:lims[offset + 1]]
+                earlier = earlier[earlier < position]
+                kept[position] = not kept[earlier].any()
+
+        self.rejected += int(len(examples) - kept.sum())
+        return [example for example, keep in zip(examples, kept) if keep]
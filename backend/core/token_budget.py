@@ -0,0 +1,209 @@
+"""
+Token Budget - Fit generation prompts and num_predict to the model context window
+"""
+
+import math
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from backend.core.chunking import CHARS_PER_TOKEN
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.core.token_budget")
+
+
+class TokenBudgetPlanner:
+    """
+    Plan prompt and output token budgets per model
+
+    Ollama exposes no tokenizer endpoint, so token counts use a per-model
+    characters-per-token ratio. It starts at CHARS_PER_TOKEN and is calibrated
+    from the prompt_eval_count of real requests. Output budgets start at
+    settings.generation_tokens_per_example and follow the eval_count observed
+    per parsed example. The context window comes from the model's num_ctx
+    parameter, else settings.generation_context_tokens, capped by the model's
+    trained context length.
+    """
+
+    # Weight of the newest sample in the moving averages
+    ALPHA = 0.3
+
+    # Ratios outside this range come from prompt caching (only part of the
+    # prompt evaluated) or odd inputs and are not used for calibration
+    MIN_CHARS_PER_TOKEN = 1.5
+    MAX_CHARS_PER_TOKEN = 8.0
+
+    # Share of the context window kept for the document before the output
+    # budget is shortened, and the smallest output budget ever planned
+    MIN_DOCUMENT_SHARE = 0.25
+    MIN_NUM_PREDICT = 256
+
+    def __init__(self, ollama_client=None):
+        """
+        Initialize planner
+
+        Args:
+            ollama_client: Client used to look up model parameters (optional)
+        """
+        self.ollama_client = ollama_client
+        self._lock = threading.Lock()
+        self._chars_per_token: Dict[str, float] = {}
+        self._tokens_per_example: Dict[str, float] = {}
+        self._context_windows: Dict[str, int] = {}
+
+    def chars_per_token(self, model: str) -> float:
+        """Calibrated characters-per-token ratio of a model"""
+        return self._chars_per_token.get(model, CHARS_PER_TOKEN)
+
+    def count_tokens(self, text: str, model: str) -> int:
+        """Approximate token count of a text for a model"""
+        return math.ceil(len(text) / self.chars_per_token(model))
+
+    def context_window(self, model: str) -> int:
+        """
+        Context tokens available to a request
+
+        Args:
+            model: Model name
+
+        Returns:
+            Context window in tokens (looked up once per model)
+        """
+        if model not in self._context_windows:
+            self._context_windows[model] = self._lookup_context_window(model)
+            logger.info(f"Context window for {model}: {self._context_windows[model]} tokens")
+
+        return self._context_windows[model]
+
+    def _lookup_context_window(self, model: str) -> int:
+        """Read num_ctx and the trained context length from the model info"""
+        context = settings.generation_context_tokens
+
+        if self.ollama_client is None or not hasattr(self.ollama_client, 'get_model_info'):
+            return context
+
+        info = self.ollama_client.get_model_info(model)
+        if not isinstance(info, dict) or 'error' in info:
+            return context
+
+        match = re.search(r"^num_ctx\s+(\d+)", info.get('parameters') or '', re.MULTILINE)
+        if match:
+            context = int(match.group(1))
+
+        for key, value in (info.get('model_info') or {}).items():
+            if key.endswith('.context_length') and isinstance(value, int):
+                context = min(context, value)
+
+        return context
+
+    def num_predict(self, num_examples: int, model: str) -> int:
+        """
+        Output tokens to reserve for a number of examples
+
+        Args:
+            num_examples: Examples requested
+            model: Model name
+
+        Returns:
+            num_predict value (with settings.generation_output_margin headroom)
+        """
+        per_example = self._tokens_per_example.get(model, settings.generation_tokens_per_example)
+        # Constant allowance for the surrounding JSON array/object
+        return math.ceil(num_examples * per_example * settings.generation_output_margin) + 32
+
+    def fit(
+        self,
+        document_text: str,
+        model: str,
+        prompt_tokens: int,
+        num_examples: int
+    ) -> Tuple[str, int]:
+        """
+        Fit a document and the output budget into the context window
+
+        The output keeps its full num_predict while the document can still
+        get MIN_DOCUMENT_SHARE of the window; beyond that the output budget is
+        shortened instead of cutting the document further.
+
+        Args:
+            document_text: Text to put in the prompt
+            model: Model name
+            prompt_tokens: Tokens of the prompt without the document
+            num_examples: Examples requested
+
+        Returns:
+            (document text, cut at a word boundary if shortened, num_predict)
+        """
+        context = self.context_window(model)
+        num_predict = self.num_predict(num_examples, model)
+        document_tokens = self.count_tokens(document_text, model)
+
+        if prompt_tokens + document_tokens + num_predict <= context:
+            return document_text, num_predict
+
+        document_floor = min(document_tokens, int(context * self.MIN_DOCUMENT_SHARE))
+        if prompt_tokens + document_floor + num_predict > context:
+            num_predict = max(context - prompt_tokens - document_floor, self.MIN_NUM_PREDICT)
+            logger.warning(f"Output budget for {num_examples} examples shortened to {num_predict} tokens "
+                           f"to fit {model}'s {context}-token context window")
+
+        available = context - prompt_tokens - num_predict
+        if document_tokens <= available:
+            return document_text, num_predict
+
+        if available <= 1:
+            logger.warning(f"No room for document text in {model}'s context window "
+                           f"(prompt: {prompt_tokens}, output: {num_predict} tokens)")
+            return "", num_predict
+
+        # Leave a token for the "..." marker
+        max_chars = int((available - 1) * self.chars_per_token(model))
+        cut = document_text.rfind(" ", max_chars * 4 // 5, max_chars)
+        return document_text[:cut if cut != -1 else max_chars] + "...", num_predict
+
+    def observe(
+        self,
+        model: str,
+        prompt: str,
+        usage: Optional[Dict],
+        num_examples: int
+    ):
+        """
+        Calibrate the estimates from a finished request
+
+        Args:
+            model: Model that served the request
+            prompt: Prompt that was sent
+            usage: Token counts of the response (see OllamaClient.last_usage)
+            num_examples: Examples parsed from the response
+        """
+        if not usage:
+            return
+
+        with self._lock:
+            prompt_tokens = usage.get('prompt_tokens') or 0
+            if prompt_tokens:
+                ratio = len(prompt) / prompt_tokens
+                if self.MIN_CHARS_PER_TOKEN <= ratio <= self.MAX_CHARS_PER_TOKEN:
+                    self._chars_per_token[model] = self._average(self._chars_per_token.get(model), ratio)
+
+            output_tokens = usage.get('output_tokens') or 0
+            if output_tokens and num_examples:
+                self._tokens_per_example[model] = self._average(
+                    self._tokens_per_example.get(model), output_tokens / num_examples
+                )
+
+    def _average(self, current: Optional[float], sample: float) -> float:
+        if current is None:
+            return sample
+        return current + self.ALPHA * (sample - current)
+
+    def snapshot(self) -> Dict:
+        """Current estimates per model"""
+        return {
+            "chars_per_token": {model: round(value, 3) for model, value in self._chars_per_token.items()},
+            "tokens_per_example": {model: round(value, 1) for model, value in self._tokens_per_example.items()},
+            "context_windows": dict(self._context_windows)
+        }
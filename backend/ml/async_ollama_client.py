@@ -0,0 +1,325 @@
+"""
+Async Ollama Client - Non-blocking interface with a pooled keep-alive session
+
+Routing across hosts (HostPool) stays with the threaded OllamaClient: its
+slots wait on a threading.Condition, which would block the event loop. This
+client talks to one host and bounds its requests with an asyncio semaphore,
+but sends the same keep_alive and goes through the same cassette transport.
+"""
+
+import asyncio
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import ollama
+
+from backend.ml.cassette import cassette_transport
+from backend.ml.errors import classify_error
+from backend.ml.ollama_client import _parse_keep_alive
+from backend.ml.retry import RetryPolicy
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.ml.async_ollama")
+
+
+class _HostSession:
+    """Pooled keep-alive HTTP session shared by every client of one host"""
+
+    def __init__(self, host: str, max_connections: int, max_keepalive_connections: int):
+        self.max_connections = max_connections
+
+        # Clients currently using the session; it closes with the last one
+        self.refs = 0
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+
+        # httpx keeps TCP connections open between calls instead of
+        # reconnecting for every request
+        options = {}
+        transport = cassette_transport(asynchronous=True)
+        if transport is not None:
+            options['transport'] = transport
+
+        self.client = ollama.AsyncClient(
+            host=host,
+            timeout=settings.ollama_timeout,
+            limits=limits,
+            **options
+        )
+
+        # Created lazily so it binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def slot(self) -> asyncio.Semaphore:
+        """Semaphore bounding requests in flight to the pool size"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        return self._semaphore
+
+    async def aclose(self):
+        await self.client._client.aclose()
+
+
+# One pooled session per host
+_host_sessions: Dict[str, _HostSession] = {}
+
+
+class AsyncOllamaClient:
+    """Async client for Ollama that reuses one connection pool per host"""
+
+    def __init__(self, host: Optional[str] = None, model: Optional[str] = None):
+        """
+        Initialize async Ollama client
+
+        Args:
+            host: Ollama server URL (defaults to settings)
+            model: Default model to use (defaults to settings)
+        """
+        self.host = host or settings.ollama_host
+        self.model = model or settings.ollama_model
+
+        if self.host not in _host_sessions:
+            _host_sessions[self.host] = _HostSession(
+                self.host,
+                settings.ollama_max_connections,
+                settings.ollama_max_keepalive_connections
+            )
+
+        self._session = _host_sessions[self.host]
+        self._session.refs += 1
+        self._closed = False
+
+        self.client = self._session.client
+        self.retry_policy = RetryPolicy()
+        self.keep_alive = _parse_keep_alive(settings.ollama_keep_alive)
+
+        logger.info(f"Async Ollama client initialized: {self.host}, model: {self.model}")
+
+    def _slot(self) -> asyncio.Semaphore:
+        """Acquire a request slot in the host pool"""
+        return self._session.slot()
+
+    async def _request(self, operation: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Run a request with jittered exponential backoff, raising OllamaError"""
+
+        attempt = 0
+        while True:
+            try:
+                async with self._slot():
+                    return await operation()
+
+            except Exception as e:
+                error = classify_error(e, self.host)
+                if not self.retry_policy.should_retry(error, attempt):
+                    logger.error(f"❌ Ollama request failed: {str(error)}")
+                    raise error from e
+
+                delay = self.retry_policy.delay(attempt)
+                attempt += 1
+                logger.warning(f"Ollama request failed ({str(error)}), retry {attempt}/"
+                               f"{self.retry_policy.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def is_available(self) -> bool:
+        """
+        Check if Ollama server is available
+
+        Returns:
+            True if server is reachable, False otherwise
+        """
+        try:
+            async with self._slot():
+                await self.client.list()
+            logger.info("✅ Ollama server is available")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ollama server not available: {str(e)}")
+            return False
+
+    async def list_models(self) -> List[str]:
+        """
+        Get list of available models
+
+        Returns:
+            List of model names
+        """
+        try:
+            async with self._slot():
+                models = await self.client.list()
+            model_names = [model['name'] for model in models.get('models', [])]
+            logger.info(f"Available models: {model_names}")
+            return model_names
+        except Exception as e:
+            logger.error(f"Error listing models: {str(e)}")
+            return []
+
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> str:
+        """
+        Generate text from prompt
+
+        Args:
+            prompt: Input prompt
+            model: Model to use (defaults to self.model)
+            temperature: Sampling temperature (0.0 to 2.0)
+            max_tokens: Maximum tokens to generate
+
+        Returns:
+            Generated text
+
+        Raises:
+            OllamaError: If the request fails after retries
+        """
+        model = model or self.model
+
+        logger.info(f"Generating with model: {model}")
+
+        response = await self._request(lambda: self.client.generate(
+            model=model,
+            prompt=prompt,
+            options={
+                'temperature': temperature,
+                'num_predict': max_tokens
+            },
+            keep_alive=self.keep_alive
+        ))
+
+        generated_text = response['response']
+        logger.info(f"✅ Generated {len(generated_text)} characters")
+        return generated_text
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.7
+    ) -> str:
+        """
+        Chat with model using message history
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model to use (defaults to self.model)
+            temperature: Sampling temperature
+
+        Returns:
+            Model response
+
+        Raises:
+            OllamaError: If the request fails after retries
+        """
+        model = model or self.model
+
+        logger.info(f"Chat with model: {model}, messages: {len(messages)}")
+
+        response = await self._request(lambda: self.client.chat(
+            model=model,
+            messages=messages,
+            options={'temperature': temperature},
+            keep_alive=self.keep_alive
+        ))
+
+        reply = response['message']['content']
+        logger.info(f"✅ Chat response: {len(reply)} characters")
+        return reply
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream generation token by token
+
+        Args:
+            prompt: Input prompt
+            model: Model to use
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+
+        Yields:
+            Generated tokens
+
+        Raises:
+            OllamaError: If the request fails
+        """
+        model = model or self.model
+
+        try:
+            async with self._slot():
+                stream = await self.client.generate(
+                    model=model,
+                    prompt=prompt,
+                    options={
+                        'temperature': temperature,
+                        'num_predict': max_tokens
+                    },
+                    stream=True,
+                    keep_alive=self.keep_alive
+                )
+
+                async for chunk in stream:
+                    if 'response' in chunk:
+                        yield chunk['response']
+
+        except Exception as e:
+            logger.error(f"❌ Streaming error: {str(e)}")
+            raise classify_error(e, self.host) from e
+
+    async def aclose(self):
+        """
+        Release this client's hold on the host session
+
+        The pooled connections are closed once no other client of the host
+        is using them.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        self._session.refs -= 1
+        if self._session.refs <= 0:
+            if _host_sessions.get(self.host) is self._session:
+                del _host_sessions[self.host]
+            await self._session.aclose()
+
+    async def __aenter__(self) -> "AsyncOllamaClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+async def aclose_all():
+    """Close every pooled host session (clients opened later get new ones)"""
+    sessions = list(_host_sessions.values())
+    _host_sessions.clear()
+    for session in sessions:
+        await session.aclose()
+
+
+def get_async_ollama_client(host: Optional[str] = None, model: Optional[str] = None) -> AsyncOllamaClient:
+    """
+    Get async Ollama client instance
+
+    Clients for the same host share one connection pool.
+
+    Args:
+        host: Optional custom host
+        model: Optional custom model
+
+    Returns:
+        AsyncOllamaClient instance
+    """
+    return AsyncOllamaClient(host=host, model=model)
@@ -0,0 +1,456 @@
+"""
+Cassette - Record Ollama HTTP exchanges and replay them with their timing
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.ml.cassette")
+
+MODES = ("record", "replay")
+
+
+class Cassette:
+    """
+    Gzipped JSON-lines file of recorded Ollama exchanges
+
+    Each line is one exchange: the request's match keys, the response status
+    and content type, the seconds until the response headers arrived and the
+    response body as newline-delimited pieces, each with the seconds since
+    the request was sent. Streaming responses keep one piece per NDJSON chunk.
+    Requests are matched on their full JSON body, or failing that on the
+    model and prompt/messages alone, so a replay still finds its responses
+    when sampling options or keep_alive changed.
+    """
+
+    def __init__(self, path: Path, mode: str):
+        """
+        Initialize cassette
+
+        Args:
+            path: Cassette file
+            mode: "record" (append exchanges) or "replay" (serve them back)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (use one of {', '.join(MODES)})")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+
+        self._lock = threading.Lock()
+        self._exact: Dict[str, List[Dict]] = {}
+        self._loose: Dict[str, List[Dict]] = {}
+        self._served: Dict[str, int] = {}
+
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            self._load()
+
+    def _load(self):
+        """Index the recorded exchanges by match key"""
+        if not self.path.exists():
+            logger.warning(f"⚠️ Cassette not found, every request will miss: {self.path}")
+            return
+
+        count = 0
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                exchange = json.loads(line)
+                self._exact.setdefault(exchange['k'], []).append(exchange)
+                self._loose.setdefault(exchange['l'], []).append(exchange)
+                count += 1
+
+        logger.info(f"Cassette loaded: {count} exchanges from {self.path}")
+
+    def append(self, exchange: Dict):
+        """Write one exchange to the cassette"""
+        line = json.dumps(exchange, ensure_ascii=False, separators=(',', ':')) + "\n"
+
+        # One gzip member per exchange: concatenated members read back as one
+        # stream, and the file stays valid if the process dies mid-session
+        with self._lock:
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(line)
+            self.recorded += 1
+
+    def find(self, exact_key: str, loose_key: str) -> Optional[Dict]:
+        """
+        Next recorded exchange for a request
+
+        Exchanges recorded for the same key are served in recording order;
+        once they run out the last one is served again.
+
+        Args:
+            exact_key: Key of the full request
+            loose_key: Key of the request's model and prompt
+
+        Returns:
+            Exchange dictionary, or None if nothing matches
+        """
+        with self._lock:
+            for index, key in ((self._exact, exact_key), (self._loose, loose_key)):
+                exchanges = index.get(key)
+                if exchanges:
+                    position = self._served.get(key, 0)
+                    self._served[key] = position + 1
+                    self.replayed += 1
+                    return exchanges[min(position, len(exchanges) - 1)]
+
+            self.missed += 1
+            return None
+
+    def snapshot(self) -> Dict:
+        """Cassette counters"""
+        return {
+            "path": str(self.path),
+            "mode": self.mode,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "missed": self.missed
+        }
+
+
+def match_keys(request: httpx.Request) -> Tuple[str, str]:
+    """
+    Exact and loose match keys of a request
+
+    Args:
+        request: Request with its body already read
+
+    Returns:
+        (key of method, path and full JSON body; key of method, path, model and prompt)
+    """
+    try:
+        body = json.loads(request.content or b"{}")
+    except ValueError:
+        body = {"raw": request.content.decode('utf-8', errors='replace')}
+    if not isinstance(body, dict):
+        body = {"body": body}
+
+    loose = {field: body.get(field) for field in ("model", "name", "prompt", "system", "messages")}
+    prefix = f"{request.method} {request.url.path} "
+
+    return _digest(prefix + json.dumps(body, sort_keys=True)), _digest(prefix + json.dumps(loose, sort_keys=True))
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class _Recorder:
+    """Splits a response body into lines and records each with its arrival time"""
+
+    def __init__(self, exchange: Dict, started: float, cassette: Cassette):
+        self._exchange = exchange
+        self._started = started
+        self._cassette = cassette
+        self._buffer = b""
+        self._closed = False
+
+    def _piece(self, data: bytes):
+        self._exchange['c'].append([round(time.monotonic() - self._started, 4), data.decode('utf-8', errors='replace')])
+
+    def feed(self, chunk: bytes):
+        self._buffer += chunk
+        while b"\n" in self._buffer:
+            line, _, self._buffer = self._buffer.partition(b"\n")
+            self._piece(line + b"\n")
+
+    def finish(self) -> bool:
+        """Write the exchange once; False if it was already written"""
+        if self._closed:
+            return False
+        self._closed = True
+
+        if self._buffer:
+            self._piece(self._buffer)
+            self._buffer = b""
+        self._cassette.append(self._exchange)
+        return True
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    """Response body that records each line and its arrival time as it is read"""
+
+    def __init__(self, stream: httpx.SyncByteStream, recorder: _Recorder):
+        self._stream = stream
+        self._recorder = recorder
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._recorder.feed(chunk)
+            yield chunk
+
+    def close(self):
+        self._stream.close()
+        self._recorder.finish()
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    """Async response body that records each line and its arrival time as it is read"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, recorder: _Recorder):
+        self._stream = stream
+        self._recorder = recorder
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._recorder.feed(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+        self._recorder.finish()
+
+
+def _prepare_recording(request: httpx.Request) -> Tuple[str, str]:
+    """Match keys of a request about to be recorded"""
+    # Record the body as it goes over the wire, uncompressed
+    request.headers['Accept-Encoding'] = 'identity'
+    return match_keys(request)
+
+
+def _recorder(request: httpx.Request, response: httpx.Response, keys: Tuple[str, str],
+              started: float, cassette: Cassette) -> _Recorder:
+    exchange = {
+        "k": keys[0],
+        "l": keys[1],
+        "p": request.url.path,
+        "s": response.status_code,
+        "t": response.headers.get('Content-Type', 'application/json'),
+        "h": round(time.monotonic() - started, 4),
+        "c": []
+    }
+    return _Recorder(exchange, started, cassette)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Transport that forwards requests and records the exchanges to a cassette"""
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.BaseTransport] = None):
+        """
+        Initialize recording transport
+
+        Args:
+            cassette: Cassette to record to
+            transport: Transport that reaches the server (defaults to httpx's)
+        """
+        self.cassette = cassette
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        keys = _prepare_recording(request)
+
+        started = time.monotonic()
+        response = self._transport.handle_request(request)
+        recorder = _recorder(request, response, keys, started, self.cassette)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, recorder),
+            extensions=response.extensions
+        )
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """Async transport that forwards requests and records the exchanges to a cassette"""
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize async recording transport
+
+        Args:
+            cassette: Cassette to record to
+            transport: Transport that reaches the server (defaults to httpx's)
+        """
+        self.cassette = cassette
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        keys = _prepare_recording(request)
+
+        started = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        recorder = _recorder(request, response, keys, started, self.cassette)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_AsyncRecordingStream(response.stream, recorder),
+            extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _missing(request: httpx.Request) -> httpx.Response:
+    logger.warning(f"⚠️ No recorded response for {request.method} {request.url.path}")
+    return httpx.Response(
+        status_code=404,
+        json={"error": f"no recorded response for {request.method} {request.url.path} in cassette"}
+    )
+
+
+def _release_time(started: float, offset: float, speed: float) -> float:
+    """Seconds to wait before releasing a piece recorded at offset"""
+    if speed <= 0:
+        return 0.0
+    return max(started + offset / speed - time.monotonic(), 0.0)
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    """Recorded body pieces, each released at its recorded time divided by speed"""
+
+    def __init__(self, pieces: List, started: float, speed: float):
+        self._pieces = pieces
+        self._started = started
+        self._speed = speed
+
+    def __iter__(self) -> Iterator[bytes]:
+        for offset, text in self._pieces:
+            delay = _release_time(self._started, offset, self._speed)
+            if delay:
+                time.sleep(delay)
+            yield text.encode('utf-8')
+
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    """Recorded body pieces released without blocking the event loop"""
+
+    def __init__(self, pieces: List, started: float, speed: float):
+        self._pieces = pieces
+        self._started = started
+        self._speed = speed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for offset, text in self._pieces:
+            delay = _release_time(self._started, offset, self._speed)
+            if delay:
+                await asyncio.sleep(delay)
+            yield text.encode('utf-8')
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Transport that answers requests from a cassette without a server"""
+
+    def __init__(self, cassette: Cassette, speed: float = 1.0):
+        """
+        Initialize replay transport
+
+        Args:
+            cassette: Cassette to replay
+            speed: Playback speed (1 = recorded timing, 10 = ten times faster,
+                0 = no delays at all)
+        """
+        self.cassette = cassette
+        self.speed = speed
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        started = time.monotonic()
+        exchange = self.cassette.find(*match_keys(request))
+
+        if exchange is None:
+            return _missing(request)
+
+        time.sleep(_release_time(started, exchange['h'], self.speed))
+
+        return httpx.Response(
+            status_code=exchange['s'],
+            headers={"Content-Type": exchange['t']},
+            stream=_ReplayStream(exchange['c'], started, self.speed)
+        )
+
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """Async transport that answers requests from a cassette without a server"""
+
+    def __init__(self, cassette: Cassette, speed: float = 1.0):
+        """
+        Initialize async replay transport
+
+        Args:
+            cassette: Cassette to replay
+            speed: Playback speed (see ReplayTransport)
+        """
+        self.cassette = cassette
+        self.speed = speed
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        started = time.monotonic()
+        exchange = self.cassette.find(*match_keys(request))
+
+        if exchange is None:
+            return _missing(request)
+
+        await asyncio.sleep(_release_time(started, exchange['h'], self.speed))
+
+        return httpx.Response(
+            status_code=exchange['s'],
+            headers={"Content-Type": exchange['t']},
+            stream=_AsyncReplayStream(exchange['c'], started, self.speed)
+        )
+
+
+_cassettes: Dict[Tuple[str, str], Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Optional[Path] = None, mode: Optional[str] = None) -> Cassette:
+    """Shared cassette for a path and mode (defaults to settings)"""
+    path = Path(path or settings.ollama_cassette_path or settings.storage_path / "cassettes" / "ollama.jsonl.gz")
+    mode = mode or settings.ollama_cassette_mode
+
+    with _cassettes_lock:
+        key = (str(path.resolve()), mode)
+        if key not in _cassettes:
+            _cassettes[key] = Cassette(path, mode)
+            logger.info(f"📼 Ollama cassette {mode} mode: {path}")
+        return _cassettes[key]
+
+
+def cassette_transport(asynchronous: bool = False):
+    """
+    Transport for settings.ollama_cassette_mode
+
+    Args:
+        asynchronous: Build an httpx.AsyncBaseTransport (for ollama.AsyncClient)
+
+    Returns:
+        Recording or replay transport, or None when no cassette is configured
+    """
+    mode = settings.ollama_cassette_mode.strip().lower()
+    if not mode:
+        return None
+
+    cassette = get_cassette(mode=mode)
+    if mode == "record":
+        return AsyncRecordingTransport(cassette) if asynchronous else RecordingTransport(cassette)
+    if asynchronous:
+        return AsyncReplayTransport(cassette, speed=settings.ollama_replay_speed)
+    return ReplayTransport(cassette, speed=settings.ollama_replay_speed)
@@ -0,0 +1,70 @@
+"""
+Ollama Errors - Typed failures raised by the Ollama clients
+"""
+
+from typing import Optional
+
+import httpx
+import ollama
+
+
+class OllamaError(Exception):
+    """Base class for Ollama request failures"""
+
+    retryable = False
+
+    def __init__(self, message: str, host: Optional[str] = None):
+        super().__init__(message)
+        self.host = host
+
+
+class OllamaUnavailableError(OllamaError, ConnectionError):
+    """No host could be reached (connection refused, breaker open, no free slot)"""
+
+    retryable = True
+
+
+class OllamaTimeoutError(OllamaError, TimeoutError):
+    """The request timed out"""
+
+    retryable = True
+
+
+class OllamaResponseError(OllamaError):
+    """The server answered with an error"""
+
+    def __init__(self, message: str, status_code: int = -1, host: Optional[str] = None):
+        super().__init__(message, host)
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        # Overload and server-side failures may succeed later; bad requests
+        # and unknown models will not
+        return self.status_code == 429 or self.status_code >= 500
+
+
+def classify_error(error: Exception, host: Optional[str] = None) -> OllamaError:
+    """
+    Convert a low-level exception into a typed OllamaError
+
+    Args:
+        error: Exception raised by ollama/httpx
+        host: URL of the host that failed, if known
+
+    Returns:
+        Matching OllamaError instance
+    """
+    if isinstance(error, OllamaError):
+        return error
+
+    if isinstance(error, ollama.ResponseError):
+        return OllamaResponseError(str(error), error.status_code, host)
+
+    if isinstance(error, httpx.TimeoutException):
+        return OllamaTimeoutError(f"Request timed out: {error}", host)
+
+    if isinstance(error, (httpx.TransportError, ConnectionError, OSError)):
+        return OllamaUnavailableError(str(error) or error.__class__.__name__, host)
+
+    return OllamaError(f"{error.__class__.__name__}: {error}", host)
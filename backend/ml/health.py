@@ -0,0 +1,173 @@
+"""
+Host Health - TTL-cached availability probe with a circuit breaker
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.ml.health")
+
+
+class HostHealth:
+    """
+    Cached health state for one Ollama host
+
+    The breaker is CLOSED while the host works. After `failure_threshold`
+    consecutive failures it goes OPEN and callers are told the host is down
+    without touching the network. Once `cooldown` seconds have passed a
+    single background probe runs (HALF_OPEN); success closes the breaker,
+    failure re-opens it for another cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        probe: Callable[[], object],
+        name: str = "ollama",
+        ttl: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        cooldown: Optional[float] = None
+    ):
+        """
+        Initialize host health tracker
+
+        Args:
+            probe: Callable that raises if the host is unreachable
+            name: Host label used in logs
+            ttl: Seconds a probe result stays fresh (defaults to settings)
+            failure_threshold: Consecutive failures that open the breaker (defaults to settings)
+            cooldown: Seconds the breaker stays open before probing again (defaults to settings)
+        """
+        self.probe = probe
+        self.name = name
+        self.ttl = ttl if ttl is not None else settings.ollama_health_ttl
+        self.failure_threshold = failure_threshold or settings.ollama_breaker_threshold
+        self.cooldown = cooldown if cooldown is not None else settings.ollama_breaker_cooldown
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._available: Optional[bool] = None
+        self._checked_at = 0.0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def is_available(self, force: bool = False) -> bool:
+        """
+        Return the cached health state, probing only when needed
+
+        The first call probes synchronously. Later calls return the cached
+        state and refresh it in the background once it is older than `ttl`.
+
+        Args:
+            force: Probe synchronously regardless of cache and breaker state
+
+        Returns:
+            True if the host is considered available
+        """
+        if force:
+            return self._run_probe()
+
+        with self._lock:
+            now = time.monotonic()
+
+            if self.state != self.CLOSED:
+                if self.state == self.OPEN and now - self._opened_at >= self.cooldown:
+                    self._start_background_probe()
+                return False
+
+            if self._available is None:
+                first_probe = True
+            else:
+                first_probe = False
+                if now - self._checked_at >= self.ttl:
+                    self._start_background_probe()
+                return self._available
+
+        if first_probe:
+            return self._run_probe()
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent (breaker not open)"""
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        """Record a successful call to the host"""
+        with self._lock:
+            if self.state != self.CLOSED or self._available is False:
+                logger.info(f"✅ {self.name} is available")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._available = True
+            self._checked_at = time.monotonic()
+
+    def record_failure(self, error: Optional[Exception] = None, probe: bool = False):
+        """
+        Record a failed call to the host, opening the breaker at the threshold
+
+        Failed requests below the threshold only count towards the breaker;
+        the host is reported unavailable once the breaker opens or when the
+        health probe itself failed.
+
+        Args:
+            error: The failure
+            probe: Whether the failure comes from the health probe
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            now = time.monotonic()
+
+            if probe:
+                self._available = False
+                self._checked_at = now
+
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(f"❌ {self.name} circuit opened after {self.consecutive_failures} failures"
+                                 f" (cooldown: {self.cooldown}s): {error}")
+                self.state = self.OPEN
+                self._opened_at = now
+
+    def _run_probe(self) -> bool:
+        """Probe the host now and update the state"""
+        try:
+            self.probe()
+            self.record_success()
+            return True
+        except Exception as e:
+            logger.error(f"❌ {self.name} not available: {str(e)}")
+            self.record_failure(e, probe=True)
+            return False
+        finally:
+            self._probing = False
+
+    def _start_background_probe(self):
+        """Start one background probe (caller holds the lock)"""
+        if self._probing:
+            return
+
+        self._probing = True
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+
+        threading.Thread(
+            target=self._run_probe,
+            name=f"ki-health-{self.name}",
+            daemon=True
+        ).start()
+
+    def snapshot(self) -> Dict:
+        """Current health state as a dictionary"""
+        return {
+            "host": self.name,
+            "state": self.state,
+            "available": self.state == self.CLOSED and self._available is not False,
+            "consecutive_failures": self.consecutive_failures
+        }
@@ -0,0 +1,240 @@
+"""
+Host Pool - Route Ollama requests across several inference hosts
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import ollama
+
+from backend.ml.cassette import cassette_transport
+from backend.ml.errors import OllamaUnavailableError
+from backend.ml.health import HostHealth
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.ml.host_pool")
+
+
+class OllamaHost:
+    """One Ollama endpoint with its concurrency limit, health and latency"""
+
+    # Weight of the newest sample in the latency moving average
+    LATENCY_ALPHA = 0.2
+
+    def __init__(self, url: str, max_concurrency: Optional[int] = None):
+        """
+        Initialize host
+
+        Args:
+            url: Ollama server URL
+            max_concurrency: Requests allowed in flight (defaults to settings)
+        """
+        self.url = url
+        self.max_concurrency = max_concurrency or settings.ollama_host_concurrency
+        # Requests go through a recording/replaying transport when a cassette is configured
+        transport = cassette_transport()
+        client_options = {"transport": transport} if transport else {}
+        self.client = ollama.Client(host=url, timeout=settings.ollama_timeout, **client_options)
+        self.health = HostHealth(probe=self.client.list, name=url)
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency_ewma: Optional[float] = None
+
+    @property
+    def load(self) -> float:
+        """Fraction of the concurrency limit in use"""
+        return self.in_flight / self.max_concurrency
+
+    def record_latency(self, seconds: float):
+        """Fold a request latency into the moving average"""
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += self.LATENCY_ALPHA * (seconds - self.latency_ewma)
+
+    def snapshot(self) -> Dict:
+        """Current host state as a dictionary"""
+        return {
+            **self.health.snapshot(),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "latency_ewma": self.latency_ewma
+        }
+
+
+class HostPool:
+    """
+    Pool of Ollama hosts with least-outstanding-requests routing
+
+    Each request goes to the healthy host with the lowest share of its
+    concurrency limit in use, ties broken by observed latency. When every
+    healthy host is at its limit, callers wait for a slot.
+    """
+
+    def __init__(self, hosts: Sequence[OllamaHost]):
+        """
+        Initialize host pool
+
+        Args:
+            hosts: Hosts to route across (first one is the primary)
+        """
+        if not hosts:
+            raise ValueError("HostPool needs at least one host")
+
+        self.hosts: List[OllamaHost] = list(hosts)
+        self._condition = threading.Condition()
+
+        # Recent request latencies across the pool, for tail percentiles
+        self._latencies = deque(maxlen=500)
+
+        logger.info(f"Ollama host pool: {', '.join(f'{h.url} (x{h.max_concurrency})' for h in self.hosts)}")
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "HostPool":
+        """
+        Build a pool from a comma-separated host list
+
+        Each entry is a URL, optionally followed by '=<max concurrency>',
+        e.g. "http://gpu1:11434=4,http://gpu2:11434=2".
+
+        Args:
+            spec: Host list
+
+        Returns:
+            HostPool instance
+        """
+        hosts = []
+        for entry in spec.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            url, _, limit = entry.partition("=")
+            hosts.append(OllamaHost(url.strip(), int(limit) if limit else None))
+
+        return cls(hosts)
+
+    @classmethod
+    def from_settings(cls, host: Optional[str] = None) -> "HostPool":
+        """Pool for an explicit host, else settings.ollama_hosts, else settings.ollama_host"""
+        if host:
+            return cls([OllamaHost(host)])
+        if settings.ollama_hosts.strip():
+            return cls.from_spec(settings.ollama_hosts)
+        return cls([OllamaHost(settings.ollama_host)])
+
+    @property
+    def primary(self) -> OllamaHost:
+        """First configured host"""
+        return self.hosts[0]
+
+    @property
+    def capacity(self) -> int:
+        """Total requests the pool can have in flight"""
+        return sum(host.max_concurrency for host in self.hosts)
+
+    def is_available(self, force: bool = False) -> bool:
+        """Whether any host is available"""
+        return any([host.health.is_available(force=force) for host in self.hosts])
+
+    def _pick(self, exclude: Sequence[OllamaHost]) -> Optional[OllamaHost]:
+        """Least-loaded healthy host with a free slot (caller holds the lock)"""
+        candidates = [
+            host for host in self.hosts
+            if host not in exclude
+            and host.health.allow_request()
+            and host.in_flight < host.max_concurrency
+        ]
+        if not candidates:
+            return None
+
+        return min(
+            candidates,
+            key=lambda host: (host.load, host.latency_ewma if host.latency_ewma is not None else 0.0)
+        )
+
+    def _has_healthy(self, exclude: Sequence[OllamaHost]) -> bool:
+        return any(host.health.allow_request() for host in self.hosts if host not in exclude)
+
+    @contextmanager
+    def acquire(self, exclude: Sequence[OllamaHost] = (), timeout: Optional[float] = None) -> Iterator[OllamaHost]:
+        """
+        Reserve a slot on the least-loaded healthy host
+
+        Latency is recorded when the block exits normally; an exception marks
+        the request as failed.
+
+        Args:
+            exclude: Hosts not to use
+            timeout: Seconds to wait for a slot (defaults to settings.ollama_timeout)
+
+        Yields:
+            The selected host
+
+        Raises:
+            OllamaUnavailableError: If no healthy host is left or no slot frees up in time
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else settings.ollama_timeout)
+
+        with self._condition:
+            while True:
+                host = self._pick(exclude)
+                if host is not None:
+                    break
+                if not self._has_healthy(exclude):
+                    raise OllamaUnavailableError("No healthy Ollama host available")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise OllamaUnavailableError("Timed out waiting for a free Ollama host slot")
+                # Re-check health periodically, breakers may open while waiting
+                self._condition.wait(min(remaining, 1.0))
+
+            host.in_flight += 1
+
+        started = time.monotonic()
+        ok = False
+        try:
+            yield host
+            ok = True
+        finally:
+            with self._condition:
+                host.in_flight -= 1
+                if ok:
+                    latency = time.monotonic() - started
+                    host.completed += 1
+                    host.record_latency(latency)
+                    self._latencies.append(latency)
+                else:
+                    host.failed += 1
+                self._condition.notify()
+
+    def latency_percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Latency percentile over recent requests
+
+        Args:
+            percentile: Percentile to compute (0-100)
+            min_samples: Samples required before returning a value
+
+        Returns:
+            Latency in seconds, or None if there are too few samples
+        """
+        with self._condition:
+            samples = sorted(self._latencies)
+
+        if len(samples) < max(1, min_samples):
+            return None
+
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> List[Dict]:
+        """State of every host"""
+        return [host.snapshot() for host in self.hosts]
@@ -0,0 +1,223 @@
+"""
+Ollama Metrics - Per-call performance telemetry (tokens/sec, load/eval durations)
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+# Bucket upper bounds: request latency in seconds, generation speed in tokens/sec
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200)
+
+# Ollama reports durations in nanoseconds
+NANOSECONDS = 1e9
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        """Add one sample"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self) -> Dict:
+        """Histogram as a dictionary (bucket labels are upper bounds)"""
+        labels = [f"<={bound:g}" for bound in self.buckets] + ["+inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "min": round(self.min, 3) if self.min is not None else None,
+            "max": round(self.max, 3) if self.max is not None else None,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+class _Group:
+    """Totals and histograms for one model or one host"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.eval_seconds = 0.0
+        self.prompt_eval_seconds = 0.0
+        self.load_seconds = 0.0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.tokens_per_second = Histogram(TOKENS_PER_SECOND_BUCKETS)
+
+    def add(self, call: Dict):
+        self.calls += 1
+        self.prompt_tokens += call['prompt_tokens']
+        self.output_tokens += call['output_tokens']
+        self.eval_seconds += call['eval_seconds']
+        self.prompt_eval_seconds += call['prompt_eval_seconds']
+        self.load_seconds += call['load_seconds']
+        self.latency.observe(call['wall_seconds'])
+        if call['eval_seconds'] > 0:
+            self.tokens_per_second.observe(call['output_tokens'] / call['eval_seconds'])
+
+    def snapshot(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "load_seconds": round(self.load_seconds, 3),
+            "tokens_per_second": _rate(self.output_tokens, self.eval_seconds),
+            "prompt_tokens_per_second": _rate(self.prompt_tokens, self.prompt_eval_seconds),
+            "latency_seconds": self.latency.snapshot(),
+            "tokens_per_second_histogram": self.tokens_per_second.snapshot()
+        }
+
+
+def call_stats(response: Dict, wall_seconds: float) -> Dict:
+    """
+    Extract the timing fields of one Ollama response
+
+    Args:
+        response: Final generate/chat response (the 'done' chunk when streaming)
+        wall_seconds: Client-side request time
+
+    Returns:
+        Token counts and durations in seconds
+    """
+    return {
+        "prompt_tokens": response.get('prompt_eval_count') or 0,
+        "output_tokens": response.get('eval_count') or 0,
+        "load_seconds": (response.get('load_duration') or 0) / NANOSECONDS,
+        "prompt_eval_seconds": (response.get('prompt_eval_duration') or 0) / NANOSECONDS,
+        "eval_seconds": (response.get('eval_duration') or 0) / NANOSECONDS,
+        "total_seconds": (response.get('total_duration') or 0) / NANOSECONDS,
+        "wall_seconds": wall_seconds
+    }
+
+
+def _rate(tokens: int, seconds: float) -> Optional[float]:
+    return round(tokens / seconds, 2) if seconds > 0 else None
+
+
+class MetricsCollector:
+    """
+    Aggregate of Ollama calls
+
+    Keeps run totals plus per-model and per-host latency and tokens/sec
+    histograms. Safe to update from several threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = _Group()
+        self._prompt_eval_seconds = 0.0
+        self._total_seconds = 0.0
+        self._wall_seconds = 0.0
+        self._by_model: Dict[str, _Group] = {}
+        self._by_host: Dict[str, _Group] = {}
+
+    def record(self, model: str, host: str, call: Dict):
+        """
+        Add one call
+
+        Args:
+            model: Model that served the call
+            host: URL of the host that served the call
+            call: Output of call_stats()
+        """
+        with self._lock:
+            self._totals.add(call)
+            self._prompt_eval_seconds += call['prompt_eval_seconds']
+            self._total_seconds += call['total_seconds']
+            self._wall_seconds += call['wall_seconds']
+            self._by_model.setdefault(model, _Group()).add(call)
+            self._by_host.setdefault(host, _Group()).add(call)
+
+    @property
+    def calls(self) -> int:
+        return self._totals.calls
+
+    def tokens_per_second(self) -> Optional[float]:
+        """Running output tokens/sec over server-side eval time"""
+        with self._lock:
+            return _rate(self._totals.output_tokens, self._totals.eval_seconds)
+
+    def snapshot(self) -> Dict:
+        """Totals and breakdowns as a dictionary"""
+        with self._lock:
+            totals = self._totals
+            return {
+                "calls": totals.calls,
+                "prompt_tokens": totals.prompt_tokens,
+                "output_tokens": totals.output_tokens,
+                "load_seconds": round(totals.load_seconds, 3),
+                "prompt_eval_seconds": round(self._prompt_eval_seconds, 3),
+                "eval_seconds": round(totals.eval_seconds, 3),
+                "server_seconds": round(self._total_seconds, 3),
+                "request_seconds": round(self._wall_seconds, 3),
+                "tokens_per_second": _rate(totals.output_tokens, totals.eval_seconds),
+                "prompt_tokens_per_second": _rate(totals.prompt_tokens, self._prompt_eval_seconds),
+                "by_model": {name: group.snapshot() for name, group in self._by_model.items()},
+                "by_host": {url: group.snapshot() for url, group in self._by_host.items()}
+            }
+
+
+# Process-wide collector
+metrics = MetricsCollector()
+
+# Collectors of the runs active in the current context (see collect())
+_active_runs: contextvars.ContextVar[Tuple[MetricsCollector, ...]] = contextvars.ContextVar(
+    "ki_active_metric_runs", default=()
+)
+
+
+def record_call(model: str, host: str, response: Dict, wall_seconds: float):
+    """
+    Record a finished Ollama call in the process-wide collector and in every
+    run collector active in the current context
+
+    Args:
+        model: Model that served the call
+        host: URL of the host that served the call
+        response: Final Ollama response
+        wall_seconds: Client-side request time
+    """
+    call = call_stats(response, wall_seconds)
+    metrics.record(model, host, call)
+    for collector in _active_runs.get():
+        collector.record(model, host, call)
+
+
+@contextmanager
+def collect() -> Iterator[MetricsCollector]:
+    """
+    Collect the calls made inside the block into a fresh collector
+
+    Worker threads only see the collector when started with the caller's
+    context (contextvars.copy_context().run).
+
+    Yields:
+        The run's MetricsCollector
+    """
+    collector = MetricsCollector()
+    token = _active_runs.set(_active_runs.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _active_runs.reset(token)
@@ -2,10 +2,21 @@
 Ollama Client - Interface for local LLM inference
 """
 
+import contextvars
+import json
 import ollama
-from typing import Dict, List, Optional, Generator
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterator, List, Optional, Generator, Union
 from pathlib import Path
 
+from backend.ml.errors import OllamaError, classify_error
+from backend.ml.host_pool import HostPool, OllamaHost
+from backend.ml.metrics import NANOSECONDS, record_call
+from backend.ml.response_cache import ResponseCache
+from backend.ml.retry import RetryPolicy
 from backend.utils.logger import setup_logger
 from backend.utils.config import settings
 
@@ -15,39 +26,83 @@ logger = setup_logger("ki.ml.ollama")
 class OllamaClient:
     """Client for interacting with Ollama LLM"""
 
-    def __init__(self, host: Optional[str] = None, model: Optional[str] = None):
+    # Seconds to wait before listing models again after no host answered
+    DIGEST_RETRY_SECONDS = 30.0
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        model: Optional[str] = None,
+        use_cache: Optional[bool] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge: Optional[bool] = None
+    ):
         """
         Initialize Ollama client
 
         Args:
-            host: Ollama server URL (defaults to settings)
+            host: Ollama server URL (defaults to settings.ollama_hosts, then settings.ollama_host)
             model: Default model to use (defaults to settings)
+            use_cache: Cache responses on disk (defaults to settings.enable_response_cache)
+            retry_policy: Backoff policy for failed requests (defaults to settings)
+            hedge: Re-issue requests slower than the pool's p95 latency to another
+                host or slot (defaults to settings.ollama_hedge_requests)
         """
-        self.host = host or settings.ollama_host
+        # Requests are routed across the pool; a single host is a pool of one
+        self.pool = HostPool.from_settings(host)
+        self.host = self.pool.primary.url
         self.model = model or settings.ollama_model
 
-        # Configure Ollama client
-        if self.host != "http://localhost:11434":
-            # Set custom host if not default
-            ollama._client.DEFAULT_HOST = self.host
+        # Primary host client and health, for management calls (list, pull, show)
+        self.client = self.pool.primary.client
+        self.health = self.pool.primary.health
+
+        # Persistent response cache keyed by model digest + request
+        use_cache = settings.enable_response_cache if use_cache is None else use_cache
+        self.cache = ResponseCache() if use_cache else None
+        self._model_digests: Dict[str, str] = {}
+        self._digest_failed_at: Optional[float] = None
+
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge = settings.ollama_hedge_requests if hedge is None else hedge
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        self.hedges_issued = 0
+        self.hedges_won = 0
+
+        # Model residency: every request carries a keep_alive; pinned models
+        # get settings.ollama_pin_keep_alive so they stay loaded for a job
+        self.keep_alive = _parse_keep_alive(settings.ollama_keep_alive)
+        self._pinned: Dict[str, int] = {}
+        # Options each model was loaded with, so release() does not reload it
+        self._pinned_options: Dict[str, Dict] = {}
+        self._pin_lock = threading.Lock()
+
+        # Token counts of the last response, per calling thread
+        self._local = threading.local()
 
         logger.info(f"Ollama client initialized: {self.host}, model: {self.model}")
 
-    def is_available(self) -> bool:
+    @property
+    def max_concurrency(self) -> int:
+        """Requests the host pool can serve at once"""
+        return self.pool.capacity
+
+    def is_available(self, force: bool = False) -> bool:
         """
         Check if Ollama server is available
 
+        The result is cached for settings.ollama_health_ttl seconds and
+        refreshed in the background; while a host's circuit breaker is open
+        it counts as down without contacting the server.
+
+        Args:
+            force: Probe the servers now instead of using the cached state
+
         Returns:
-            True if server is reachable, False otherwise
+            True if any pool host is reachable, False otherwise
         """
-        try:
-            # Try to list models
-            ollama.list()
-            logger.info("✅ Ollama server is available")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Ollama server not available: {str(e)}")
-            return False
+        return self.pool.is_available(force=force)
 
     def list_models(self) -> List[str]:
         """
@@ -57,7 +112,7 @@ class OllamaClient:
             List of model names
         """
         try:
-            models = ollama.list()
+            models = self.client.list()
             model_names = [model['name'] for model in models.get('models', [])]
             logger.info(f"Available models: {model_names}")
             return model_names
@@ -71,7 +126,12 @@ class OllamaClient:
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
-        stream: bool = False
+        stream: bool = False,
+        seed: Optional[int] = None,
+        use_cache: bool = True,
+        format: Optional[Union[str, Dict]] = None,
+        cache_if: Optional[Callable[[str], bool]] = None,
+        num_ctx: Optional[int] = None
     ) -> str:
         """
         Generate text from prompt
@@ -82,42 +142,75 @@ class OllamaClient:
             temperature: Sampling temperature (0.0 to 2.0)
             max_tokens: Maximum tokens to generate
             stream: Whether to stream response
+            seed: Sampling seed
+            use_cache: Set False to bypass the response cache for this call
+            format: Structured output constraint, 'json' or a JSON schema dict
+            cache_if: Only cache the reply when this returns True for it (for
+                example when it parses); replies cut off at max_tokens are
+                never cached
+            num_ctx: Context window to load the model with (None for the
+                server default)
 
         Returns:
             Generated text
+
+        Raises:
+            OllamaError: If the request fails after retries
         """
         model = model or self.model
 
-        try:
-            logger.info(f"Generating with model: {model}")
-
-            response = ollama.generate(
+        options = {
+            'temperature': temperature,
+            'num_predict': max_tokens
+        }
+        if seed is not None:
+            options['seed'] = seed
+        if num_ctx:
+            options['num_ctx'] = num_ctx
+
+        cache_key = None
+        if use_cache and not stream:
+            cache_key = self._cache_key('generate', model, prompt, dict(options, format=format), seed)
+            cached = self.cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                self._local.usage = None
+                logger.info(f"✅ Cache hit for {model} ({len(cached)} characters)")
+                return cached
+
+        logger.info(f"Generating with model: {model}")
+
+        keep_alive = self._keep_alive_for(model)
+
+        response = self._request(
+            lambda host: host.client.generate(
                 model=model,
                 prompt=prompt,
-                options={
-                    'temperature': temperature,
-                    'num_predict': max_tokens
-                },
-                stream=stream
-            )
-
-            if stream:
-                return response
-            else:
-                generated_text = response['response']
-                logger.info(f"✅ Generated {len(generated_text)} characters")
-                return generated_text
-
-        except Exception as e:
-            logger.error(f"❌ Generation error: {str(e)}")
-            return f"Error: {str(e)}"
+                options=options,
+                format=format or '',
+                stream=stream,
+                keep_alive=keep_alive
+            ),
+            hedge=self.hedge and not stream
+        )
+
+        if stream:
+            return response
+
+        self._local.usage = _usage(response)
+        generated_text = response['response']
+        if cache_key and _complete(response) and (cache_if is None or cache_if(generated_text)):
+            self.cache.put(cache_key, 'generate', model, generated_text)
+        logger.info(f"✅ Generated {len(generated_text)} characters{_speed(response)}")
+        return generated_text
 
     def chat(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         temperature: float = 0.7,
-        stream: bool = False
+        stream: bool = False,
+        seed: Optional[int] = None,
+        use_cache: bool = True
     ) -> str:
         """
         Chat with model using message history
@@ -127,32 +220,344 @@ class OllamaClient:
             model: Model to use (defaults to self.model)
             temperature: Sampling temperature
             stream: Whether to stream response
+            seed: Sampling seed
+            use_cache: Set False to bypass the response cache for this call
 
         Returns:
             Model response
+
+        Raises:
+            OllamaError: If the request fails after retries
         """
         model = model or self.model
 
-        try:
-            logger.info(f"Chat with model: {model}, messages: {len(messages)}")
+        options = {'temperature': temperature}
+        if seed is not None:
+            options['seed'] = seed
 
-            response = ollama.chat(
+        cache_key = None
+        if use_cache and not stream:
+            cache_key = self._cache_key('chat', model, messages, options, seed)
+            cached = self.cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                logger.info(f"✅ Cache hit for {model} ({len(cached)} characters)")
+                return cached
+
+        logger.info(f"Chat with model: {model}, messages: {len(messages)}")
+
+        keep_alive = self._keep_alive_for(model)
+
+        response = self._request(
+            lambda host: host.client.chat(
                 model=model,
                 messages=messages,
-                options={'temperature': temperature},
-                stream=stream
-            )
+                options=options,
+                stream=stream,
+                keep_alive=keep_alive
+            ),
+            hedge=self.hedge and not stream
+        )
+
+        if stream:
+            return response
+
+        reply = response['message']['content']
+        if cache_key and _complete(response):
+            self.cache.put(cache_key, 'chat', model, reply)
+        logger.info(f"✅ Chat response: {len(reply)} characters{_speed(response)}")
+        return reply
+
+    def _request(self, operation: Callable[[OllamaHost], Dict], hedge: bool = False):
+        """
+        Run a request against the pool with retries and optional hedging
 
-            if stream:
-                return response
-            else:
-                reply = response['message']['content']
-                logger.info(f"✅ Chat response: {len(reply)} characters")
-                return reply
+        Args:
+            operation: Callable issuing the request on a given host
+            hedge: Hedge the request once it exceeds the pool's p95 latency
+
+        Returns:
+            Raw Ollama response
+
+        Raises:
+            OllamaError: When the request fails and retries are exhausted
+        """
+        attempt = 0
+
+        while True:
+            try:
+                if hedge:
+                    return self._hedged_attempt(operation)
+                return self._attempt(operation)
+
+            except OllamaError as e:
+                if not self.retry_policy.should_retry(e, attempt):
+                    logger.error(f"❌ Ollama request failed: {str(e)}")
+                    raise
+
+                delay = self.retry_policy.delay(attempt)
+                attempt += 1
+                logger.warning(f"Ollama request failed ({str(e)}), retry {attempt}/"
+                               f"{self.retry_policy.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def _attempt(self, operation: Callable[[OllamaHost], Dict], acquired: Optional[threading.Event] = None):
+        """
+        Run one request on the least-loaded healthy host
+
+        Args:
+            operation: Callable issuing the request on a given host
+            acquired: Set once the request holds a host slot
+        """
+        host = None
+        try:
+            with ExitStack() as slot:
+                host = slot.enter_context(self.pool.acquire())
+                if acquired is not None:
+                    acquired.set()
+                started = time.monotonic()
+                response = operation(host)
+
+                # Streamed chunks are read after this returns; the stream keeps the slot until then
+                if not isinstance(response, dict):
+                    return _HeldStream(response, host, slot.pop_all(), started, self._record_error)
+
+            host.health.record_success()
+            record_call(response.get('model', ''), host.url, response, time.monotonic() - started)
+            return response
 
         except Exception as e:
-            logger.error(f"❌ Chat error: {str(e)}")
-            return f"Error: {str(e)}"
+            self._record_error(host, e)
+            raise classify_error(e, host.url if host else None) from e
+
+    def _hedged_attempt(self, operation: Callable[[OllamaHost], Dict]):
+        """
+        Run one request, re-issuing it if it outlives the pool's p95 latency
+
+        The duplicate goes through the pool like any request, so it lands on
+        the least-loaded host, normally a different one from the straggler.
+        Whichever copy succeeds first wins; the other is left to finish.
+        The p95 clock starts once the primary holds a host slot, so time
+        spent queueing for one never triggers a hedge.
+        """
+        hedge_after = self.pool.latency_percentile(95, settings.ollama_hedge_min_samples)
+        if hedge_after is None:
+            return self._attempt(operation)
+
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.pool.capacity * 2,
+                    thread_name_prefix="ki-hedge"
+                )
+            executor = self._hedge_executor
+
+        # Copies of the caller's context keep run-scoped metrics collection working
+        acquired = threading.Event()
+        primary = executor.submit(contextvars.copy_context().run, self._attempt, operation, acquired)
+        # Also wakes the wait below if the primary fails before getting a slot
+        primary.add_done_callback(lambda _: acquired.set())
+
+        acquired.wait()
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        logger.info(f"Request exceeded p95 ({hedge_after:.2f}s), issuing hedge")
+        with self._hedge_lock:
+            self.hedges_issued += 1
+        backup = executor.submit(contextvars.copy_context().run, self._attempt, operation)
+
+        last_error = None
+        for future in as_completed([primary, backup]):
+            try:
+                result = future.result()
+            except OllamaError as e:
+                last_error = e
+                continue
+            if future is backup:
+                with self._hedge_lock:
+                    self.hedges_won += 1
+            return result
+
+        raise last_error
+
+    def last_usage(self) -> Optional[Dict]:
+        """
+        Token counts of the last generate call made from this thread
+
+        Returns:
+            Dict with prompt_tokens and output_tokens, or None if the last
+            call was answered from the cache
+        """
+        return getattr(self._local, 'usage', None)
+
+    def _keep_alive_for(self, model: str):
+        """keep_alive to send with a request for a model"""
+        if self._pinned.get(model):
+            return _parse_keep_alive(settings.ollama_pin_keep_alive)
+        return self.keep_alive
+
+    def warm_up(self, models: List[str], pin: bool = True, num_ctx: Optional[int] = None) -> Dict[str, float]:
+        """
+        Load models on every pool host before a job starts
+
+        Sends an empty prompt per model and host, which makes Ollama load the
+        model without generating. With pin=True the models stay loaded until
+        release() is called, because every request for them sends
+        settings.ollama_pin_keep_alive instead of the normal keep_alive.
+
+        Args:
+            models: Model names to load
+            pin: Keep the models resident until release()
+            num_ctx: Context window the job's requests will use (Ollama reloads
+                a model when a request asks for a different one)
+
+        Returns:
+            Dict of {model: seconds spent loading, summed over hosts}
+        """
+        models = list(dict.fromkeys(models))
+        if not models:
+            return {}
+
+        options = {'num_ctx': num_ctx} if num_ctx else None
+
+        if pin:
+            with self._pin_lock:
+                for model in models:
+                    self._pinned[model] = self._pinned.get(model, 0) + 1
+                    if options:
+                        self._pinned_options[model] = options
+
+        load_times = {model: 0.0 for model in models}
+
+        def load(host: OllamaHost, model: str):
+            started = time.monotonic()
+            response = host.client.generate(
+                model=model,
+                prompt='',
+                options=options,
+                keep_alive=self._keep_alive_for(model)
+            )
+            # load_duration is reported in nanoseconds; 0 when already resident
+            return model, response.get('load_duration', 0) / 1e9, time.monotonic() - started
+
+        hosts = [host for host in self.pool.hosts if host.health.is_available()]
+        if not hosts:
+            logger.warning("No Ollama host available, skipping model warm-up")
+            return load_times
+
+        with ThreadPoolExecutor(max_workers=len(hosts) * len(models), thread_name_prefix="ki-warmup") as executor:
+            futures = [executor.submit(load, host, model) for host in hosts for model in models]
+            for future in as_completed(futures):
+                try:
+                    model, load_seconds, wall_seconds = future.result()
+                except Exception as e:
+                    logger.warning(f"Model warm-up failed: {str(e)}")
+                    continue
+                load_times[model] += load_seconds
+                logger.info(f"🔥 Warmed up {model} in {wall_seconds:.2f}s (load: {load_seconds:.2f}s)")
+
+        return load_times
+
+    def release(self, models: List[str], keep_alive=None):
+        """
+        Unpin models loaded by warm_up
+
+        The models get the normal keep_alive again, so Ollama unloads them on
+        its usual timer (pass keep_alive=0 to unload right away). The request
+        carries the options the model was warmed up with, otherwise Ollama
+        would reload it with its default context window just to unpin it.
+
+        Args:
+            models: Model names to release
+            keep_alive: keep_alive to apply now (defaults to the client's policy)
+        """
+        models = list(dict.fromkeys(models))
+        released = {}
+
+        with self._pin_lock:
+            for model in models:
+                count = self._pinned.get(model, 0) - 1
+                if count > 0:
+                    self._pinned[model] = count
+                else:
+                    self._pinned.pop(model, None)
+                    released[model] = self._pinned_options.pop(model, None)
+
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+
+        for host in self.pool.hosts:
+            if not host.health.allow_request():
+                continue
+            for model, options in released.items():
+                try:
+                    host.client.generate(model=model, prompt='', options=options, keep_alive=keep_alive)
+                except Exception as e:
+                    logger.debug(f"Could not release {model} on {host.url}: {str(e)}")
+
+        if released:
+            logger.info(f"Released models: {list(released)}")
+
+    def _cache_key(
+        self,
+        kind: str,
+        model: str,
+        payload,
+        options: Dict,
+        seed: Optional[int]
+    ) -> Optional[str]:
+        """Cache key for a request, or None when caching is off or the model is unknown"""
+
+        if self.cache is None:
+            return None
+
+        digest = self._model_digest(model)
+        if not digest:
+            return None
+
+        return ResponseCache.make_key(kind, model, digest, payload, options, seed)
+
+    def _model_digest(self, model: str) -> Optional[str]:
+        """Digest of the installed model build (cached per client)"""
+
+        if model not in self._model_digests:
+            # No host answered recently; generate uncached rather than wait on them again
+            if self._digest_failed_at and time.monotonic() - self._digest_failed_at < self.DIGEST_RETRY_SECONDS:
+                return None
+
+            models = None
+            for host in self.pool.hosts:
+                if not host.health.allow_request():
+                    continue
+                try:
+                    models = host.client.list().get('models', [])
+                    break
+                except Exception as e:
+                    logger.debug(f"Could not read model digests from {host.url}: {str(e)}")
+
+            if models is None:
+                self._digest_failed_at = time.monotonic()
+                return None
+            self._digest_failed_at = None
+
+            for entry in models:
+                name = entry.get('name', '')
+                self._model_digests[name] = entry.get('digest', '')
+                if name.endswith(':latest'):
+                    self._model_digests[name[:-len(':latest')]] = entry.get('digest', '')
+
+            # Unknown model: remember the miss instead of listing on every call
+            self._model_digests.setdefault(model, '')
+
+        return self._model_digests.get(model)
+
+    def _record_error(self, host: Optional[OllamaHost], error: Exception):
+        """Count connection-level failures against the host's circuit breaker"""
+
+        # A ResponseError means the server answered (bad model, bad request),
+        # so it says nothing about host health
+        if host is not None and not isinstance(error, ollama.ResponseError):
+            host.health.record_failure(error)
 
     def generate_examples_from_text(
         self,
@@ -194,11 +599,11 @@ Generate {num_examples} diverse, educational examples focusing on different aspe
             response = self.generate(
                 prompt=prompt,
                 temperature=temperature,
-                max_tokens=4096
+                max_tokens=4096,
+                cache_if=_is_json
             )
 
             # Parse JSON response
-            import json
             examples = json.loads(response)
 
             if isinstance(examples, list):
@@ -221,36 +626,94 @@ Generate {num_examples} diverse, educational examples focusing on different aspe
             logger.error(f"❌ Example generation error: {str(e)}")
             return []
 
-    def stream_generate(
+    def generate_stream(
         self,
         prompt: str,
         model: Optional[str] = None,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = 2048,
+        format: Optional[Union[str, Dict]] = None,
+        num_ctx: Optional[int] = None
     ) -> Generator[str, None, None]:
         """
         Stream generation token by token
 
+        Unlike stream_generate, errors are raised instead of yielded as text.
+        The stream is opened through the pool like any other request, so a
+        failure before the first token is retried on a healthy host; once
+        tokens have been yielded a failure is raised as is.
+
         Args:
             prompt: Input prompt
             model: Model to use
             temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate (None for the server default)
+            format: Structured output constraint, 'json' or a JSON schema dict
+            num_ctx: Context window to load the model with (None for the
+                server default)
 
         Yields:
             Generated tokens
+
+        Raises:
+            OllamaError: If the stream cannot be opened after retries, or
+                fails part way
         """
         model = model or self.model
 
-        try:
-            stream = ollama.generate(
+        options = {'temperature': temperature}
+        if max_tokens is not None:
+            options['num_predict'] = max_tokens
+        if num_ctx:
+            options['num_ctx'] = num_ctx
+
+        keep_alive = self._keep_alive_for(model)
+
+        # The host slot is held until the stream is fully consumed or closed
+        stream = self._request(
+            lambda host: _read_ahead(host.client.generate(
                 model=model,
                 prompt=prompt,
-                options={'temperature': temperature},
-                stream=True
-            )
+                options=options,
+                format=format or '',
+                stream=True,
+                keep_alive=keep_alive
+            ))
+        )
 
+        try:
             for chunk in stream:
                 if 'response' in chunk:
                     yield chunk['response']
+                if chunk.get('done'):
+                    self._local.usage = _usage(chunk)
+        finally:
+            stream.close()
+
+    def stream_generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7
+    ) -> Generator[str, None, None]:
+        """
+        Stream generation token by token
+
+        Args:
+            prompt: Input prompt
+            model: Model to use
+            temperature: Sampling temperature
+
+        Yields:
+            Generated tokens
+        """
+        try:
+            yield from self.generate_stream(
+                prompt=prompt,
+                model=model,
+                temperature=temperature,
+                max_tokens=None
+            )
 
         except Exception as e:
             logger.error(f"❌ Streaming error: {str(e)}")
@@ -258,7 +721,7 @@ Generate {num_examples} diverse, educational examples focusing on different aspe
 
     def pull_model(self, model_name: str) -> bool:
         """
-        Pull/download a model from Ollama registry
+        Pull/download a model from Ollama registry on every pool host
 
         Args:
             model_name: Name of model to pull
@@ -267,8 +730,10 @@ Generate {num_examples} diverse, educational examples focusing on different aspe
             True if successful, False otherwise
         """
         try:
-            logger.info(f"Pulling model: {model_name}")
-            ollama.pull(model_name)
+            for host in self.pool.hosts:
+                logger.info(f"Pulling model: {model_name} on {host.url}")
+                host.client.pull(model_name)
+            self._model_digests.clear()
             logger.info(f"✅ Model {model_name} pulled successfully")
             return True
         except Exception as e:
@@ -288,7 +753,7 @@ Generate {num_examples} diverse, educational examples focusing on different aspe
         model_name = model_name or self.model
 
         try:
-            info = ollama.show(model_name)
+            info = self.client.show(model_name)
             logger.info(f"Model info retrieved: {model_name}")
             return info
         except Exception as e:
@@ -296,6 +761,139 @@ Generate {num_examples} diverse, educational examples focusing on different aspe
             return {"error": str(e)}
 
 
+class _HeldStream:
+    """
+    Streamed response that holds its host slot until it is read to the end or closed
+
+    The outcome is recorded on the host's breaker at that point: success when
+    the stream ends or is closed early, failure when reading it raises.
+    """
+
+    def __init__(
+        self,
+        stream: Iterator[Dict],
+        host: OllamaHost,
+        slot: ExitStack,
+        started: float,
+        record_error: Callable[[OllamaHost, Exception], None]
+    ):
+        self._stream = stream
+        self._host = host
+        self._slot = slot
+        self._started = started
+        self._record_error = record_error
+        self._finished = False
+
+    def __iter__(self) -> "_HeldStream":
+        return self
+
+    def __next__(self) -> Dict:
+        if self._finished:
+            raise StopIteration
+
+        try:
+            chunk = next(self._stream)
+        except StopIteration:
+            self._finish()
+            raise
+        except Exception as e:
+            self._finish(e)
+            raise classify_error(e, self._host.url) from e
+
+        if chunk.get('done'):
+            record_call(chunk.get('model', ''), self._host.url, chunk, time.monotonic() - self._started)
+        return chunk
+
+    def close(self):
+        """Stop reading and release the slot"""
+        if not self._finished:
+            close = getattr(self._stream, 'close', None)
+            if close:
+                close()
+            self._finish()
+
+    def __del__(self):
+        self.close()
+
+    def _finish(self, error: Optional[Exception] = None):
+        if self._finished:
+            return
+        self._finished = True
+
+        if error is None:
+            self._slot.close()
+            self._host.health.record_success()
+        else:
+            # Let the pool count the request as failed
+            self._slot.__exit__(type(error), error, error.__traceback__)
+            self._record_error(self._host, error)
+
+
+def _read_ahead(stream: Iterator[Dict]) -> Iterator[Dict]:
+    """
+    Read the first chunk of a stream before handing it over
+
+    ollama's streams only connect once they are iterated, so without this a
+    refused connection or an error status would surface after the request
+    left the retry loop.
+    """
+    first = next(stream, None)
+
+    def chunks():
+        if first is not None:
+            yield first
+        yield from stream
+
+    return chunks()
+
+
+def _usage(response: Dict) -> Dict:
+    """Token counts of a response"""
+    return {
+        'prompt_tokens': response.get('prompt_eval_count') or 0,
+        'output_tokens': response.get('eval_count') or 0
+    }
+
+
+def _complete(response: Dict) -> bool:
+    """Whether a response ended on its own rather than at num_predict"""
+    return response.get('done_reason') != 'length'
+
+
+def _is_json(text: str) -> bool:
+    """Whether a reply parses as JSON"""
+    try:
+        json.loads(text)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+def _speed(response: Dict) -> str:
+    """Token count and generation speed of a response, for log lines"""
+    tokens = response.get('eval_count')
+    duration = response.get('eval_duration')
+    if not tokens or not duration:
+        return ""
+    return f" ({tokens} tokens, {tokens / (duration / NANOSECONDS):.1f} tokens/s)"
+
+
+def _parse_keep_alive(value: str):
+    """
+    Convert a keep_alive setting into what the Ollama API expects
+
+    Durations ("5m", "1h") are sent as strings, bare numbers as seconds
+    ("-1" keeps the model loaded indefinitely, "0" unloads it at once).
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
 # Global client instance
 ollama_client = OllamaClient()
 
@@ -0,0 +1,200 @@
+"""
+Response Cache - Persistent content-addressed cache for LLM responses
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.utils.logger import setup_logger
+from backend.utils.config import settings
+
+logger = setup_logger("ki.ml.response_cache")
+
+
+class ResponseCache:
+    """
+    Disk-backed LRU cache of Ollama responses, stored in the metadata SQLite db
+
+    Entries are keyed by a hash of the model digest, the request payload
+    (prompt or messages), the sampling options and the seed, so a new model
+    build or a changed option never returns a stale answer.
+    """
+
+    TABLE = "llm_response_cache"
+
+    def __init__(self, db_path: Optional[Path] = None, max_size_mb: Optional[int] = None):
+        """
+        Initialize response cache
+
+        Args:
+            db_path: SQLite file (defaults to settings.db_path)
+            max_size_mb: Size bound for cached responses (defaults to settings.cache_size_mb)
+        """
+        self.db_path = Path(db_path or settings.db_path)
+        self.max_size_bytes = (max_size_mb or settings.cache_size_mb) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_access ON {self.TABLE} (last_access)"
+            )
+
+        self._total_size = self._stored_size()
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        model: str,
+        model_digest: str,
+        payload: Any,
+        options: Dict,
+        seed: Optional[int] = None
+    ) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            kind: Request type ('generate' or 'chat')
+            model: Model name
+            model_digest: Digest of the model build reported by Ollama
+            payload: Prompt string or message list
+            options: Sampling options sent to Ollama
+            seed: Sampling seed, if any
+
+        Returns:
+            Hex SHA-256 key
+        """
+        payload_hash = hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+
+        material = json.dumps({
+            "kind": kind,
+            "model": model,
+            "digest": model_digest,
+            "payload": payload_hash,
+            "options": options,
+            "seed": seed
+        }, sort_keys=True, default=str)
+
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, refreshing its LRU position"""
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT response FROM {self.TABLE} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            with self._conn:
+                self._conn.execute(
+                    f"UPDATE {self.TABLE} SET last_access = ? WHERE key = ?",
+                    (time.time(), key)
+                )
+
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, kind: str, model: str, response: str):
+        """Store a response and evict least recently used entries over the size bound"""
+
+        size = len(response.encode('utf-8'))
+        if size > self.max_size_bytes:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            with self._conn:
+                previous = self._conn.execute(
+                    f"SELECT size FROM {self.TABLE} WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    f"""INSERT OR REPLACE INTO {self.TABLE}
+                        (key, kind, model, response, size, created_at, last_access)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (key, kind, model, response, size, now, now)
+                )
+
+            self._total_size += size - (previous[0] if previous else 0)
+
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete oldest entries until the cache fits its bound (caller holds the lock)"""
+
+        # Re-read the real size, another process may share the file
+        self._total_size = self._stored_size()
+        excess = self._total_size - self.max_size_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        freed = 0
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.TABLE} ORDER BY last_access ASC"
+        ):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+
+        with self._conn:
+            self._conn.executemany(f"DELETE FROM {self.TABLE} WHERE key = ?", victims)
+
+        self._total_size -= freed
+        logger.info(f"Evicted {len(victims)} cached responses ({freed / 1024 / 1024:.1f} MB)")
+
+    def _stored_size(self) -> int:
+        """Total bytes of cached responses on disk"""
+        row = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}").fetchone()
+        return row[0]
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.TABLE}")
+            self._total_size = 0
+
+        logger.info("Response cache cleared")
+
+    def stats(self) -> Dict:
+        """Cache statistics"""
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+
+        return {
+            "entries": entries,
+            "size_mb": self._total_size / 1024 / 1024,
+            "max_size_mb": self.max_size_bytes / 1024 / 1024,
+            "hits": self.hits,
+            "misses": self.misses
+        }
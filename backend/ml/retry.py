@@ -0,0 +1,64 @@
+"""
+Retry Policy - Jittered exponential backoff for Ollama requests
+"""
+
+import random
+from typing import Optional
+
+from backend.ml.errors import OllamaError
+from backend.utils.config import settings
+
+
+class RetryPolicy:
+    """Decide whether and when to retry a failed request"""
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        """
+        Initialize retry policy
+
+        Args:
+            max_retries: Retries after the first attempt (defaults to settings)
+            base_delay: Delay before the first retry in seconds (defaults to settings)
+            max_delay: Upper bound for a single delay in seconds (defaults to settings)
+        """
+        self.max_retries = settings.ollama_max_retries if max_retries is None else max_retries
+        self.base_delay = settings.ollama_retry_base_delay if base_delay is None else base_delay
+        self.max_delay = settings.ollama_retry_max_delay if max_delay is None else max_delay
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """
+        Whether to retry after a failure
+
+        Args:
+            error: The failure
+            attempt: Zero-based index of the attempt that failed
+
+        Returns:
+            True if another attempt should be made
+        """
+        return (
+            attempt < self.max_retries
+            and isinstance(error, OllamaError)
+            and error.retryable
+        )
+
+    def delay(self, attempt: int) -> float:
+        """
+        Backoff before the next attempt ("full jitter")
+
+        A random delay up to base_delay * 2^attempt, capped at max_delay, keeps
+        many workers that failed together from retrying in lockstep.
+
+        Args:
+            attempt: Zero-based index of the attempt that failed
+
+        Returns:
+            Seconds to wait
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
@@ -8,7 +8,7 @@ from typing import Dict, List, Optional
 from datetime import datetime
 
 from backend.training.lora_trainer import LoRATrainer
-from backend.clients.ollama_client import OllamaClient
+from backend.ml.ollama_client import OllamaClient
 from backend.utils.logger import setup_logger
 from backend.utils.config import settings
 
@@ -233,16 +233,26 @@ Output:"""
         results_a = []
         results_b = []
 
-        # Run tests on model A
-        for test_case in test_cases:
-            result = self.run_test_case(test_case, model_a)
-            results_a.append(result)
+        # Load both models up front and keep them resident, so the first
+        # test case of each model does not pay (and get timed with) the load
+        models = [model_a] + ([model_b] if model_b else [])
+        warm_up = settings.ollama_warm_up and self.ollama.is_available()
+        load_times = self.ollama.warm_up(models) if warm_up else {}
 
-        # Run tests on model B (if provided)
-        if model_b:
+        try:
+            # Run tests on model A
             for test_case in test_cases:
-                result = self.run_test_case(test_case, model_b)
-                results_b.append(result)
+                result = self.run_test_case(test_case, model_a)
+                results_a.append(result)
+
+            # Run tests on model B (if provided)
+            if model_b:
+                for test_case in test_cases:
+                    result = self.run_test_case(test_case, model_b)
+                    results_b.append(result)
+        finally:
+            if load_times:
+                self.ollama.release(models)
 
         # Calculate metrics
         metrics_a = self._calculate_metrics(results_a)
@@ -254,7 +264,8 @@ Output:"""
                 "name": model_a_name,
                 "identifier": model_a,
                 "results": results_a,
-                "metrics": metrics_a
+                "metrics": metrics_a,
+                "load_seconds": load_times.get(model_a)
             }
         }
 
@@ -263,7 +274,8 @@ Output:"""
                 "name": model_b_name,
                 "identifier": model_b,
                 "results": results_b,
-                "metrics": metrics_b
+                "metrics": metrics_b,
+                "load_seconds": load_times.get(model_b)
             }
 
         # Save comparison
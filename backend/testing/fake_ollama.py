@@ -0,0 +1,446 @@
+"""
+Fake Ollama Server - Local stand-in for load and throughput tests without a GPU
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from backend.core.chunking import CHARS_PER_TOKEN
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("ki.testing.fake_ollama")
+
+# Words the generated examples are built from
+VOCABULARY = (
+    "request", "header", "cookie", "session", "token", "redirect", "callback", "webhook", "parser",
+    "upload", "endpoint", "parameter", "payload", "proxy", "cache", "template", "query", "filter",
+    "encoding", "schema", "gateway", "metadata", "service", "router", "resolver", "permission",
+    "validation", "sanitizer", "allowlist", "firewall", "logging", "response", "handler", "credential",
+    "integration", "import", "export", "preview", "renderer", "scheduler", "worker", "queue", "storage",
+    "bucket", "account", "profile", "invoice", "report", "search", "comment", "attachment", "archive"
+)
+
+
+class FakeOllamaServer:
+    """
+    HTTP server speaking the subset of the Ollama API the platform uses
+
+    Implements /api/tags, /api/show, /api/generate and /api/chat, streamed
+    (NDJSON) and non-streamed, with the timing fields real servers report.
+    Replies are paced like a real model: a first-token latency, prompt
+    evaluation at prompt_rate tokens/sec and generation at tokens_per_second.
+    By default replies are example arrays shaped like what the generation
+    prompts ask for (including packed and structured prompts); canned payloads
+    replace them when given. A share of requests can be failed on purpose:
+    answered with an error status, dropped (the connection closes without a
+    complete reply) or hung past the client's timeout.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        models: Sequence[str] = ("llama3.1",),
+        latency: float = 0.05,
+        tokens_per_second: float = 200.0,
+        prompt_rate: float = 2000.0,
+        load_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        drop_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+        payloads: Optional[List[Union[str, Dict, List]]] = None,
+        context_length: int = 8192,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize fake server
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one, see url)
+            models: Model names served; other names get a 404
+            latency: Seconds before the first token
+            tokens_per_second: Generation speed (0 for no pacing)
+            prompt_rate: Prompt evaluation speed in tokens/sec (0 for no pacing)
+            load_seconds: Load time reported and slept the first time a model is used
+            error_rate: Share of generate/chat requests answered with error_status
+            error_status: HTTP status of injected errors
+            drop_rate: Share of generate/chat requests whose connection is
+                closed without a complete reply (streams stop halfway)
+            hang_rate: Share of generate/chat requests held for hang_seconds
+                before they are answered
+            hang_seconds: How long hung requests wait (stop() releases them)
+            payloads: Canned replies, served in turn (strings as-is, other
+                values as JSON); None builds example arrays from the prompt
+            context_length: num_ctx and context length reported by /api/show
+            seed: Random seed for fault injection and generated examples
+        """
+        self.models = list(models)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.prompt_rate = prompt_rate
+        self.load_seconds = load_seconds
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.drop_rate = drop_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.payloads = payloads
+        self.context_length = context_length
+
+        self.stats = {
+            "requests": 0, "generate": 0, "chat": 0, "errors": 0, "dropped": 0, "hung": 0, "streamed": 0
+        }
+        # Options of the latest generate/chat request, for tests
+        self.last_options: Dict = {}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._payload_index = 0
+        self._loaded: set = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+
+    @classmethod
+    def from_payload_file(cls, path: Path, **kwargs) -> "FakeOllamaServer":
+        """Server whose replies come from a JSON file holding a list of payloads"""
+        with open(path, 'r', encoding='utf-8') as f:
+            payloads = json.load(f)
+        if not isinstance(payloads, list):
+            payloads = [payloads]
+        return cls(payloads=payloads, **kwargs)
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as OLLAMA_HOST"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="ki-fake-ollama", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake Ollama server listening on {self.url} (models: {', '.join(self.models)})")
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted"""
+        logger.info(f"Fake Ollama server listening on {self.url} (models: {', '.join(self.models)})")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        """Stop serving"""
+        self._stopping.set()
+        # shutdown() waits for serve_forever to exit, so only call it when serving
+        if self._thread:
+            self._httpd.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Request handling -------------------------------------------------
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def tags(self) -> Dict:
+        """Body of /api/tags"""
+        now = datetime.now(timezone.utc).isoformat()
+        return {
+            "models": [
+                {
+                    "name": name,
+                    "model": name,
+                    "modified_at": now,
+                    "size": 4_700_000_000,
+                    "digest": hashlib.sha256(name.encode('utf-8')).hexdigest(),
+                    "details": {"family": "fake", "parameter_size": "8B", "quantization_level": "Q4_0"}
+                }
+                for name in self.models
+            ]
+        }
+
+    def show(self, model: str) -> Dict:
+        """Body of /api/show"""
+        return {
+            "modelfile": f"FROM {model}",
+            "parameters": f"num_ctx {self.context_length}",
+            "template": "{{ .Prompt }}",
+            "details": {"family": "fake", "parameter_size": "8B", "quantization_level": "Q4_0"},
+            "model_info": {"fake.context_length": self.context_length}
+        }
+
+    def inject_fault(self) -> Optional[str]:
+        """Fault to inject into this request: "error", "drop", "hang" or None"""
+        with self._lock:
+            if not (self.error_rate or self.drop_rate or self.hang_rate):
+                return None
+
+            roll = self._random.random()
+            for fault, rate, counter in (
+                ("error", self.error_rate, "errors"),
+                ("drop", self.drop_rate, "dropped"),
+                ("hang", self.hang_rate, "hung")
+            ):
+                if roll < rate:
+                    self.stats[counter] += 1
+                    return fault
+                roll -= rate
+        return None
+
+    def hang(self):
+        """Hold a request for hang_seconds, or until the server stops"""
+        self._stopping.wait(self.hang_seconds)
+
+    def reply_text(self, prompt: str, output_format=None) -> str:
+        """Text of the next reply"""
+        with self._lock:
+            if self.payloads:
+                payload = self.payloads[self._payload_index % len(self.payloads)]
+                self._payload_index += 1
+                return payload if isinstance(payload, str) else json.dumps(payload)
+
+            examples = self._fake_examples(prompt)
+
+        if output_format:
+            return json.dumps({"examples": examples})
+        return json.dumps(examples, indent=2)
+
+    def _fake_examples(self, prompt: str) -> List[Dict]:
+        """Examples shaped after the quota(s) the prompt asks for (caller holds the lock)"""
+        quotas = re.findall(r"- (\d+) examples from Document (\d+)", prompt)
+        if quotas:
+            numbers = [int(document) for count, document in quotas for _ in range(int(count))]
+        else:
+            match = re.search(r"Generate exactly (\d+)", prompt)
+            numbers = [None] * (int(match.group(1)) if match else 3)
+
+        category = re.search(r"specializing in (\S+) vulnerabilities", prompt)
+        category = category.group(1) if category else "security"
+
+        examples = []
+        for document in numbers:
+            example = {
+                "instruction": f"Explain how to identify and test for {category} in {self._words(4)}",
+                "input": f"A feature handling {self._words(6)}",
+                "output": f"To assess the {category} risk, {self._words(30)}."
+            }
+            if document is not None:
+                example = {"document": document, **example}
+            examples.append(example)
+
+        return examples
+
+    def _words(self, count: int) -> str:
+        """Random words, so generated examples do not look like duplicates (caller holds the lock)"""
+        return " ".join(self._random.choice(VOCABULARY) for _ in range(count))
+
+    def load_duration(self, model: str) -> float:
+        """Seconds to load a model, sleeping the first time it is used"""
+        with self._lock:
+            first_use = model not in self._loaded
+            self._loaded.add(model)
+
+        if first_use and self.load_seconds:
+            time.sleep(self.load_seconds)
+            return self.load_seconds
+        return 0.0
+
+    def timing(self, prompt_tokens: int, output_tokens: int, load_seconds: float) -> Dict:
+        """Timing fields of a final response, in nanoseconds"""
+        prompt_seconds = prompt_tokens / self.prompt_rate if self.prompt_rate else 0.0
+        eval_seconds = output_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        return {
+            "total_duration": int((load_seconds + self.latency + prompt_seconds + eval_seconds) * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": output_tokens,
+            "eval_duration": int(eval_seconds * 1e9)
+        }
+
+
+def _tokens(text: str) -> List[str]:
+    """Split text into token-sized pieces"""
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+def _make_handler(server: FakeOllamaServer):
+    """Request handler class bound to a FakeOllamaServer"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send_json(self, status: int, body: Dict):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self) -> Dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            server._count("requests")
+            if self.path == "/api/tags":
+                self._send_json(200, server.tags())
+            elif self.path in ("/", "/api/version"):
+                self._send_json(200, {"version": "0.0.0-fake"})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            server._count("requests")
+            try:
+                body = self._read_json()
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": "invalid JSON body"})
+                return
+
+            model = body.get("model") or body.get("name", "")
+
+            if self.path == "/api/show":
+                if model not in server.models:
+                    self._send_json(404, {"error": f"model '{model}' not found"})
+                else:
+                    self._send_json(200, server.show(model))
+                return
+
+            if self.path == "/api/pull":
+                self._send_json(200, {"status": "success"})
+                return
+
+            if self.path not in ("/api/generate", "/api/chat"):
+                self._send_json(404, {"error": "not found"})
+                return
+
+            chat = self.path == "/api/chat"
+            server._count("chat" if chat else "generate")
+            server.last_options = body.get("options") or {}
+
+            if model not in server.models:
+                self._send_json(404, {"error": f"model '{model}' not found, try pulling it first"})
+                return
+
+            fault = server.inject_fault()
+            if fault == "error":
+                self._send_json(server.error_status, {"error": "injected failure"})
+                return
+            if fault == "hang":
+                server.hang()
+
+            if chat:
+                prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+            else:
+                prompt = body.get("prompt", "")
+
+            self._generate(model, prompt, body, chat, drop=fault == "drop")
+
+        def _generate(self, model: str, prompt: str, body: Dict, chat: bool, drop: bool = False):
+            load_seconds = server.load_duration(model)
+            stream = body.get("stream", True)
+            created_at = datetime.now(timezone.utc).isoformat()
+
+            # An empty generate prompt only loads the model
+            if not prompt and not chat:
+                self._send_json(200, {
+                    "model": model, "created_at": created_at, "response": "", "done": True,
+                    "load_duration": int(load_seconds * 1e9)
+                })
+                return
+
+            prompt_tokens = len(_tokens(prompt))
+            tokens = _tokens(server.reply_text(prompt, body.get("format")))
+
+            num_predict = (body.get("options") or {}).get("num_predict")
+            done_reason = "stop"
+            if num_predict and num_predict > 0 and len(tokens) > num_predict:
+                tokens = tokens[:num_predict]
+                done_reason = "length"
+
+            time.sleep(server.latency + (prompt_tokens / server.prompt_rate if server.prompt_rate else 0.0))
+            delay = 1 / server.tokens_per_second if server.tokens_per_second else 0.0
+
+            def piece(text: str, done: bool) -> Dict:
+                message = {"model": model, "created_at": created_at, "done": done}
+                if chat:
+                    message["message"] = {"role": "assistant", "content": text}
+                else:
+                    message["response"] = text
+                return message
+
+            final = {**piece("" if stream else "".join(tokens), True), "done_reason": done_reason,
+                     **server.timing(prompt_tokens, len(tokens), load_seconds)}
+
+            if not stream:
+                time.sleep(delay * len(tokens))
+                if drop:
+                    # Close the connection without a response
+                    self.close_connection = True
+                    return
+                self._send_json(200, final)
+                return
+
+            server._count("streamed")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            try:
+                for number, token in enumerate(tokens):
+                    if drop and number >= len(tokens) // 2:
+                        # Cut the stream off halfway, without its final chunk
+                        self.close_connection = True
+                        return
+                    time.sleep(delay)
+                    self._write_chunk(json.dumps(piece(token, False)) + "\n")
+                self._write_chunk(json.dumps(final) + "\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                logger.debug("Client closed the stream early")
+
+        def _write_chunk(self, text: str):
+            data = text.encode('utf-8')
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
@@ -42,6 +42,24 @@ class Settings(BaseSettings):
     ollama_timeout: int = 300
     ollama_num_gpu: int = 1
     ollama_num_thread: int = 8
+    ollama_hosts: str = ""
+    ollama_host_concurrency: int = 4
+    ollama_max_connections: int = 100
+    ollama_max_keepalive_connections: int = 20
+    ollama_health_ttl: float = 30.0
+    ollama_breaker_threshold: int = 3
+    ollama_breaker_cooldown: float = 30.0
+    ollama_max_retries: int = 3
+    ollama_retry_base_delay: float = 0.5
+    ollama_retry_max_delay: float = 10.0
+    ollama_hedge_requests: bool = False
+    ollama_hedge_min_samples: int = 20
+    ollama_keep_alive: str = "5m"
+    ollama_pin_keep_alive: str = "-1"
+    ollama_warm_up: bool = True
+    ollama_cassette_mode: str = ""
+    ollama_cassette_path: str = ""
+    ollama_replay_speed: float = 1.0
 
     # Training
     default_base_model: str = "codellama/CodeLlama-7b-hf"
@@ -68,6 +86,19 @@ class Settings(BaseSettings):
     max_example_length: int = 500
     quality_threshold: float = 0.7
     enable_deduplication: bool = True
+    generation_chunk_tokens: int = 1500
+    generation_chunk_overlap_tokens: int = 150
+    generation_structured_format: str = "schema"
+    generation_context_tokens: int = 4096
+    generation_tokens_per_example: int = 300
+    generation_output_margin: float = 1.25
+    generation_pack_tokens: int = 2000
+    generation_oversample_budget: float = 2.5
+    generation_oversample_rounds: int = 3
+    generation_default_acceptance: float = 0.8
+    dedup_method: str = "lsh"
+    dedup_embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    dedup_embedding_batch_size: int = 64
 
     # Database
     db_path: Optional[Path] = None
@@ -101,6 +132,7 @@ class Settings(BaseSettings):
     # Advanced
     max_workers: int = 4
     cache_size_mb: int = 1024
+    enable_response_cache: bool = True
     cleanup_on_exit: bool = False
 
     class Config:
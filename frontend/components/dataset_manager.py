@@ -155,7 +155,8 @@ def generate_dataset_examples(
             parsed_documents=parsed_data,
             category=category,
             examples_per_doc=examples_per_doc,
-            quality_level=quality_level
+            quality_level=quality_level,
+            concurrent=True
         )
 
         # Create detailed log
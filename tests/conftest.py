@@ -0,0 +1,28 @@
+"""
+Shared fixtures - Run the platform against a local fake Ollama server
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read at import time, so point storage and logging away from the project first
+os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="ki-tests-"))
+os.environ.setdefault("LOG_TO_CONSOLE", "false")
+os.environ.setdefault("LOG_TO_FILE", "false")
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from backend.testing.fake_ollama import FakeOllamaServer
+
+
+@pytest.fixture
+def fake_ollama():
+    """Fake Ollama server with fast, unpaced replies"""
+    server = FakeOllamaServer(latency=0.0, tokens_per_second=0, prompt_rate=0, seed=7)
+    with server:
+        yield server
@@ -0,0 +1,41 @@
+"""
+Tests for the async Ollama client's shared host sessions
+"""
+
+import asyncio
+
+from backend.ml import async_ollama_client
+from backend.ml.async_ollama_client import AsyncOllamaClient, aclose_all
+
+
+def test_closing_one_client_keeps_the_shared_session_open(fake_ollama):
+    async def run():
+        client = AsyncOllamaClient(host=fake_ollama.url, model="llama3.1")
+
+        async with AsyncOllamaClient(host=fake_ollama.url, model="llama3.1") as other:
+            assert other.client is client.client
+            await other.generate("hello", max_tokens=8)
+
+        # The other client's exit must not close the pool this one uses
+        assert fake_ollama.url in async_ollama_client._host_sessions
+        text = await client.generate("hello again", max_tokens=8)
+
+        await client.aclose()
+        await client.aclose()
+        assert fake_ollama.url not in async_ollama_client._host_sessions
+        return text
+
+    assert asyncio.run(run())
+
+
+def test_aclose_all_closes_every_session(fake_ollama):
+    async def run():
+        AsyncOllamaClient(host=fake_ollama.url)
+        await aclose_all()
+        assert not async_ollama_client._host_sessions
+
+        # A client created afterwards gets a fresh session
+        async with AsyncOllamaClient(host=fake_ollama.url, model="llama3.1") as client:
+            return await client.generate("hello", max_tokens=8)
+
+    assert asyncio.run(run())
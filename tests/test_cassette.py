@@ -0,0 +1,44 @@
+"""
+Tests for recording Ollama exchanges to a cassette and replaying them
+"""
+
+import pytest
+
+from backend.ml import cassette
+from backend.ml.errors import OllamaError
+from backend.ml.ollama_client import OllamaClient
+from backend.utils.config import settings
+
+
+def use_cassette(monkeypatch, path, mode):
+    monkeypatch.setattr(settings, "ollama_cassette_mode", mode)
+    monkeypatch.setattr(settings, "ollama_cassette_path", str(path))
+    monkeypatch.setattr(settings, "ollama_replay_speed", 0.0)
+
+
+def test_replay_serves_recorded_responses_without_a_server(fake_ollama, monkeypatch, tmp_path):
+    monkeypatch.setattr(cassette, "_cassettes", {})
+    path = tmp_path / "ollama.jsonl.gz"
+    url = fake_ollama.url
+
+    use_cassette(monkeypatch, path, "record")
+    client = OllamaClient(host=url, model="llama3.1", use_cache=False)
+    recorded_text = client.generate("recorded request", max_tokens=32)
+    recorded_tokens = list(client.generate_stream("recorded stream", max_tokens=32))
+    assert fake_ollama.stats['generate'] == 2
+
+    fake_ollama.stop()
+
+    use_cassette(monkeypatch, path, "replay")
+    client = OllamaClient(host=url, model="llama3.1", use_cache=False)
+
+    assert client.generate("recorded request", max_tokens=32) == recorded_text
+    assert list(client.generate_stream("recorded stream", max_tokens=32)) == recorded_tokens
+    assert len(recorded_tokens) > 1
+
+    with pytest.raises(OllamaError):
+        client.generate("never recorded", max_tokens=32)
+
+    replayed = cassette.get_cassette().snapshot()
+    assert replayed['replayed'] == 2
+    assert replayed['missed'] == 1
@@ -0,0 +1,202 @@
+"""
+Behaviour of dataset generation against the fake Ollama server
+"""
+
+import json
+import random
+import time
+from collections import Counter
+
+import pytest
+
+from backend.core.dataset_generator import DatasetGenerator
+from backend.core.run_journal import RunJournal
+from backend.ml.ollama_client import OllamaClient
+from backend.testing.fake_ollama import VOCABULARY, FakeOllamaServer
+
+
+class TaggedServer(FakeOllamaServer):
+    """
+    Replies that are near-duplicates across documents
+
+    Every document gets the same examples, except for one word naming the
+    document ("tag-<name>") in each output. The first document answers last.
+    """
+
+    def __init__(self, slow_marker: str, delay: float, **kwargs):
+        super().__init__(latency=0.0, tokens_per_second=0, prompt_rate=0, **kwargs)
+        self.slow_marker = slow_marker
+        self.delay = delay
+
+    def reply_text(self, prompt: str, output_format=None) -> str:
+        if self.slow_marker in prompt:
+            time.sleep(self.delay)
+
+        tag = next(word.strip(".") for word in prompt.split() if word.startswith("tag-"))
+        examples = []
+        for number in range(3):
+            words = random.Random(number)
+            text = lambda count: " ".join(words.choice(VOCABULARY) for _ in range(count))
+            examples.append({
+                "instruction": f"Explain how to identify and test for SSRF in {text(6)}",
+                "input": f"A feature handling {text(8)}",
+                "output": f"To assess the SSRF risk, {text(40)} as reviewed by {tag}."
+            })
+
+        if output_format:
+            return json.dumps({"examples": examples})
+        return json.dumps(examples, indent=2)
+
+
+@pytest.fixture
+def tagged_server():
+    with TaggedServer(slow_marker="tag-first", delay=0.5, seed=1) as server:
+        yield server
+
+
+def example(words: random.Random) -> dict:
+    text = lambda count: " ".join(words.choice(VOCABULARY) for _ in range(count))
+    return {
+        "instruction": f"Explain how to identify and test for SSRF in {text(6)}",
+        "input": f"A feature handling {text(8)}",
+        "output": f"To assess the SSRF risk, {text(40)}."
+    }
+
+
+def documents(*tags):
+    return {
+        f"{tag}.txt": {"full_text": f"Notes written by {tag}. " + "SSRF lets attackers reach internal hosts. " * 20}
+        for tag in tags
+    }
+
+
+def test_concurrent_deduplication_keeps_the_earliest_document(tagged_server):
+    client = OllamaClient(host=tagged_server.url, model="llama3.1", use_cache=False)
+    generator = DatasetGenerator(client)
+
+    dataset = generator.generate_dataset(
+        documents("tag-first", "tag-second", "tag-third"),
+        "SSRF",
+        examples_per_doc=3,
+        concurrent=True,
+        max_workers=3,
+        resume=False,
+        warm_up=False,
+        deduplicate=True
+    )
+
+    outputs = [example['output'] for example in dataset['examples']]
+    # The first document finishes last but still wins over its later copies
+    assert len(outputs) == 3
+    assert all(output.endswith("tag-first.") for output in outputs)
+    assert dataset['metadata']['stats']['duplicates_rejected'] == 6
+
+
+def test_concurrent_items_are_journaled_and_reported_as_they_finish(tagged_server):
+    client = OllamaClient(host=tagged_server.url, model="llama3.1", use_cache=False)
+    generator = DatasetGenerator(client)
+    journal = RunJournal("finish-order")
+    reported = []
+
+    def progress(done, total, info):
+        reported.append((info['document'], len(journal.completed())))
+
+    tags = ["tag-first"] + [f"tag-other{number}" for number in range(5)]
+    dataset = generator.generate_dataset(
+        documents(*tags),
+        "SSRF",
+        examples_per_doc=3,
+        concurrent=True,
+        max_workers=2,
+        resume=True,
+        run_id="finish-order",
+        warm_up=False,
+        deduplicate=True,
+        progress_callback=progress
+    )
+
+    # The slow first document does not hold back the others
+    assert reported[0][0] != "tag-first.txt"
+    assert reported[0][1] == 1
+    assert reported[-1] == ("tag-first.txt", 6)
+    # Deduplication still keeps the first document's copies
+    assert all(example['output'].endswith("tag-first.") for example in dataset['examples'])
+
+
+def test_followup_requests_bypass_the_response_cache():
+    words = random.Random(3)
+    # Each first-pass reply falls two examples short; follow-ups get three new ones
+    payloads = [[example(words)], [example(words) for _ in range(3)], [example(words) for _ in range(3)]]
+
+    with FakeOllamaServer(latency=0.0, tokens_per_second=0, prompt_rate=0, payloads=payloads) as server:
+        client = OllamaClient(host=server.url, model="llama3.1", use_cache=True)
+
+        def run():
+            return DatasetGenerator(client).generate_dataset(
+                documents("tag-cached"),
+                "SSRF",
+                examples_per_doc=3,
+                resume=False,
+                warm_up=False,
+                deduplicate=True,
+                fill_to_target=True,
+                oversample_budget=2.0
+            )
+
+        run()
+        assert server.stats['generate'] == 2
+
+        # The second run's first request is answered from the cache. Its
+        # follow-up repeats that prompt exactly and must reach the server
+        # instead of getting the same short reply back
+        dataset = run()
+        assert server.stats['generate'] == 3
+        assert len(dataset['examples']) == 3
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_planned_context_window_is_sent(fake_ollama, streaming):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=False)
+    generator = DatasetGenerator(client)
+
+    generator.generate_examples_from_document(
+        "SSRF lets attackers reach internal hosts. " * 20, "notes.txt", "SSRF",
+        num_examples=2, streaming=streaming
+    )
+
+    assert fake_ollama.last_options['num_ctx'] == generator.budget.context_window("llama3.1")
+
+
+def test_packed_examples_are_assigned_to_their_documents():
+    words = random.Random(5)
+
+    def tagged(number):
+        return dict(example(words), document=number)
+
+    # Document 1 gets one example over its quota, document 3 one short and
+    # document 2 none; the untagged and out-of-range ones fill the gaps
+    reply = [
+        tagged(1), tagged(1), tagged(1),
+        tagged("3"),
+        example(words), tagged(4), tagged(0), tagged("last")
+    ]
+
+    with FakeOllamaServer(latency=0.0, tokens_per_second=0, prompt_rate=0, payloads=[reply]) as server:
+        client = OllamaClient(host=server.url, model="llama3.1", use_cache=False)
+
+        dataset = DatasetGenerator(client).generate_dataset(
+            documents("tag-one", "tag-two", "tag-three"),
+            "SSRF",
+            examples_per_doc=2,
+            resume=False,
+            warm_up=False,
+            packed=True,
+            pack_tokens=4000,
+            deduplicate=False
+        )
+
+        assert server.stats['generate'] == 1
+
+    counts = Counter(example['source'] for example in dataset['examples'])
+    assert counts == {"tag-one.txt": 3, "tag-two.txt": 2, "tag-three.txt": 2}
+    assert all('document' not in example for example in dataset['examples'])
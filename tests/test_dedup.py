@@ -0,0 +1,72 @@
+"""
+Tests for the deduplication methods of DatasetTools
+"""
+
+import json
+import random
+
+import pytest
+
+from backend.core.dataset_tools import DatasetTools
+from backend.testing.fake_ollama import VOCABULARY
+
+
+def make_examples(count=40, seed=5):
+    words = random.Random(seed)
+    text = lambda size: " ".join(words.choice(VOCABULARY) for _ in range(size))
+
+    examples = []
+    for _ in range(count):
+        example = {
+            "instruction": f"Explain SSRF in {text(5)}",
+            "input": f"A feature handling {text(6)}",
+            "output": f"To assess the risk, {text(25)}."
+        }
+        examples.append(example)
+
+        roll = words.random()
+        if roll < 0.2:
+            # Same text up to case, spacing and trailing punctuation
+            examples.append({key: f"  {value.upper()}!" for key, value in example.items()})
+        elif roll < 0.4:
+            examples.append(dict(example, output=example['output'] + " Also check the logs"))
+    return examples
+
+
+@pytest.mark.parametrize("method", ["lsh", "parallel"])
+def test_methods_match_pairwise(method):
+    tools = DatasetTools()
+    examples = make_examples()
+
+    expected = tools.deduplicate_examples(examples, method="pairwise")
+    pairwise_stats = tools.last_dedup_stats
+
+    assert tools.deduplicate_examples(examples, method=method, workers=2) == expected
+    assert tools.last_dedup_stats['canonical_duplicates'] == pairwise_stats['canonical_duplicates'] > 0
+    assert tools.last_dedup_stats['fuzzy_duplicates'] == pairwise_stats['fuzzy_duplicates'] > 0
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_lsh_merge_records_stage_counts(tmp_path, incremental):
+    tools = DatasetTools()
+    examples = make_examples()
+    base = tools.deduplicate_examples(examples[:30], method="lsh")
+    incoming = examples[30:]
+
+    base_path = tmp_path / "base.json"
+    base_path.write_text(json.dumps({"metadata": {}, "examples": base}), encoding="utf-8")
+    if incremental:
+        # Saving a merged dataset also saves its dedup index
+        base_path = tools.save_dataset(tools.merge_datasets([base_path], "base"), "base")
+    incoming_path = tmp_path / "incoming.json"
+    incoming_path.write_text(json.dumps({"metadata": {}, "examples": incoming}), encoding="utf-8")
+
+    tools.last_dedup_stats = {}
+    merged = tools.merge_datasets([base_path, incoming_path], "merged")
+
+    stats = tools.last_dedup_stats
+    assert merged['metadata']['merge_info']['incremental'] == incremental
+    assert stats['method'] == "lsh"
+    assert stats['input'] == len(base) + len(incoming)
+    assert stats['remaining'] == len(merged['examples'])
+    assert stats['canonical_duplicates'] + stats['fuzzy_duplicates'] == merged['metadata']['duplicates_removed']
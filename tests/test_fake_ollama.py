@@ -0,0 +1,58 @@
+"""
+Tests for the fake Ollama server's fault injection
+"""
+
+import hashlib
+
+import httpx
+import ollama
+import pytest
+
+from backend.ml.errors import OllamaError
+from backend.ml.health import HostHealth
+from backend.ml.ollama_client import OllamaClient
+from backend.ml.retry import RetryPolicy
+from backend.testing.fake_ollama import FakeOllamaServer
+
+
+def make_server(**faults):
+    return FakeOllamaServer(latency=0.0, tokens_per_second=0, prompt_rate=0, seed=3, **faults)
+
+
+def test_digest_is_stable_across_processes(fake_ollama):
+    models = ollama.Client(host=fake_ollama.url).list()['models']
+
+    assert models[0]['digest'] == hashlib.sha256(b"llama3.1").hexdigest()
+
+
+def test_dropped_connections_open_the_breaker():
+    with make_server(drop_rate=1.0) as server:
+        client = OllamaClient(host=server.url, model="llama3.1", use_cache=False,
+                              retry_policy=RetryPolicy(max_retries=0))
+        for _ in range(client.health.failure_threshold):
+            with pytest.raises(OllamaError):
+                client.generate("dropped request")
+
+        assert server.stats['dropped'] == client.health.failure_threshold
+        assert client.health.state == HostHealth.OPEN
+
+
+def test_dropped_stream_stops_halfway():
+    with make_server(drop_rate=1.0) as server:
+        stream = ollama.Client(host=server.url).generate(model="llama3.1", prompt="streamed request", stream=True)
+
+        chunks = []
+        with pytest.raises(httpx.HTTPError):
+            for chunk in stream:
+                chunks.append(chunk)
+
+        assert chunks
+        assert not any(chunk.get('done') for chunk in chunks)
+
+
+def test_hung_requests_time_out():
+    with make_server(hang_rate=1.0, hang_seconds=5) as server:
+        with pytest.raises(httpx.TimeoutException):
+            ollama.Client(host=server.url, timeout=0.3).generate(model="llama3.1", prompt="hung request")
+
+        assert server.stats['hung'] == 1
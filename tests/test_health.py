@@ -0,0 +1,55 @@
+"""
+Tests for the host health circuit breaker
+"""
+
+import ollama
+
+from backend.ml.health import HostHealth
+
+
+def make_health(server, threshold=3):
+    client = ollama.Client(host=server.url, timeout=5)
+    return HostHealth(probe=client.list, name=server.url, ttl=60, failure_threshold=threshold, cooldown=60)
+
+
+def test_request_failures_below_threshold_keep_host_available(fake_ollama):
+    health = make_health(fake_ollama)
+    assert health.is_available()
+
+    health.record_failure(TimeoutError("slow reply"))
+
+    assert health.state == HostHealth.CLOSED
+    assert health.allow_request()
+    assert health.is_available()
+
+
+def test_threshold_failures_open_the_breaker(fake_ollama):
+    health = make_health(fake_ollama, threshold=3)
+    assert health.is_available()
+
+    for _ in range(3):
+        health.record_failure(TimeoutError("slow reply"))
+
+    assert health.state == HostHealth.OPEN
+    assert not health.allow_request()
+    assert not health.is_available()
+
+
+def test_success_resets_failure_count(fake_ollama):
+    health = make_health(fake_ollama, threshold=2)
+    assert health.is_available()
+
+    health.record_failure(TimeoutError("slow reply"))
+    health.record_success()
+    health.record_failure(TimeoutError("slow reply"))
+
+    assert health.state == HostHealth.CLOSED
+    assert health.is_available()
+
+
+def test_failed_probe_reports_unavailable():
+    health = HostHealth(probe=ollama.Client(host="http://127.0.0.1:9", timeout=1).list,
+                        name="down", ttl=60, failure_threshold=3, cooldown=60)
+
+    assert not health.is_available()
+    assert health.state == HostHealth.CLOSED
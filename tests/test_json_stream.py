@@ -0,0 +1,47 @@
+"""
+Tests for the streaming example parser
+"""
+
+import json
+
+from backend.core.json_stream import ExampleStreamParser
+
+GOOD = {"instruction": "Find the SSRF", "input": "A webhook", "output": "Check the callback URL"}
+BROKEN = '{"instruction": "a, "input": "b", "output": "c"}'
+
+
+def parse(text, piecewise=False):
+    parser = ExampleStreamParser()
+    if piecewise:
+        examples = parser.feed_all(text)
+    else:
+        examples = parser.feed(text)
+    return examples, parser.errors
+
+
+def test_unterminated_string_does_not_swallow_later_examples():
+    text = f"[{BROKEN}, {json.dumps(GOOD)}]"
+
+    assert parse(text) == ([GOOD], 1)
+    assert parse(text, piecewise=True) == ([GOOD], 1)
+
+
+def test_unterminated_string_in_wrapper_before_newline():
+    text = '{"examples": [\n  ' + BROKEN + ',\n  ' + json.dumps(GOOD) + '\n]}'
+
+    assert parse(text) == ([GOOD], 1)
+    assert parse(text, piecewise=True) == ([GOOD], 1)
+
+
+def test_braces_inside_string_values_are_left_alone():
+    example = dict(GOOD, output='Send [{"url": "a"}, {"instruction": "b"}] to the parser')
+    text = json.dumps([example, GOOD])
+
+    assert parse(text) == ([example, GOOD], 0)
+    assert parse(text, piecewise=True) == ([example, GOOD], 0)
+
+
+def test_malformed_object_in_wrapper_is_counted_once():
+    text = '{"examples": [{"instruction": "a" "input": "b"}, ' + json.dumps(GOOD) + ']}'
+
+    assert parse(text) == ([GOOD], 1)
@@ -0,0 +1,143 @@
+"""
+Tests for the Ollama client's response cache and model digest lookups
+"""
+
+import threading
+import time
+from contextlib import ExitStack
+
+from backend.ml.health import HostHealth
+from backend.ml.ollama_client import OllamaClient
+from backend.ml.retry import RetryPolicy
+from backend.testing.fake_ollama import FakeOllamaServer
+
+
+def make_server(payloads):
+    return FakeOllamaServer(latency=0.0, tokens_per_second=0, prompt_rate=0, payloads=payloads)
+
+
+def test_replies_cut_off_at_num_predict_are_not_cached():
+    with make_server(["x" * 400, "short"]) as server:
+        client = OllamaClient(host=server.url, model="llama3.1", use_cache=True)
+
+        client.generate("cut off reply", max_tokens=10)
+        client.generate("cut off reply", max_tokens=10)
+
+        assert server.stats['generate'] == 2
+
+
+def test_replies_rejected_by_cache_if_are_not_cached():
+    with make_server(["not json", "[]"]) as server:
+        client = OllamaClient(host=server.url, model="llama3.1", use_cache=True)
+        is_list = lambda text: text.startswith("[")
+
+        assert client.generate("unparsed reply", cache_if=is_list) == "not json"
+        assert client.generate("unparsed reply", cache_if=is_list) == "[]"
+        assert client.generate("unparsed reply", cache_if=is_list) == "[]"
+
+        assert server.stats['generate'] == 2
+
+
+def test_model_digest_skips_open_breakers_and_remembers_failures(fake_ollama):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=True)
+    health = client.pool.primary.health
+    for _ in range(health.failure_threshold):
+        health.record_failure(TimeoutError("slow reply"))
+    assert health.state == HostHealth.OPEN
+
+    assert client._model_digest("llama3.1") is None
+    assert client._model_digest("llama3.1") is None
+    assert fake_ollama.stats['requests'] == 0
+
+    # Until the retry delay passes the hosts are not listed again
+    health.record_success()
+    assert client._model_digest("llama3.1") is None
+    client._digest_failed_at -= OllamaClient.DIGEST_RETRY_SECONDS
+    assert client._model_digest("llama3.1")
+
+
+def test_waiting_for_a_slot_does_not_trigger_a_hedge(fake_ollama):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=False, hedge=True)
+    # Requests normally take 100ms
+    client.pool._latencies.extend([0.1] * 50)
+
+    # Every slot is busy for the first 400ms of the request
+    slots = ExitStack()
+    for _ in range(client.pool.capacity):
+        slots.enter_context(client.pool.acquire())
+    threading.Timer(0.4, slots.close).start()
+
+    started = time.monotonic()
+    client.generate("queued request")
+
+    assert time.monotonic() - started >= 0.4
+    assert client.hedges_issued == 0
+
+
+def test_streamed_generate_holds_its_slot_until_read(fake_ollama):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=False)
+    host = client.pool.primary
+
+    stream = client.generate("streamed request", stream=True)
+    assert host.in_flight == 1
+
+    text = "".join(chunk['response'] for chunk in stream)
+    assert text
+    assert host.in_flight == 0
+    assert host.completed == 1
+
+
+def test_closing_a_stream_early_releases_its_slot(fake_ollama):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=False)
+    host = client.pool.primary
+
+    stream = client.generate("streamed request", stream=True)
+    next(stream)
+    stream.close()
+
+    assert host.in_flight == 0
+    assert client.health.state == HostHealth.CLOSED
+
+
+def test_warm_up_without_models_does_nothing(fake_ollama):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=False)
+
+    assert client.warm_up([]) == {}
+    assert fake_ollama.stats['requests'] == 0
+
+
+def test_release_keeps_the_context_window_a_model_was_pinned_with(fake_ollama):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=False)
+
+    client.warm_up(["llama3.1"], num_ctx=8192)
+    client.release(["llama3.1"])
+
+    assert fake_ollama.stats['generate'] == 2
+    assert fake_ollama.last_options.get('num_ctx') == 8192
+
+
+class FailsFirstRequest(FakeOllamaServer):
+    """Answers the first generate/chat request with a 503"""
+
+    failed = False
+
+    def inject_fault(self):
+        if self.failed:
+            return None
+        self.failed = True
+        self.stats['errors'] += 1
+        return "error"
+
+
+def test_stream_that_fails_to_open_is_retried():
+    with FailsFirstRequest(latency=0.0, tokens_per_second=0, prompt_rate=0, error_status=503,
+                           payloads=["streamed after a retry"]) as server:
+        client = OllamaClient(host=server.url, model="llama3.1", use_cache=False,
+                              retry_policy=RetryPolicy(max_retries=1, base_delay=0.0))
+
+        tokens = list(client.generate_stream("retried stream"))
+
+        assert "".join(tokens) == "streamed after a retry"
+        assert server.stats['errors'] == 1
+        assert server.stats['generate'] == 2
+        assert client.pool.primary.in_flight == 0
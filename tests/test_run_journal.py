@@ -0,0 +1,70 @@
+"""
+Tests for the run journal behind resumable dataset generation
+"""
+
+from backend.core.dataset_generator import DatasetGenerator
+from backend.core.run_journal import RunJournal
+from backend.ml.ollama_client import OllamaClient
+
+
+def documents(*names):
+    return {
+        f"{name}.txt": {"full_text": f"Notes on {name}. " + "SSRF lets attackers reach internal hosts. " * 20}
+        for name in names
+    }
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    journal = RunJournal("torn", runs_path=tmp_path)
+    journal.start({"category": "SSRF"})
+    journal.append({"document": "a.txt", "examples": [{"output": "first"}]})
+    journal.append({"document": "b.txt", "examples": [{"output": "second"}]})
+
+    # A crash in the middle of a write leaves half a record behind
+    with open(journal.results_path, 'a', encoding='utf-8') as f:
+        f.write('{"document": "c.txt", "examples": [{"outp')
+
+    completed = journal.completed()
+
+    assert sorted(completed) == ["a.txt", "b.txt"]
+    assert completed["b.txt"]["examples"] == [{"output": "second"}]
+
+
+def test_later_record_for_a_document_wins(tmp_path):
+    journal = RunJournal("rewritten", runs_path=tmp_path)
+    journal.start({"category": "SSRF"})
+    journal.append({"document": "a.txt", "examples": [{"output": "old"}]})
+    journal.append({"document": "b.txt", "examples": [{"output": "other"}]})
+    journal.append({"document": "a.txt", "examples": [{"output": "new"}]})
+
+    completed = journal.completed()
+
+    assert completed["a.txt"]["examples"] == [{"output": "new"}]
+    assert len(completed) == 2
+
+
+def test_resumed_run_does_not_request_journaled_documents(fake_ollama):
+    client = OllamaClient(host=fake_ollama.url, model="llama3.1", use_cache=False)
+
+    def run(names):
+        return DatasetGenerator(client).generate_dataset(
+            documents(*names),
+            "SSRF",
+            examples_per_doc=2,
+            resume=True,
+            run_id="resume-skip",
+            warm_up=False,
+            deduplicate=False
+        )
+
+    first = run(["alpha", "beta"])
+    assert fake_ollama.stats['generate'] == 2
+    assert first['examples']
+
+    # The same run with one more document only asks for the new one
+    second = run(["alpha", "beta", "gamma"])
+    assert fake_ollama.stats['generate'] == 3
+
+    assert second['metadata']['stats']['resumed_documents'] == 2
+    resumed_outputs = [example['output'] for example in second['examples']]
+    assert all(example['output'] in resumed_outputs for example in first['examples'])
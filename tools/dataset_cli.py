@@ -4,7 +4,13 @@ Dataset Management CLI Tool
 """
 
 import sys
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List
 import argparse
 
 # Add parent directory to path
@@ -12,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.core.dataset_tools import DatasetTools
 from backend.utils.logger import setup_logger
+from backend.utils.config import settings
 
 logger = setup_logger("ki.tools.dataset_cli")
 
@@ -28,6 +35,9 @@ Examples:
   # Merge datasets
   python tools/dataset_cli.py merge ssrf_v1.json ssrf_v2.json -o ssrf_final
 
+  # Append new examples to a master set (only the new ones are checked)
+  python tools/dataset_cli.py merge ssrf_master.json ssrf_today.json -o ssrf_master
+
   # Deduplicate a dataset
   python tools/dataset_cli.py dedupe ssrf_v1.json -o ssrf_v1_clean
 
@@ -36,6 +46,12 @@ Examples:
 
   # Filter by quality
   python tools/dataset_cli.py filter ssrf_v1.json --min-quality 0.7 -o ssrf_high_quality
+
+  # Generate a dataset from a directory of documents (no UI needed)
+  python tools/dataset_cli.py generate ./reports -c SSRF -n 5 -w 8 -o ssrf_batch
+
+  # Generate from a glob, resuming an interrupted run
+  python tools/dataset_cli.py generate "docs/**/*.md" -c XSS --resume --chunked -o xss_batch
         """
     )
 
@@ -49,6 +65,8 @@ Examples:
     merge_parser.add_argument('datasets', nargs='+', help='Dataset files to merge')
     merge_parser.add_argument('-o', '--output', required=True, help='Output dataset name')
     merge_parser.add_argument('--no-dedupe', action='store_true', help='Skip deduplication')
+    merge_parser.add_argument('-t', '--threshold', type=float, default=0.85,
+                              help='Similarity threshold (0-1)')
 
     # Deduplicate command
     dedupe_parser = subparsers.add_parser('dedupe', help='Remove duplicates from dataset')
@@ -56,6 +74,12 @@ Examples:
     dedupe_parser.add_argument('-o', '--output', required=True, help='Output dataset name')
     dedupe_parser.add_argument('-t', '--threshold', type=float, default=0.85,
                               help='Similarity threshold (0-1)')
+    dedupe_parser.add_argument('--method', choices=['lsh', 'pairwise', 'parallel', 'semantic'], default='lsh',
+                              help='lsh: MinHash candidates, near-linear; pairwise: compare with every kept example; '
+                                   'parallel: pairwise on a process pool; '
+                                   'semantic: embedding cosine similarity (threshold applies to cosine)')
+    dedupe_parser.add_argument('-w', '--workers', type=int, default=None,
+                              help='Processes for --method parallel (default: MAX_WORKERS)')
 
     # Validate command
     validate_parser = subparsers.add_parser('validate', help='Validate dataset')
@@ -68,6 +92,35 @@ Examples:
                               help='Minimum quality score')
     filter_parser.add_argument('-o', '--output', required=True, help='Output dataset name')
 
+    # Generate command
+    generate_parser = subparsers.add_parser('generate', help='Generate a dataset from documents')
+    generate_parser.add_argument('inputs', nargs='+', help='Document files, directories or glob patterns')
+    generate_parser.add_argument('-c', '--category', required=True, help='Vulnerability category (SSRF, XSS, ...)')
+    generate_parser.add_argument('-o', '--output', help='Output dataset name (defaults to <category>_<timestamp>)')
+    generate_parser.add_argument('-n', '--examples-per-doc', type=int, default=settings.examples_per_document,
+                                 help='Examples to generate per document')
+    generate_parser.add_argument('-q', '--quality', choices=['High', 'Medium', 'Low'], default='High',
+                                 help='Quality threshold')
+    generate_parser.add_argument('--temperature', type=float, default=0.7, help='Sampling temperature')
+    generate_parser.add_argument('--model', help='Ollama model (defaults to settings)')
+    generate_parser.add_argument('-w', '--workers', type=int,
+                                 help='Concurrent generation requests (defaults to settings/host pool)')
+    generate_parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 1,
+                                 help='Processes used to parse documents')
+    generate_parser.add_argument('--resume', action=argparse.BooleanOptionalAction, default=None,
+                                 help='Journal progress and skip documents finished by an earlier run')
+    generate_parser.add_argument('--run-id', help='Explicit run id to resume')
+    generate_parser.add_argument('--no-cache', action='store_true', help='Bypass the Ollama response cache')
+    generate_parser.add_argument('--chunked', action='store_true', help='Split long documents into chunks')
+    generate_parser.add_argument('--packed', action='store_true', help='Pack small documents into shared requests')
+    generate_parser.add_argument('--structured', action='store_true', help='Constrain replies to the example schema')
+    generate_parser.add_argument('--streaming', action='store_true', help='Stream and validate examples as they arrive')
+    generate_parser.add_argument('--fill-to-target', action='store_true',
+                                 help='Send follow-up requests for documents left short by quality rejection')
+    generate_parser.add_argument('--no-dedupe', action='store_true', help='Skip online near-duplicate rejection')
+    generate_parser.add_argument('--allow-simulated', action='store_true',
+                                 help='Run even if Ollama is unreachable (writes simulated examples)')
+
     args = parser.parse_args()
 
     if not args.command:
@@ -93,6 +146,9 @@ Examples:
     elif args.command == 'filter':
         cmd_filter(tools, args)
 
+    elif args.command == 'generate':
+        sys.exit(cmd_generate(tools, args))
+
 
 def cmd_list(tools: DatasetTools):
     """List all datasets"""
@@ -133,7 +189,8 @@ def cmd_merge(tools: DatasetTools, args):
     merged = tools.merge_datasets(
         dataset_paths=dataset_paths,
         output_name=args.output,
-        deduplicate=not args.no_dedupe
+        deduplicate=not args.no_dedupe,
+        similarity_threshold=args.threshold
     )
 
     # Save
@@ -142,6 +199,8 @@ def cmd_merge(tools: DatasetTools, args):
     print(f"\n✅ Merged dataset saved: {output_path}")
     print(f"   Total examples: {len(merged['examples'])}")
     print(f"   Duplicates removed: {merged['metadata']['duplicates_removed']}")
+    if merged['metadata']['merge_info']['incremental']:
+        print(f"   Incremental: only new examples were checked against {args.datasets[0]}'s dedup index")
 
 
 def cmd_dedupe(tools: DatasetTools, args):
@@ -160,7 +219,9 @@ def cmd_dedupe(tools: DatasetTools, args):
     original_count = len(dataset['examples'])
     dataset['examples'] = tools.deduplicate_examples(
         dataset['examples'],
-        similarity_threshold=args.threshold
+        similarity_threshold=args.threshold,
+        method=args.method,
+        workers=args.workers
     )
 
     duplicates_removed = original_count - len(dataset['examples'])
@@ -168,6 +229,7 @@ def cmd_dedupe(tools: DatasetTools, args):
     # Update metadata
     dataset['metadata']['deduplicated'] = True
     dataset['metadata']['duplicates_removed'] = duplicates_removed
+    dataset['metadata']['dedup_stages'] = tools.last_dedup_stats
 
     # Save
     output_path = tools.save_dataset(dataset, args.output)
@@ -175,7 +237,9 @@ def cmd_dedupe(tools: DatasetTools, args):
     print(f"\n✅ Deduplicated dataset saved: {output_path}")
     print(f"   Original: {original_count} examples")
     print(f"   After deduplication: {len(dataset['examples'])} examples")
-    print(f"   Removed: {duplicates_removed} duplicates")
+    print(f"   Removed: {duplicates_removed} duplicates "
+          f"({tools.last_dedup_stats['canonical_duplicates']} exact after normalization, "
+          f"{tools.last_dedup_stats['fuzzy_duplicates']} similar)")
 
 
 def cmd_validate(tools: DatasetTools, args):
@@ -253,5 +317,113 @@ def cmd_filter(tools: DatasetTools, args):
     print(f"   Filtered out: {original_count - len(dataset['examples'])} examples")
 
 
+def collect_documents(inputs: List[str]) -> List[Path]:
+    """Expand files, directories (recursively) and glob patterns into document paths"""
+    from backend.data.parsers import is_supported_document
+
+    paths = []
+    for entry in inputs:
+        if Path(entry).is_dir():
+            candidates = sorted(p for p in Path(entry).rglob('*') if p.is_file())
+        elif glob.has_magic(entry):
+            candidates = sorted(Path(p) for p in glob.glob(entry, recursive=True) if Path(p).is_file())
+        else:
+            candidates = [Path(entry)]
+
+        paths.extend(p for p in candidates if is_supported_document(p))
+
+    # Same file given twice (e.g. directory and glob) is parsed once
+    return list(dict.fromkeys(p.resolve() for p in paths))
+
+
+def parse_documents(paths: List[Path], workers: int) -> Dict[str, Dict]:
+    """Parse documents in worker processes, keeping input order"""
+    from backend.data.parsers import parse_document
+
+    parsed = {}
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as executor:
+        for path, result in zip(paths, executor.map(parse_document, paths)):
+            if result.get('success'):
+                parsed[str(path)] = result
+            else:
+                failed += 1
+                print(f"   ❌ {path.name}: {result.get('error')}")
+
+    print(f"   Parsed {len(parsed)} documents ({failed} failed)")
+
+    return parsed
+
+
+def cmd_generate(tools: DatasetTools, args) -> int:
+    """Generate a dataset from documents without the UI"""
+    from backend.core.dataset_generator import DatasetGenerator
+    from backend.ml.ollama_client import OllamaClient
+
+    print(f"\n🧠 Generating {args.category} dataset")
+
+    paths = collect_documents(args.inputs)
+    if not paths:
+        print("❌ No supported documents found")
+        return 1
+
+    print(f"\n📄 Parsing {len(paths)} documents with {args.parse_workers} processes...")
+    parsed = parse_documents(paths, args.parse_workers)
+    if not parsed:
+        print("❌ No documents could be parsed")
+        return 1
+
+    client = OllamaClient(model=args.model, use_cache=not args.no_cache)
+    if not client.is_available(force=True):
+        if not args.allow_simulated:
+            print(f"❌ Ollama is not reachable at {client.host} (use --allow-simulated to run anyway)")
+            return 2
+        print("⚠️  Ollama is not reachable, generating simulated examples")
+
+    generator = DatasetGenerator(ollama_client=client)
+    started = time.monotonic()
+
+    def report_progress(done: int, total: int, info: Dict):
+        speed = f", {info['tokens_per_second']:.1f} tokens/s" if info.get('tokens_per_second') else ""
+        print(f"   [{done}/{total}] {info['document']} - {info['examples']} examples, "
+              f"{time.monotonic() - started:.0f}s{speed}", flush=True)
+
+    print(f"\n⚙️  Generating with {client.model} ({args.examples_per_doc} examples per document)...")
+    dataset = generator.generate_dataset(
+        parsed_documents=parsed,
+        category=args.category,
+        examples_per_doc=args.examples_per_doc,
+        quality_level=args.quality,
+        temperature=args.temperature,
+        concurrent=True,
+        max_workers=args.workers,
+        chunked=args.chunked,
+        streaming=args.streaming,
+        resume=args.resume,
+        run_id=args.run_id,
+        structured=args.structured,
+        packed=args.packed,
+        fill_to_target=args.fill_to_target,
+        deduplicate=False if args.no_dedupe else None,
+        progress_callback=report_progress
+    )
+
+    output_name = args.output or f"{args.category.lower()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    output_path = tools.save_dataset(dataset, output_name)
+
+    stats = dataset['metadata']['stats']
+    print(f"\n✅ Dataset saved: {output_path}")
+    print(f"   Examples: {len(dataset['examples'])} from {stats['total_documents']} documents")
+    print(f"   Generated: {stats['total_generated']}, rejected: {stats['total_rejected']}")
+    if stats.get('resumed_documents'):
+        print(f"   Resumed: {stats['resumed_documents']} documents (run {dataset['metadata']['run_id']})")
+    if stats.get('ollama', {}).get('tokens_per_second'):
+        print(f"   Throughput: {stats['ollama']['tokens_per_second']:.1f} tokens/s")
+    print(f"   Time: {time.monotonic() - started:.1f}s\n")
+
+    return 0
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama Server - Run a local Ollama stand-in for load and throughput tests
+"""
+
+import sys
+from pathlib import Path
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.testing.fake_ollama import FakeOllamaServer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="KI Fake Ollama Server",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Serve llama3.1 on the default Ollama port
+  python tools/fake_ollama.py --port 11434
+
+  # Slow model with 5% failures, then generate against it
+  python tools/fake_ollama.py --port 11500 --tokens-per-second 30 --error-rate 0.05
+  OLLAMA_HOST=http://127.0.0.1:11500 python tools/dataset_cli.py generate docs/ -c SSRF
+
+  # Drop 10% of connections and hang 5% past the client timeout (breaker and hedging)
+  python tools/fake_ollama.py --port 11500 --drop-rate 0.1 --hang-rate 0.05 --hang-seconds 200
+
+  # Serve canned replies from a JSON list
+  python tools/fake_ollama.py --payload-file replies.json
+        """
+    )
+
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=11434, help='Port to bind')
+    parser.add_argument('--models', nargs='+', default=['llama3.1'], help='Model names to serve')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='Generation speed (0 = no pacing)')
+    parser.add_argument('--prompt-rate', type=float, default=2000.0,
+                        help='Prompt evaluation speed in tokens/sec (0 = no pacing)')
+    parser.add_argument('--load-seconds', type=float, default=0.0, help='Load time on first use of a model')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests to fail (0-1)')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected failures')
+    parser.add_argument('--drop-rate', type=float, default=0.0,
+                        help='Share of requests whose connection is dropped mid-reply (0-1)')
+    parser.add_argument('--hang-rate', type=float, default=0.0,
+                        help='Share of requests held for --hang-seconds before answering (0-1)')
+    parser.add_argument('--hang-seconds', type=float, default=30.0, help='How long hung requests wait')
+    parser.add_argument('--payload-file', type=Path, help='JSON list of canned replies, served in turn')
+    parser.add_argument('--context-length', type=int, default=8192, help='Context window reported by /api/show')
+    parser.add_argument('--seed', type=int, help='Random seed')
+
+    args = parser.parse_args()
+
+    options = dict(
+        host=args.host,
+        port=args.port,
+        models=args.models,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        prompt_rate=args.prompt_rate,
+        load_seconds=args.load_seconds,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        drop_rate=args.drop_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        context_length=args.context_length,
+        seed=args.seed
+    )
+
+    if args.payload_file:
+        server = FakeOllamaServer.from_payload_file(args.payload_file, **options)
+    else:
+        server = FakeOllamaServer(**options)
+
+    print(f"🧪 Fake Ollama serving {', '.join(args.models)} on {server.url} (Ctrl+C to stop)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()